@@ -0,0 +1,108 @@
+"""成分股广度引擎基准：合成 N 只 x Y 年的收盘价面板，测量指标计算与面板加载耗时
+
+对比两种实现：
+  numpy   stockbot.breadth.compute_indicators (按列向量化)
+  pandas  逐 ticker 循环的 pandas 参考实现 (同时用来校验结果一致)
+
+    python benchmarks/breadth.py --tickers 500 --years 10
+    # CI 防回退：numpy 计算超过阈值时退出码为 1
+    python benchmarks/breadth.py --max-seconds 1.0
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from stockbot.breadth import BreadthPanel, compute_indicators  # noqa: E402
+
+
+def make_panel(tickers, days, seed=0):
+    """几何随机游走；部分 ticker 晚上市，少量随机缺失"""
+    rng = np.random.default_rng(seed)
+    closes = (100 * np.exp(np.cumsum(rng.normal(0, 0.02, (days, tickers)), axis=0))).astype(np.float32)
+    for j in range(0, tickers, 17):
+        closes[: rng.integers(0, days // 2), j] = np.nan
+    closes[rng.random((days, tickers)) < 0.001] = np.nan
+    return closes
+
+
+def pandas_reference(closes):
+    """逐 ticker 计算再汇总的朴素实现"""
+    df = pd.DataFrame(closes.astype(np.float64))
+    above50, above200, valid50, valid200, highs, lows = (pd.DataFrame(index=df.index) for _ in range(6))
+    for col in df.columns:
+        s = df[col]
+        ma50, ma200 = s.rolling(50).mean(), s.rolling(200).mean()
+        hi, lo = s.rolling(252).max(), s.rolling(252).min()
+        above50[col], valid50[col] = (s > ma50) & ma50.notna(), ma50.notna()
+        above200[col], valid200[col] = (s > ma200) & ma200.notna(), ma200.notna()
+        highs[col], lows[col] = (s >= hi) & hi.notna(), (s <= lo) & lo.notna()
+    change = df.diff()
+    advances, declines = (change > 0).sum(axis=1), (change < 0).sum(axis=1)
+    rana = ((advances - declines) / (advances + declines) * 1000).fillna(0)
+    return {
+        "pct_above_50": (above50.sum(axis=1) / valid50.sum(axis=1) * 100).to_numpy(),
+        "pct_above_200": (above200.sum(axis=1) / valid200.sum(axis=1) * 100).to_numpy(),
+        "ad_line": (advances - declines).cumsum().to_numpy(),
+        "new_highs": highs.sum(axis=1).to_numpy(),
+        "new_lows": lows.sum(axis=1).to_numpy(),
+        "mcclellan": (rana.ewm(span=19, adjust=False).mean() - rana.ewm(span=39, adjust=False).mean()).to_numpy(),
+    }
+
+
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        samples.append(time.perf_counter() - started)
+    return result, statistics.median(samples)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Constituent breadth engine benchmark")
+    parser.add_argument("--tickers", type=int, default=500)
+    parser.add_argument("--years", type=float, default=10)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--skip-reference", action="store_true", help="skip the slow pandas reference")
+    parser.add_argument("--max-seconds", type=float, help="fail if the numpy compute exceeds this (s)")
+    args = parser.parse_args(argv)
+
+    days = int(252 * args.years)
+    closes = make_panel(args.tickers, days)
+    result = {"tickers": args.tickers, "days": days, "panel_mb": round(closes.nbytes / 2**20, 1)}
+
+    indicators, result["numpy_s"] = timed(lambda: compute_indicators(closes), args.repeat)
+
+    # 面板落盘 / 冷加载 (进程重启后的成本)
+    with tempfile.TemporaryDirectory() as tmp:
+        panel = BreadthPanel(os.path.join(tmp, "panel.npz"))
+        panel.dates = np.arange(np.datetime64("2000-01-03"), np.datetime64("2000-01-03") + days)
+        panel.tickers = [f"T{i}" for i in range(args.tickers)]
+        panel.closes = closes
+        _, result["save_s"] = timed(panel.save, 1)
+        _, result["load_s"] = timed(lambda: BreadthPanel(panel.path), args.repeat)
+
+    if not args.skip_reference:
+        reference, result["pandas_loop_s"] = timed(lambda: pandas_reference(closes), 1)
+        result["speedup"] = round(result["pandas_loop_s"] / result["numpy_s"], 1)
+        result["max_abs_diff"] = {k: float(np.nanmax(np.abs(indicators[k] - v))) for k, v in reference.items()}
+
+    print(json.dumps({k: round(v, 4) if isinstance(v, float) else v for k, v in result.items()}, indent=2))
+    if args.max_seconds is not None and result["numpy_s"] > args.max_seconds:
+        print(f"REGRESSION: compute {result['numpy_s']:.3f}s > {args.max_seconds}s", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,98 @@
+"""图表内存基准：模拟几百次会话反复渲染红绿灯页面的两张图，观察进程 RSS
+
+对比两种方式：
+  legacy  旧实现的做法：每次 plt.subplots() 新建图表，渲染后不关闭 (pyplot 全局持有引用)
+  cached  stockbot.charts：Figure + PNG 字节缓存，同一数据快照只画一次
+
+    python benchmarks/chart_memory.py --sessions 300 --snapshots 3
+"""
+import argparse
+import gc
+import io
+import json
+import os
+import resource
+import sys
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import matplotlib  # noqa: E402
+
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt  # noqa: E402
+
+from stockbot.charts import breadth_png, sector_heatmap_png  # noqa: E402
+
+
+def rss_mb():
+    """当前常驻内存 (Linux 读 /proc，其他平台退化为峰值 RSS)"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def make_snapshot(seed):
+    rng = np.random.default_rng(seed)
+    idx = pd.bdate_range(end="2026-01-02", periods=252)
+    spy = 100 + np.cumsum(rng.normal(0, 1, len(idx)))
+    ratio = 1 + np.cumsum(rng.normal(0, 0.002, len(idx)))
+    df = pd.DataFrame({"SPY_Normalized": spy / spy[0], "Normalized_Ratio": ratio / ratio[0]}, index=idx)
+    df["Ratio_MA20"] = df["Normalized_Ratio"].rolling(20).mean()
+    sectors = {f"Sector {i} (XL{i})": float(v) for i, v in enumerate(rng.normal(0, 4, 11))}
+    return sectors, df
+
+
+def legacy_render(sectors, df):
+    fig, ax = plt.subplots(figsize=(8, 5))
+    ax.barh(list(sectors), list(sectors.values()))
+    fig.savefig(io.BytesIO(), format="png")
+    fig2, ax1 = plt.subplots(figsize=(10, 4))
+    ax1.plot(df.index, df["SPY_Normalized"])
+    ax1.twinx().plot(df.index, df["Normalized_Ratio"])
+    fig2.savefig(io.BytesIO(), format="png")
+
+
+def cached_render(sectors, df):
+    sector_heatmap_png(sectors)
+    breadth_png(df)
+
+
+def run(mode, sessions, snapshots, sample_every):
+    render = legacy_render if mode == "legacy" else cached_render
+    data = [make_snapshot(seed) for seed in range(snapshots)]
+    gc.collect()
+    samples = [(0, round(rss_mb(), 1))]
+    for i in range(1, sessions + 1):
+        render(*data[i % snapshots])
+        if i % sample_every == 0:
+            gc.collect()
+            samples.append((i, round(rss_mb(), 1)))
+    return {"mode": mode, "sessions": sessions, "snapshots": snapshots,
+            "open_pyplot_figures": len(plt.get_fignums()),
+            "rss_start_mb": samples[0][1], "rss_end_mb": samples[-1][1],
+            "rss_growth_mb": round(samples[-1][1] - samples[0][1], 1), "samples": samples}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Chart rendering memory benchmark")
+    parser.add_argument("--sessions", type=int, default=300)
+    parser.add_argument("--snapshots", type=int, default=3, help="distinct data snapshots cycled through")
+    parser.add_argument("--mode", choices=["legacy", "cached", "both"], default="both")
+    parser.add_argument("--sample-every", type=int, default=50)
+    args = parser.parse_args(argv)
+
+    # 先跑 cached：legacy 泄漏的图表会一直留在进程里
+    modes = ["cached", "legacy"] if args.mode == "both" else [args.mode]
+    for mode in modes:
+        result = run(mode, args.sessions, args.snapshots, args.sample_every)
+        print(json.dumps(result))
+
+
+if __name__ == "__main__":
+    main()
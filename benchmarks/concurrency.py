@@ -0,0 +1,93 @@
+"""多会话并发扫描基准：N 个用户几乎同时点 "开始扫描" 时，上游实际收到多少请求
+
+冷缓存下起 --users 个线程，同时抓取同一批新闻查询 (本地替身注入 --latency 秒延迟)，
+统计替身收到的请求数、每个用户的耗时以及缓存层合并掉的调用数。
+开启 single-flight 后请求数应等于查询数，与用户数无关。
+
+    python benchmarks/concurrency.py --users 1 5 10 --queries 60 --latency 0.3
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from stockbot import sources  # noqa: E402
+from stockbot.cache import get_cache, reset_caches  # noqa: E402
+from stockbot.resilience import reset_upstreams  # noqa: E402
+
+RSS = (b"<?xml version='1.0'?><rss version='2.0'><channel><title>t</title>"
+       b"<item><title>Stocks rally - Wire</title><link>https://example.com/1</link></item></channel></rss>")
+
+
+class _Response:
+    status_code = 200
+
+    def __init__(self, content):
+        self.content = content
+
+    def raise_for_status(self):
+        pass
+
+
+class SlowSession:
+    def __init__(self, latency):
+        self.latency = latency
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    def get(self, url, timeout=None):
+        with self._lock:
+            self.requests += 1
+        time.sleep(self.latency)
+        return _Response(RSS)
+
+
+def run(users, queries, latency):
+    reset_caches()
+    reset_upstreams()
+    session = sources._session = SlowSession(latency)
+    barrier = threading.Barrier(users)
+    seconds = [None] * users
+
+    def user(i):
+        barrier.wait()
+        started = time.perf_counter()
+        sources.fetch_news_batch(queries)
+        seconds[i] = time.perf_counter() - started
+
+    threads = [threading.Thread(target=user, args=(i,)) for i in range(users)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return {
+        "users": users,
+        "upstream_requests": session.requests,
+        "coalesced": get_cache("news").stats()["coalesced"],
+        "mean_user_s": round(statistics.mean(seconds), 3),
+        "max_user_s": round(max(seconds), 3),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Concurrent sessions: upstream requests vs users")
+    parser.add_argument("--users", type=int, nargs="+", default=[1, 5, 10])
+    parser.add_argument("--queries", type=int, default=60)
+    parser.add_argument("--latency", type=float, default=0.3)
+    args = parser.parse_args(argv)
+
+    queries = [f"query {i}" for i in range(args.queries)]
+    results = [run(n, queries, args.latency) for n in args.users]
+    print(json.dumps(results, indent=2))
+    # 请求数随用户数增长说明合并失效
+    return 0 if all(r["upstream_requests"] == args.queries for r in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
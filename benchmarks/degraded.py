@@ -0,0 +1,106 @@
+"""上游降级基准：Google News 全部超时 / 返回 429 时，一批新闻查询要花多久、拿到的是什么
+
+先用健康的本地替身跑一遍把缓存填满，再让缓存全部过期、把替身换成降级版本，对比：
+  unguarded     STOCKBOT_UPSTREAM_GUARD=0 的行为：每条查询各自等满超时
+  guarded       限流/重试/熔断：前几条失败后熔断打开，其余查询直接失败
+  guarded_open  熔断仍然打开时的下一次扫描
+每种情况都记录有多少条查询拿到了新闻 (熔断时回退到上一次成功的缓存)。
+
+    python benchmarks/degraded.py --queries 60 --timeout 6 --mode timeout
+    python benchmarks/degraded.py --mode 429
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import requests
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from stockbot import settings, sources  # noqa: E402
+from stockbot.cache import get_cache, reset_caches  # noqa: E402
+from stockbot.resilience import reset_upstreams, upstream  # noqa: E402
+
+RSS = (b"<?xml version='1.0'?><rss version='2.0'><channel><title>t</title>"
+       b"<item><title>Stocks rally - Wire</title><link>https://example.com/1</link>"
+       b"<pubDate>Mon, 06 Jan 2025 14:00:00 GMT</pubDate></item></channel></rss>")
+
+
+class _Response:
+    def __init__(self, status_code, content=b""):
+        self.status_code = status_code
+        self.content = content
+        self.headers = {}
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"{self.status_code} degraded", response=self)
+
+
+class FakeSession:
+    """mode: healthy 立即返回 / timeout 等满超时后抛 ReadTimeout / 429 立即返回 Too Many Requests"""
+
+    def __init__(self, mode, timeout):
+        self.mode = mode
+        self.timeout = timeout
+        self.requests = 0
+
+    def get(self, url, timeout=None):
+        self.requests += 1
+        if self.mode == "healthy":
+            return _Response(200, RSS)
+        if self.mode == "timeout":
+            time.sleep(self.timeout)
+            raise requests.ReadTimeout("read timed out")
+        return _Response(429)
+
+
+def run(queries, session):
+    sources._session = session
+    started = time.perf_counter()
+    results = sources.fetch_news_batch(queries)
+    return {
+        "seconds": round(time.perf_counter() - started, 3),
+        "requests": session.requests,
+        "with_news": sum(1 for news in results if news),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Degraded upstream: guarded vs unguarded news batch")
+    parser.add_argument("--queries", type=int, default=60)
+    parser.add_argument("--timeout", type=float, default=6.0, help="seconds a degraded request hangs")
+    parser.add_argument("--mode", choices=["timeout", "429"], default="timeout")
+    parser.add_argument("--skip-unguarded", action="store_true", help="skip the slow baseline")
+    args = parser.parse_args(argv)
+
+    queries = [f"query {i}" for i in range(args.queries)]
+    result = {"queries": args.queries, "mode": args.mode, "timeout_s": args.timeout,
+              "workers": settings.NEWS_MAX_WORKERS}
+
+    def degraded(guard):
+        settings.UPSTREAM_GUARD = guard
+        get_cache("news").expire()
+        return run(queries, FakeSession(args.mode, args.timeout))
+
+    reset_caches()
+    reset_upstreams()
+    result["warm"] = run(queries, FakeSession("healthy", args.timeout))
+
+    if not args.skip_unguarded:
+        result["unguarded"] = degraded(False)
+    reset_upstreams()
+    result["guarded"] = degraded(True)
+    result["guarded_open"] = degraded(True)
+    result["upstream"] = upstream("rss").stats()
+    result["stale_served"] = get_cache("news").stats()["stale_served"]
+
+    print(json.dumps(result, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
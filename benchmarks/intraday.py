@@ -0,0 +1,76 @@
+"""盘中红绿灯基准：每来一根新K线，增量状态更新 vs 对整段历史重新 rolling
+
+合成 --history 根 5 分钟K线作为已有历史，再逐根推入 --bars 根新K线：
+  incremental  stockbot.intraday.IntradayState.update + traffic_light (O(1))
+  recompute    MarketRadarSystem.analyze_traffic_light 对截至当前的整张表重算
+同时逐根比对两者的评分与理由是否一致。
+
+    python benchmarks/intraday.py --history 20000 --bars 200
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from stockbot.intraday import TICKERS, IntradayState  # noqa: E402
+from stockbot.radar import MarketRadarSystem  # noqa: E402
+
+
+def make_bars(n, seed=0):
+    rng = np.random.default_rng(seed)
+    idx = pd.date_range("2025-01-02 09:30", periods=n, freq="5min", tz="America/New_York")
+    closes = 100 * np.exp(np.cumsum(rng.normal(0, 0.001, (n, len(TICKERS))), axis=0))
+    bars = pd.DataFrame(closes, index=idx, columns=TICKERS)
+    bars["^VIX"] = 12 + 16 * rng.random(n)
+    return bars
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Intraday incremental vs full recompute")
+    parser.add_argument("--history", type=int, default=20000, help="bars already seen (~1 year of 5m bars)")
+    parser.add_argument("--bars", type=int, default=200, help="new bars to push")
+    args = parser.parse_args(argv)
+
+    bars = make_bars(args.history + args.bars)
+    state = IntradayState(interval="5m")
+    state.feed(bars.iloc[:args.history])
+    radar = MarketRadarSystem(lang="EN")
+
+    incremental, recompute, mismatches = [], [], 0
+    rows = bars.to_dict("records")
+    for i in range(args.history, args.history + args.bars):
+        started = time.perf_counter()
+        state.update(bars.index[i], rows[i])
+        fast = state.traffic_light("EN")
+        incremental.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        slow = radar.analyze_traffic_light(bars.iloc[:i + 1])
+        recompute.append(time.perf_counter() - started)
+
+        # 文案里均线写法不同 (50×5m MA vs 50MA)，只比评分和灯色
+        if (fast["score"], fast["color"]) != (slow["score"], slow["color"]):
+            mismatches += 1
+
+    result = {
+        "history_bars": args.history,
+        "new_bars": args.bars,
+        "incremental_us": round(statistics.mean(incremental) * 1e6, 1),
+        "recompute_ms": round(statistics.mean(recompute) * 1e3, 2),
+        "speedup": round(statistics.mean(recompute) / statistics.mean(incremental), 1),
+        "score_mismatches": mismatches,
+    }
+    print(json.dumps(result, indent=2))
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
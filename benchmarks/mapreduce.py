@@ -0,0 +1,139 @@
+"""两级生成基准：自选分组越来越多时，单次 Prompt 与 map-reduce 的报告耗时和新闻覆盖
+
+用本地替身模型模拟 LLM 延迟：base + prefill (每千输入 token) + decode (每个输出 token)，
+合成 --groups 个分组 (每组 --assets 个资产、每个资产 3 条不重复的新闻) 加 FRED 文本，对比：
+  single       assemble_prompt + 一次生成；超出 PROMPT_TOP_K / PROMPT_TOKEN_BUDGET 的新闻被裁掉
+  single_full  同上但不设上限，全部新闻进一个 Prompt (预填充随分组数线性增长)
+  mapreduce    各分组 / 宏观专题 / FRED 并行出摘要 (DIGEST_MAX_WORKERS 并发) + 一次最终生成
+每种情况都是冷缓存，记录总耗时、最终 Prompt 大小、进入 Prompt (或摘要) 的新闻条数。
+
+    python benchmarks/mapreduce.py --groups 4 8 16 32 --base 1.0 --prefill 0.15 --decode 0.01
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from stockbot import pipeline, settings  # noqa: E402
+from stockbot.cache import reset_caches  # noqa: E402
+from stockbot.prompt import estimate_tokens  # noqa: E402
+from stockbot.telemetry import ScanTimer  # noqa: E402
+
+TODAY = "2025-06-30"
+PUBLISHED = 1_751_200_000
+
+
+class _Response:
+    def __init__(self, text):
+        self.text = text
+
+
+class FakeModel:
+    """延迟 = base + prefill * 输入千 token + decode * 输出 token；摘要输出短、报告输出长"""
+
+    model_name = "fake"
+
+    def __init__(self, base, prefill, decode, digest_tokens=80, report_tokens=900):
+        self.base, self.prefill, self.decode = base, prefill, decode
+        self.digest_tokens, self.report_tokens = digest_tokens, report_tokens
+        self.calls = 0
+
+    def generate_content(self, prompt, stream=False):
+        self.calls += 1
+        digest = "Raw data:" in prompt
+        out_tokens = self.digest_tokens if digest else self.report_tokens
+        time.sleep(self.base + self.prefill * estimate_tokens(prompt) / 1000 + self.decode * out_tokens)
+        text = "- digest" if digest else "# report"
+        return iter([_Response(text)]) if stream else _Response(text)
+
+
+WORDS = [f"{a}{b}" for a in ("ka", "lo", "mi", "nu", "pe", "ri", "so", "tu", "vy", "ze")
+         for b in ("rand", "meth", "polt", "quix", "sund", "trav", "womb", "yelk", "zorn", "brim")]
+
+
+def _title(rng, subject):
+    """互不相似的合成标题 (避免被近似去重合并)"""
+    return f"{subject} " + " ".join(rng.choice(WORDS) for _ in range(8))
+
+
+def make_inputs(groups, assets):
+    rng = random.Random(0)
+    market = {
+        "traffic_light": {"status": "GREEN", "score": 70, "vix": 14.2, "reasons": ["SPY above MA200"]},
+        "fear_greed": "62 (Greed)",
+        "breadth_signal": "RSP/SPY 20d +1.2%",
+    }
+    rows = []
+    for g in range(groups):
+        for a in range(assets):
+            ticker = f"T{g}X{a}"
+            news = [{"title": _title(rng, ticker),
+                     "link": f"https://example.com/{ticker}/{k}", "published": PUBLISHED - 3600 * k,
+                     "source": "Wire"} for k in range(3)]
+            rows.append({"group": f"Group {g}", "ticker": ticker, "name": f"Company {g}-{a}", "price": 100.0 + a,
+                         "change_pct": 0.5 * (a - 2), "news": news})
+    topics = [{"topic": f"Topic {t}", "news": [{"title": _title(rng, f"Topic{t}"),
+                                                 "link": f"https://example.com/t{t}/{k}",
+                                                 "published": PUBLISHED - 7200 * k, "source": "Wire"}
+                                                for k in range(3)]} for t in range(8)]
+    macro = "\n".join(f"- Series {i}: 100.{i} (prev 99.{i}), as of 2025-06-01" for i in range(12))
+    return market, {"assets": rows, "topics": topics}, macro
+
+
+def run(mode, groups, assets, args):
+    reset_caches()
+    model = FakeModel(args.base, args.prefill, args.decode)
+    market, watch, macro = make_inputs(groups, assets)
+    timer = ScanTimer(f"bench-{mode}")
+    headlines = len(watch["assets"]) * 3 + len(watch["topics"]) * 3
+    started = time.perf_counter()
+    if mode.startswith("single"):
+        # single_full：不设预算和条数上限，所有新闻都进同一个 Prompt
+        budget, top_k = settings.PROMPT_TOKEN_BUDGET, settings.PROMPT_TOP_K
+        if mode == "single_full":
+            settings.PROMPT_TOKEN_BUDGET, settings.PROMPT_TOP_K = 10**9, 10**9
+        try:
+            prompt, market_data, stats = pipeline.assemble_prompt("EN", TODAY, market, macro, watch, timer)
+        finally:
+            settings.PROMPT_TOKEN_BUDGET, settings.PROMPT_TOP_K = budget, top_k
+    else:
+        prompt, market_data, macro, stats = pipeline.assemble_digest_prompt(model, "EN", TODAY, market, macro,
+                                                                             watch, timer, "fake")
+    key = pipeline.report_cache_key("EN", TODAY, market, macro, market_data, model_name="fake")
+    pipeline.write_report(model, prompt, key, timer, stream=True)
+    return {
+        "mode": mode,
+        "groups": groups,
+        "seconds": round(time.perf_counter() - started, 2),
+        "model_calls": model.calls,
+        "final_prompt_tokens": stats["tokens_total"],
+        "headlines_in": headlines,
+        "headlines_used": stats["headlines_kept"],
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Single-shot vs map-reduce report latency as groups grow")
+    parser.add_argument("--groups", type=int, nargs="+", default=[4, 8, 16, 32])
+    parser.add_argument("--assets", type=int, default=5, help="assets per group")
+    parser.add_argument("--base", type=float, default=1.0, help="fixed seconds per model call")
+    parser.add_argument("--prefill", type=float, default=0.15, help="seconds per 1k prompt tokens")
+    parser.add_argument("--decode", type=float, default=0.01, help="seconds per output token")
+    args = parser.parse_args(argv)
+
+    results = {"budget_tokens": settings.PROMPT_TOKEN_BUDGET, "digest_workers": settings.DIGEST_MAX_WORKERS,
+               "runs": []}
+    for groups in args.groups:
+        for mode in ("single", "single_full", "mapreduce"):
+            results["runs"].append(run(mode, groups, args.assets, args))
+    print(json.dumps(results, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
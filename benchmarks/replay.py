@@ -0,0 +1,436 @@
+"""全量扫描的离线录制/回放基准测试
+
+把 Yahoo / Google News RSS / CNN / FRED / Gemini 的响应录制成 fixture，回放时用本地替身
+(可注入延迟) 代替网络，通过 Streamlit AppTest 无头执行 app.py 的 run_analysis，
+读取每个阶段的耗时并写出 JSON 结果。不需要网络，可以直接对比串行/并发抓取、缓存开/关。
+
+    # 录制 (需要网络，以及 GEMINI_API_KEY / FRED_API_KEY 环境变量)
+    python benchmarks/replay.py record --fixtures benchmarks/fixtures/today
+    # 或者生成合成 fixture (完全离线)
+    python benchmarks/replay.py synth --fixtures /tmp/stockbot-fx
+    # 回放
+    python benchmarks/replay.py run --fixtures /tmp/stockbot-fx \\
+        --latency yahoo=0.5 rss=0.4 cnn=0.3 fred=0.3 gemini=8 \\
+        --news-workers 1 8 --cache off on --repeat 2 --out bench_results.json
+"""
+import argparse
+import hashlib
+import json
+import os
+import pickle
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from email.utils import format_datetime
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP = os.path.join(ROOT, "app.py")
+sys.path.insert(0, ROOT)
+
+import fredapi  # noqa: E402
+import google.generativeai as genai  # noqa: E402
+import requests  # noqa: E402
+import yfinance as yf  # noqa: E402
+
+DEFAULT_LATENCY = {"yahoo": 0.0, "rss": 0.0, "cnn": 0.0, "fred": 0.0, "gemini": 0.0, "gemini_per_ktok": 0.0}
+PERIOD_ROWS = {"1d": 1, "5d": 5, "1mo": 21, "3mo": 63, "6mo": 126, "1y": 252, "2y": 504, "5y": 1260}
+
+_originals = {
+    "download": yf.download,
+    "session_get": requests.Session.get,
+    "requests_get": requests.get,
+    "fred_init": fredapi.Fred.__init__,
+    "fred_get_series": fredapi.Fred.get_series,
+    "model": genai.GenerativeModel,
+    "configure": genai.configure,
+}
+
+
+def _rss_query(url):
+    return parse_qs(urlparse(url).query).get("q", [""])[0]
+
+
+class _Response:
+    def __init__(self, content=b"", payload=None, status_code=200):
+        self.content = content
+        self.text = content.decode("utf-8", "replace")
+        self._payload = payload
+        self.status_code = status_code
+        self.headers = {}
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"{self.status_code} replay")
+
+    def json(self):
+        return self._payload
+
+
+class _Chunk:
+    def __init__(self, text):
+        self.text = text
+
+
+# === 录制 ===
+class Recorder:
+    def __init__(self, fixtures):
+        self.fixtures = fixtures
+        self.panel = None
+        self.rss = {}
+        self.cnn = None
+        self.fred = {}
+        self.gemini = []
+
+    def install(self):
+        rec = self
+
+        def download(tickers, *args, **kwargs):
+            df = _originals["download"](tickers, *args, **kwargs)
+            if kwargs.get("interval", "1d") == "1d" and df is not None and not df.empty:
+                rec.panel = df if rec.panel is None else df.combine_first(rec.panel)
+            return df
+
+        def session_get(self, url, *args, **kwargs):
+            resp = _originals["session_get"](self, url, *args, **kwargs)
+            if "news.google.com" in url:
+                rec.rss[_rss_query(url)] = resp.content.decode("utf-8", "replace")
+            return resp
+
+        def requests_get(url, *args, **kwargs):
+            resp = _originals["requests_get"](url, *args, **kwargs)
+            if "fearandgreed" in url:
+                rec.cnn = resp.json()
+            return resp
+
+        def get_series(self, series_id, *args, **kwargs):
+            series = _originals["fred_get_series"](self, series_id, *args, **kwargs)
+            rec.fred[series_id] = series
+            return series
+
+        class RecordingModel(_originals["model"]):
+            def generate_content(self, prompt, *args, stream=False, **kwargs):
+                resp = super().generate_content(prompt, *args, stream=stream, **kwargs)
+                if not stream:
+                    rec.gemini = [resp.text]
+                    return resp
+
+                def chunks():
+                    rec.gemini = []
+                    for chunk in resp:
+                        try:
+                            rec.gemini.append(chunk.text)
+                        except ValueError:
+                            pass
+                        yield chunk
+                return chunks()
+
+        yf.download = download
+        requests.Session.get = session_get
+        requests.get = requests_get
+        fredapi.Fred.get_series = get_series
+        genai.GenerativeModel = RecordingModel
+
+    def save(self):
+        os.makedirs(self.fixtures, exist_ok=True)
+        with open(os.path.join(self.fixtures, "prices.pkl"), "wb") as f:
+            pickle.dump(self.panel, f)
+        with open(os.path.join(self.fixtures, "fred.pkl"), "wb") as f:
+            pickle.dump(self.fred, f)
+        for name, payload in [("rss.json", self.rss), ("cnn.json", self.cnn), ("gemini.json", {"chunks": self.gemini})]:
+            with open(os.path.join(self.fixtures, name), "w", encoding="utf-8") as f:
+                json.dump(payload, f, ensure_ascii=False)
+        _write_meta(self.fixtures, synthetic=False)
+
+
+def _write_meta(fixtures, synthetic):
+    os.makedirs(fixtures, exist_ok=True)
+    with open(os.path.join(fixtures, "meta.json"), "w") as f:
+        json.dump({"recorded_at": datetime.now(timezone.utc).isoformat(), "synthetic": synthetic}, f)
+
+
+# === 回放 ===
+class Replay:
+    def __init__(self, fixtures, latency):
+        self.latency = {**DEFAULT_LATENCY, **latency}
+        with open(os.path.join(fixtures, "meta.json")) as f:
+            self.synthetic = json.load(f)["synthetic"]
+        self.panel = self._load_pickle(fixtures, "prices.pkl")
+        self.fred = self._load_pickle(fixtures, "fred.pkl") or {}
+        self.rss = self._load_json(fixtures, "rss.json") or {}
+        self.cnn = self._load_json(fixtures, "cnn.json")
+        self.gemini = (self._load_json(fixtures, "gemini.json") or {}).get("chunks") or []
+        if self.panel is not None:
+            # 把录制时的日期平移到 "今天"，否则增量行情库会认为数据已过期
+            self.panel = self.panel.copy()
+            self.panel.index = pd.bdate_range(end=pd.Timestamp.now().normalize(), periods=len(self.panel))
+        self.calls = {k: 0 for k in ["yahoo", "rss", "cnn", "fred", "gemini"]}
+
+    @staticmethod
+    def _load_pickle(fixtures, name):
+        path = os.path.join(fixtures, name)
+        if not os.path.exists(path):
+            return None
+        with open(path, "rb") as f:
+            return pickle.load(f)
+
+    @staticmethod
+    def _load_json(fixtures, name):
+        path = os.path.join(fixtures, name)
+        if not os.path.exists(path):
+            return None
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+
+    def _sleep(self, source, extra=0.0):
+        self.calls[source] += 1
+        delay = self.latency[source] + extra
+        if delay > 0:
+            time.sleep(delay)
+
+    # --- 合成数据 ---
+    @staticmethod
+    def _seed(text):
+        return int(hashlib.md5(text.encode()).hexdigest()[:8], 16)
+
+    def _synthetic_panel(self, tickers):
+        index = pd.bdate_range(end=pd.Timestamp.now().normalize(), periods=3000)
+        frames = {}
+        for t in tickers:
+            rng = np.random.default_rng(self._seed(t))
+            close = 100 * np.exp(np.cumsum(rng.normal(0.0003, 0.012, len(index))))
+            if t in ("^VIX", "^VXN"):
+                close = np.clip(18 + np.cumsum(rng.normal(0, 0.8, len(index))) * 0.2, 9, 60)
+            frames[t] = pd.DataFrame({"Open": close, "High": close * 1.01, "Low": close * 0.99,
+                                      "Close": close, "Volume": 1e6}, index=index)
+        panel = pd.concat(frames, axis=1).swaplevel(axis=1).sort_index(axis=1)
+        panel.columns.names = ["Price", "Ticker"]
+        return panel
+
+    def _synthetic_rss(self, query):
+        now = datetime.now(timezone.utc)
+        items = "".join(
+            f"<item><title>{query} update {i} - Publisher{i}</title><link>https://example.com/{self._seed(query)}/{i}</link>"
+            f"<pubDate>{format_datetime(now)}</pubDate></item>"
+            for i in range(5)
+        )
+        return f"<rss><channel>{items}</channel></rss>"
+
+    # --- 替身 ---
+    def install(self):
+        replay = self
+
+        def download(tickers, start=None, end=None, period=None, interval="1d", **kwargs):
+            tickers = [tickers] if isinstance(tickers, str) else list(tickers)
+            replay._sleep("yahoo")
+            panel = replay._synthetic_panel(tickers) if replay.synthetic else replay.panel
+            cols = [c for c in panel.columns if c[1] in tickers]
+            df = panel.loc[:, cols]
+            if start is not None:
+                df = df[df.index >= pd.Timestamp(start)]
+            elif period in PERIOD_ROWS:
+                df = df.iloc[-PERIOD_ROWS[period]:]
+            return df
+
+        def session_get(self, url, *args, **kwargs):
+            replay._sleep("rss")
+            query = _rss_query(url)
+            body = replay._synthetic_rss(query) if replay.synthetic else replay.rss.get(query, "<rss><channel></channel></rss>")
+            return _Response(body.encode("utf-8"))
+
+        def requests_get(url, *args, **kwargs):
+            replay._sleep("cnn")
+            payload = replay.cnn or {"fear_and_greed": {"score": 50.0, "rating": "neutral"}}
+            return _Response(json.dumps(payload).encode(), payload=payload)
+
+        def fred_init(self, api_key=None, **kwargs):
+            pass
+
+        def get_series(self, series_id, observation_start=None, **kwargs):
+            replay._sleep("fred")
+            if replay.synthetic or series_id not in replay.fred:
+                freq = "W-SAT" if series_id in ("ICSA", "CCSA") else ("B" if series_id == "DGS10" else "MS")
+                index = pd.date_range(observation_start or "2020-01-01", pd.Timestamp.now(), freq=freq)
+                rng = np.random.default_rng(replay._seed(series_id))
+                return pd.Series(100 + np.cumsum(rng.normal(0, 1, len(index))), index=index)
+            return replay.fred[series_id]
+
+        class ReplayModel:
+            def __init__(self, model_name=None, **kwargs):
+                self.model_name = model_name
+
+            def generate_content(self, prompt, *args, stream=False, **kwargs):
+                from stockbot.prompt import estimate_tokens
+
+                replay.calls["gemini"] += 1
+                chunks = replay.gemini or ["# 🚦 Replay report\n", "body"]
+                total = replay.latency["gemini"] + replay.latency["gemini_per_ktok"] * estimate_tokens(str(prompt)) / 1000
+                if not stream:
+                    time.sleep(total)
+                    return _Chunk("".join(chunks))
+
+                def gen():
+                    # 首字约占总耗时的 20%，其余均匀分布在各分片之间
+                    time.sleep(total * 0.2)
+                    for piece in chunks:
+                        yield _Chunk(piece)
+                        time.sleep(total * 0.8 / len(chunks))
+                return gen()
+
+        yf.download = download
+        requests.Session.get = session_get
+        requests.get = requests_get
+        fredapi.Fred.__init__ = fred_init
+        fredapi.Fred.get_series = get_series
+        genai.GenerativeModel = ReplayModel
+        genai.configure = lambda *args, **kwargs: None
+
+
+# === 驱动 ===
+def reset_state(cache_on):
+    """冷启动：新的本地数据目录 + 清空进程内缓存；cache_on=False 时所有缓存 TTL 置 0"""
+    from stockbot import cache, fred, settings, shared, store
+    from stockbot.resilience import reset_upstreams
+
+    settings.DATA_DIR = tempfile.mkdtemp(prefix="stockbot-bench-")
+    # 后台预热会在计时之外提前抓取，基准测试里关掉
+    settings.PREWARM_ENABLED = False
+    # 共享快照命中时 run_analysis 直接返回，不再抓取任何数据，这里测的是抓取本身
+    settings.SHARED_SNAPSHOT = False
+    shared._loaded = None
+    store._store = None
+    fred._store = None
+    if not hasattr(reset_state, "ttls"):
+        reset_state.ttls = dict(settings.CACHE_TTLS)
+    for source, ttl in reset_state.ttls.items():
+        settings.CACHE_TTLS[source] = ttl if cache_on else 0
+    cache.reset_caches()
+    # 令牌桶水位、AIMD 降速和熔断状态不能带到下一组配置 (限流/熔断本身保持开启，与线上一致)
+    reset_upstreams()
+
+
+def run_scan(lang="中文", secrets=None, timeout=600):
+    from streamlit.testing.v1 import AppTest
+    from stockbot.telemetry import recent_scans
+
+    at = AppTest.from_file(APP, default_timeout=timeout)
+    for key, value in (secrets or {"GEMINI_DEMO_KEY": "replay", "general": {"FRED_API_KEY": "replay"}}).items():
+        at.secrets[key] = value
+    at.run()
+    if lang != "中文":
+        at.sidebar.selectbox[0].set_value(lang).run()
+    before = recent_scans()
+    at.button(key="start_scan").click().run()
+    after = recent_scans()
+    if at.exception:
+        raise RuntimeError(f"scan raised: {at.exception}")
+    if not after or (before and after[-1] is before[-1]):
+        raise RuntimeError("scan did not run (missing API key?)")
+    return after[-1].as_dict()
+
+
+def cmd_record(args):
+    secrets = {"GEMINI_DEMO_KEY": os.environ["GEMINI_API_KEY"], "general": {"FRED_API_KEY": os.environ["FRED_API_KEY"]}}
+    reset_state(cache_on=False)
+    recorder = Recorder(args.fixtures)
+    recorder.install()
+    result = run_scan(args.lang, secrets)
+    recorder.save()
+    print(f"recorded {len(recorder.rss)} RSS feeds, {len(recorder.fred)} FRED series in {result['total']}s -> {args.fixtures}")
+
+
+def cmd_synth(args):
+    _write_meta(args.fixtures, synthetic=True)
+    print(f"synthetic fixtures -> {args.fixtures}")
+
+
+def cmd_run(args):
+    from stockbot import settings, sources
+
+    latency = {}
+    for item in args.latency:
+        key, value = item.split("=")
+        if key not in DEFAULT_LATENCY:
+            raise SystemExit(f"unknown latency source: {key}")
+        latency[key] = float(value)
+    replay = Replay(args.fixtures, latency)
+    replay.install()
+
+    runs = []
+    for workers in args.news_workers:
+        settings.NEWS_MAX_WORKERS = workers
+        sources._session = None
+        for cache_mode in args.cache:
+            reset_state(cache_on=(cache_mode == "on"))
+            for i in range(args.repeat):
+                if cache_mode == "off" and i:
+                    reset_state(cache_on=False)
+                replay.calls = {k: 0 for k in replay.calls}
+                scan = run_scan(args.lang)
+                run = {
+                    "news_workers": workers, "cache": cache_mode, "repeat": i,
+                    "total": scan["total"],
+                    "stages": {s["stage"]: s["seconds"] for s in scan["stages"]},
+                    "upstream_calls": dict(replay.calls),
+                }
+                runs.append(run)
+                print(f"workers={workers:<3} cache={cache_mode:<3} run={i}  total={scan['total']:.2f}s  "
+                      + "  ".join(f"{k}={v:.2f}" for k, v in run["stages"].items()))
+
+    summary = {}
+    for run in runs:
+        key = f"workers={run['news_workers']} cache={run['cache']} {'cold' if run['repeat'] == 0 else 'warm'}"
+        summary.setdefault(key, []).append(run["total"])
+    summary = {k: {"runs": len(v), "mean_total": statistics.mean(v)} for k, v in summary.items()}
+    result = {
+        "fixtures": os.path.abspath(args.fixtures),
+        "synthetic": replay.synthetic,
+        "latency": replay.latency,
+        "lang": args.lang,
+        "shared_snapshot": settings.SHARED_SNAPSHOT,
+        "upstream_guard": settings.UPSTREAM_GUARD,
+        "upstream_reset": "per reset_state",
+        "runs": runs,
+        "summary": summary,
+    }
+    with open(args.out, "w") as f:
+        json.dump(result, f, indent=2)
+    print(json.dumps(summary, indent=2))
+    print(f"results -> {args.out}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline record/replay benchmark for the full scan")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("record", help="run a real scan and record upstream responses")
+    p.add_argument("--fixtures", required=True)
+    p.add_argument("--lang", default="中文", choices=["中文", "English"])
+    p.set_defaults(func=cmd_record)
+
+    p = sub.add_parser("synth", help="write a synthetic fixture set (no network)")
+    p.add_argument("--fixtures", required=True)
+    p.set_defaults(func=cmd_synth)
+
+    p = sub.add_parser("run", help="replay fixtures and time each scan stage")
+    p.add_argument("--fixtures", required=True)
+    p.add_argument("--latency", nargs="*", default=[], metavar="SOURCE=SECONDS",
+                   help=f"injected latency per call, sources: {', '.join(DEFAULT_LATENCY)}")
+    p.add_argument("--news-workers", type=int, nargs="+", default=[8])
+    p.add_argument("--cache", nargs="+", choices=["on", "off"], default=["on"])
+    p.add_argument("--repeat", type=int, default=1)
+    p.add_argument("--lang", default="中文", choices=["中文", "English"])
+    p.add_argument("--out", default="bench_results.json")
+    p.set_defaults(func=cmd_run)
+
+    args = parser.parse_args(argv)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
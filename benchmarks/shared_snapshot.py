@@ -0,0 +1,118 @@
+"""多进程共享快照基准：N 个 worker 进程读同一份快照时，每个进程多占多少私有内存
+
+发布一份合成快照 (--rows x --cols 的 float64 行情面板 + 报价 + 新闻)，再起 --workers 个子进程分别读取
+并把整张面板求和一遍 (确保页面真正被访问)，对比两种读法：
+  mmap    stockbot.shared.load()：Arrow 文件内存映射，数值列零拷贝
+  pickle  每个进程反序列化自己的一份 DataFrame (相当于各自抓取/各自缓存)
+私有内存取自 /proc/self/smaps_rollup 的 Anonymous (堆上的私有页)；映射的文件页属于页缓存，不计入。
+同时校验所有 worker 读到的数值完全一致 (面板求和相同)。
+
+    python benchmarks/shared_snapshot.py --rows 5000 --cols 400 --workers 1 4 8
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import pickle
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from stockbot import shared  # noqa: E402
+
+
+def private_mb():
+    """当前进程的匿名 (私有) 内存 (MB)；没有 smaps_rollup 的平台返回 None"""
+    try:
+        with open("/proc/self/smaps_rollup") as f:
+            fields = dict(line.split(":", 1) for line in f if ":" in line)
+    except OSError:
+        return None
+    return int(fields["Anonymous"].split()[0]) / 1024
+
+
+def make_scan(rows, cols, seed=0):
+    rng = np.random.default_rng(seed)
+    idx = pd.bdate_range(end="2025-06-30", periods=rows, name="Date")
+    data = pd.DataFrame(100 * np.exp(np.cumsum(rng.normal(0, 0.01, (rows, cols)), axis=0)),
+                        index=idx, columns=[f"T{i}" for i in range(cols)])
+    quotes = pd.DataFrame({"price": data.iloc[-1], "prev_close": data.iloc[-2], "change_pct": 0.0, "error": None},
+                          dtype=object)
+    quotes.index.name = "ticker"
+    news = [[{"title": f"headline {i}-{j}", "link": f"https://example.com/{i}/{j}", "published": 1_700_000_000 + j,
+              "source": "Wire"} for j in range(3)] for i in range(60)]
+    return {"date": "2025-06-30", "data": data, "breadth": data.iloc[:, :2], "quotes": quotes, "news": news,
+            "fear_greed": "50 (Neutral)", "breadth_signal": "", "constituents": {}}
+
+
+def worker(mode, root, pickle_path, out):
+    import gc
+
+    import pyarrow  # noqa: F401  两种读法都先把库加载好，只比较数据本身占的内存
+
+    gc.collect()
+    before = private_mb()
+    started = time.perf_counter()
+    if mode == "mmap":
+        data = shared.load(root).frames["data"]
+    else:
+        with open(pickle_path, "rb") as f:
+            data = pickle.load(f)["data"]
+    load_s = time.perf_counter() - started
+    checksum = float(sum(data[c].to_numpy().sum() for c in data.columns))
+    out.put({"load_ms": load_s * 1e3, "private_mb": private_mb() - before if before is not None else None,
+             "checksum": checksum})
+
+
+def run(mode, workers, root, pickle_path):
+    ctx = multiprocessing.get_context("spawn")
+    out = ctx.Queue()
+    procs = [ctx.Process(target=worker, args=(mode, root, pickle_path, out)) for _ in range(workers)]
+    for p in procs:
+        p.start()
+    results = [out.get() for _ in procs]
+    for p in procs:
+        p.join()
+    private = [r["private_mb"] for r in results if r["private_mb"] is not None]
+    return {
+        "mode": mode,
+        "workers": workers,
+        "load_ms": round(max(r["load_ms"] for r in results), 2),
+        "private_mb_per_worker": round(max(private), 1) if private else None,
+        "private_mb_total": round(sum(private), 1) if private else None,
+        "consistent": len({r["checksum"] for r in results}) == 1,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Shared Arrow snapshot vs per-process copies")
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--cols", type=int, default=400)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 8])
+    args = parser.parse_args(argv)
+
+    scan = make_scan(args.rows, args.cols)
+    results = {"panel_mb": round(scan["data"].to_numpy().nbytes / 2**20, 1), "runs": []}
+    with tempfile.TemporaryDirectory() as root:
+        started = time.perf_counter()
+        shared.publish(scan, [f"q{i}" for i in range(len(scan["news"]))], root=root)
+        results["publish_ms"] = round((time.perf_counter() - started) * 1e3, 1)
+        pickle_path = os.path.join(root, "scan.pkl")
+        with open(pickle_path, "wb") as f:
+            pickle.dump(scan, f)
+        for n in args.workers:
+            for mode in ("mmap", "pickle"):
+                results["runs"].append(run(mode, n, root, pickle_path))
+
+    print(json.dumps(results, indent=2))
+    return 0 if all(r["consistent"] for r in results["runs"]) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,109 @@
+"""冷启动 / rerun 耗时基准 (通过 Streamlit AppTest 无头执行 app.py，不需要网络)
+
+每次测量都在新的 Python 进程里进行：
+  cold         首次执行 app.py (含所有顶层 import 与资源初始化)
+  rerun        不做任何操作的重复执行 (对应 Streamlit 每次控件交互)
+  lang_switch  切换语言下拉框触发的 rerun (翻译字典每种语言只应构建一次，见 translations_built)
+同时记录首屏渲染后已经加载的重模块 (应当在点击扫描之后才加载)。
+
+    python benchmarks/startup.py --runs 3 --reruns 10
+    # CI 防回退：超过阈值时退出码为 1
+    python benchmarks/startup.py --max-cold 2.0 --max-rerun 0.15
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP = os.path.join(ROOT, "app.py")
+HEAVY_MODULES = ["google.generativeai", "fredapi", "feedparser", "matplotlib", "yfinance"]
+
+
+def child(reruns):
+    started = time.perf_counter()
+    from streamlit.testing.v1 import AppTest
+    import_streamlit = time.perf_counter() - started
+
+    at = AppTest.from_file(APP, default_timeout=120)
+    at.secrets["general"] = {"FRED_API_KEY": "benchmark"}
+    started = time.perf_counter()
+    at.run()
+    cold = time.perf_counter() - started
+    if at.exception:
+        raise RuntimeError(f"app raised: {at.exception}")
+    loaded = [m for m in HEAVY_MODULES if m in sys.modules]
+
+    rerun = []
+    for _ in range(reruns):
+        started = time.perf_counter()
+        at.run()
+        rerun.append(time.perf_counter() - started)
+
+    lang_switch = []
+    for lang in ["English", "中文"] * max(1, reruns // 2):
+        started = time.perf_counter()
+        at.sidebar.selectbox[0].set_value(lang).run()
+        lang_switch.append(time.perf_counter() - started)
+
+    # AppTest 在本进程里执行脚本，memoised getter 的未命中次数就是整个过程中构建翻译字典的次数
+    from stockbot.i18n import get_translations
+
+    print(json.dumps({
+        "import_streamlit": import_streamlit,
+        "cold": cold,
+        "rerun": statistics.median(rerun),
+        "lang_switch": statistics.median(lang_switch),
+        "translations_built": get_translations.cache_info().misses,
+        "heavy_modules_after_first_run": loaded,
+    }))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Cold start / rerun timing for app.py")
+    parser.add_argument("--runs", type=int, default=3, help="fresh processes to measure")
+    parser.add_argument("--reruns", type=int, default=10, help="reruns per process")
+    parser.add_argument("--max-cold", type=float, help="fail if median cold start exceeds this (s)")
+    parser.add_argument("--max-rerun", type=float, help="fail if median rerun/lang switch exceeds this (s)")
+    parser.add_argument("--out", help="write results as JSON")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        child(args.reruns)
+        return 0
+
+    # 预热线程会在后台抓数据，计时时关掉；数据目录用临时目录，避免污染本地缓存
+    env = dict(os.environ, STOCKBOT_PREWARM="0", PYTHONWARNINGS="ignore")
+    runs = []
+    for _ in range(args.runs):
+        out = subprocess.run([sys.executable, __file__, "--child", "--reruns", str(args.reruns)],
+                             env=env, capture_output=True, text=True, check=True)
+        runs.append(json.loads(out.stdout.strip().splitlines()[-1]))
+
+    summary = {key: round(statistics.median(r[key] for r in runs), 4)
+               for key in ["import_streamlit", "cold", "rerun", "lang_switch"]}
+    summary["translations_built"] = max(r["translations_built"] for r in runs)
+    summary["heavy_modules_after_first_run"] = runs[-1]["heavy_modules_after_first_run"]
+    print(json.dumps(summary, indent=2, ensure_ascii=False))
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump({"runs": runs, "summary": summary}, f, indent=2, ensure_ascii=False)
+
+    failed = []
+    if args.max_cold is not None and summary["cold"] > args.max_cold:
+        failed.append(f"cold start {summary['cold']:.3f}s > {args.max_cold}s")
+    if args.max_rerun is not None and max(summary["rerun"], summary["lang_switch"]) > args.max_rerun:
+        failed.append(f"rerun {max(summary['rerun'], summary['lang_switch']):.3f}s > {args.max_rerun}s")
+    if summary["translations_built"] > 2:
+        failed.append(f"translations rebuilt {summary['translations_built']} times (expected once per language)")
+    for message in failed:
+        print(f"REGRESSION: {message}", file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
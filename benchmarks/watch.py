@@ -0,0 +1,129 @@
+"""盯盘模式基准：回放一个完整交易日，统计下载量、各 Stage 重算次数、告警数、每次轮询耗时与内存
+
+用本地替身代替 yfinance：种子为前 --seed-days 天的 5 分钟K线，之后模拟时钟从 9:30 走到 16:00，
+每 --interval 秒轮询一次，替身只返回截至当前时刻的当天K线 (与 period="1d" 的真实行为一致)。
+VIX 在当天中段冲上 25 以上再回落，SPY 先涨后跌，用来触发红绿灯 / VIX / 背离告警。
+日线广度 (analyze_market_breadth / scan_breadth) 用计数替身，验证一天只算一次。
+
+    python benchmarks/watch.py --interval 60 --seed-days 5
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from stockbot import intraday, settings, watch  # noqa: E402
+from stockbot.intraday import TICKERS, IntradayState  # noqa: E402
+
+DAY = pd.Timestamp("2025-06-30 09:30", tz="America/New_York")
+
+
+def make_day_bars(seed_days, seed=0):
+    """前 seed_days 个交易日 + 当天的 5 分钟K线 (每天 78 根)"""
+    rng = np.random.default_rng(seed)
+    days = pd.bdate_range(end=DAY.normalize().tz_localize(None), periods=seed_days + 1)
+    idx = pd.DatetimeIndex([pd.Timestamp(d).tz_localize("America/New_York") + pd.Timedelta(hours=9, minutes=30 + 5 * i)
+                            for d in days for i in range(78)])
+    n = len(idx)
+    closes = 100 * np.exp(np.cumsum(rng.normal(0, 0.0008, (n, len(TICKERS))), axis=0))
+    bars = pd.DataFrame(closes, index=idx, columns=TICKERS)
+    today = idx >= DAY
+    t = np.linspace(0, np.pi, today.sum())
+    bars.loc[today, "SPY"] = bars.loc[today, "SPY"].iloc[0] * (1 + 0.02 * np.sin(t) - 0.03 * (t / np.pi) ** 3)
+    bars.loc[today, ["XLU", "XLP"]] *= (1 + 0.03 * (t / np.pi) ** 2)[:, None]
+    bars["^VIX"] = 16.0
+    bars.loc[today, "^VIX"] = 16 + 12 * np.sin(t) ** 4
+    return bars
+
+
+class FakeFeed:
+    def __init__(self, bars):
+        self.bars = bars
+        self.now = DAY
+        self.calls = 0
+        self.rows = 0
+
+    def download(self, period, interval):
+        self.calls += 1
+        start = self.now.normalize() if period == "1d" else self.bars.index[0]
+        # 还没走完的K线也会返回 (价格随后被修订)
+        frame = self.bars[(self.bars.index >= start) & (self.bars.index <= self.now)]
+        self.rows += len(frame)
+        return frame
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay one trading day through watch mode")
+    parser.add_argument("--interval", type=int, default=60, help="simulated seconds between polls")
+    parser.add_argument("--seed-days", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    bars = make_day_bars(args.seed_days)
+    feed = FakeFeed(bars)
+    daily_calls = {"breadth": 0, "constituents": 0}
+
+    def fake_breadth(until=None):
+        daily_calls["breadth"] += 1
+        return pd.DataFrame({"SPY": [1.0]}), "Current Status: SPY Trend is UP, Breadth(Equal Weight) Trend is UP."
+
+    def fake_constituents(until=None):
+        daily_calls["constituents"] += 1
+        return {}
+
+    intraday._download_bars = feed.download
+    intraday.is_market_open = lambda: True
+    settings.INTRADAY_MIN_FETCH_SECONDS = 0
+    watch.analyze_market_breadth = fake_breadth
+    watch.scan_breadth = fake_constituents
+    watch.last_session_close = lambda: DAY - pd.Timedelta(hours=17, minutes=30)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        alerts_path = os.path.join(tmp, "alerts.jsonl")
+        watcher = watch.Watcher("EN", watch.AlertSink(path=alerts_path), state=IntradayState(interval="5m"))
+        tracemalloc.start()
+        ticks, seeded_mb = [], None
+        end = DAY.replace(hour=16, minute=0)
+        while feed.now <= end:
+            started = time.perf_counter()
+            watcher.tick()
+            ticks.append(time.perf_counter() - started)
+            if seeded_mb is None:
+                seeded_mb = tracemalloc.get_traced_memory()[0] / 2**20
+            feed.now += pd.Timedelta(seconds=args.interval)
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        with open(alerts_path) as f:
+            alerts = [json.loads(line) for line in f]
+
+    result = {
+        "polls": len(ticks),
+        "downloads": feed.calls,
+        "rows_downloaded": feed.rows,
+        "rows_per_poll": round(feed.rows / feed.calls, 1),
+        # 每次轮询都重新拉一年日线 (每个 ticker 约 252 行) 的对照量
+        "rows_if_full_history": len(ticks) * 252 * len(TICKERS),
+        "daily_recomputes": daily_calls,
+        **watcher.stats(),
+        "tick_ms_mean": round(statistics.mean(ticks[1:]) * 1e3, 3),
+        "tick_ms_max": round(max(ticks[1:]) * 1e3, 3),
+        "traced_mb_after_seed": round(seeded_mb, 2),
+        "traced_mb_end": round(current / 2**20, 2),
+        "traced_mb_peak": round(peak / 2**20, 2),
+        "alert_log": [f"{a['bar_time'][11:16]} {a['rule']}: {a['message']}" for a in alerts],
+    }
+    print(json.dumps(result, indent=2, ensure_ascii=False))
+    return 0 if daily_calls["breadth"] == 1 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
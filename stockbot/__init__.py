@@ -0,0 +1 @@
+"""Stock-Bot 数据层：与 Streamlit UI 无关的抓取/存储/计算模块"""
@@ -0,0 +1,79 @@
+"""把一次扫描结果写成 JSON + Markdown 产物 (原子替换，定时任务与读取方不会读到半个文件)"""
+import json
+import os
+import tempfile
+
+
+def render_markdown(result):
+    light = result["traffic_light"]
+    lines = [
+        f"# 📡 Market Radar — {result['date']} ({result['lang']})",
+        "",
+        f"_Generated at {result['generated_at']}_",
+        "",
+        f"## 🚦 {light['status']}",
+        "",
+        f"- Score: **{light['score']}**",
+        f"- VIX: {light['vix']:.2f}",
+        f"- CNN Fear/Greed: {result['fear_greed']}",
+        f"- Breadth: {result['breadth_signal']}",
+        "",
+    ]
+    lines += [f"- {reason}" for reason in light["reasons"]]
+
+    if result["sector_perf_20d"]:
+        lines += ["", "### Sector Rotation (20-Day %)", "", "| Sector | Change |", "|---|---:|"]
+        for sector, change in sorted(result["sector_perf_20d"].items(), key=lambda kv: -kv[1]):
+            lines.append(f"| {sector} | {change:+.2f}% |")
+
+    if result.get("constituent_breadth"):
+        lines += ["", "### Constituent Breadth", "",
+                  "| Index | >50MA | >200MA | A/D 20d | Highs/Lows | McClellan |", "|---|---:|---:|---:|---:|---:|"]
+        for stats in result["constituent_breadth"].values():
+            lines.append(f"| {stats['index']} ({stats['constituents']}) | {stats['pct_above_50']:.0f}% | "
+                         f"{stats['pct_above_200']:.0f}% | {stats['ad_line_20d']:+d} | "
+                         f"{stats['new_highs']}/{stats['new_lows']} | {stats['mcclellan']:+.1f} |")
+
+    lines += ["", "## 🔢 FRED", "", result["macro_hard_data"].strip(), ""]
+
+    group = None
+    for row in result["assets"]:
+        if row["group"] != group:
+            group = row["group"]
+            lines += ["", f"## {group}", "", "| Ticker | Name | Last | Chg% |", "|---|---|---:|---:|"]
+        price = f"{row['price']:.2f}" if row["price"] is not None else "N/A"
+        change = f"{row['change_pct']:+.2f}%" if row["change_pct"] is not None else ""
+        lines.append(f"| {row['ticker']} | {row['name']} | {price} | {change} |")
+
+    report = result.get("report")
+    lines += ["", "---", ""]
+    if report:
+        lines.append(report["text"])
+    elif result.get("report_error"):
+        lines.append(f"> ⚠️ Report not generated: {result['report_error']}")
+    return "\n".join(lines) + "\n"
+
+
+def _atomic_write(path, text):
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def write_artifacts(result, out_dir, stem=None):
+    """写出 <stem>.json 与 <stem>.md，并刷新 latest-<lang>.* 指向最新一次；返回两个文件路径"""
+    os.makedirs(out_dir, exist_ok=True)
+    stem = stem or f"scan-{result['date']}-{result['lang']}"
+    json_text = json.dumps(result, ensure_ascii=False, indent=2, default=str)
+    md_text = render_markdown(result)
+    paths = []
+    for name in (stem, f"latest-{result['lang']}"):
+        _atomic_write(os.path.join(out_dir, f"{name}.json"), json_text)
+        _atomic_write(os.path.join(out_dir, f"{name}.md"), md_text)
+        paths.append((os.path.join(out_dir, f"{name}.json"), os.path.join(out_dir, f"{name}.md")))
+    return paths[0]
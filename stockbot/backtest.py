@@ -0,0 +1,169 @@
+"""红绿灯评分的向量化历史序列 + 回测
+
+与 MarketRadarSystem.analyze_traffic_light 使用同一套规则，但一次性计算整段历史每个交易日的
+得分与灯色，然后统计每种灯色下 SPY 的远期收益和灯色切换次数，用来检验 70/40 阈值。
+
+    python -m stockbot.backtest --years 15 --horizons 5 20 60
+"""
+import argparse
+import json
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from .breadth import indicator_history, participation_points
+
+# 只用评分需要的 ticker (XLC/XLRE 上市较晚，会把历史截短到 2018 年)
+BACKTEST_TICKERS = ["SPY", "RSP", "^VIX", "XLK", "XLI", "XLU", "XLP"]
+GREEN, YELLOW = 70, 40
+
+
+def score_components(data, participation=None):
+    """返回逐日评分分项 (trend/breadth/rotation/sentiment/participation)、总分 score 与灯色 light
+
+    participation: breadth.indicator_history() 的逐日成分股指标，不传则该分项为 0
+    (注意成分股用的是当前名单，历史上有幸存者偏差)
+    """
+    spy = data["SPY"]
+    out = pd.DataFrame(index=data.index)
+
+    # 1. 趋势：SPY 站上 50 日线 +20 (均线不足 50 天时不得分)
+    out["trend"] = np.where(spy > spy.rolling(50).mean(), 20, 0)
+
+    # 2. 广度：RSP/SPY 高于其 20 日均线 +30
+    if "RSP" in data.columns:
+        ratio = data["RSP"] / spy
+        out["breadth"] = np.where(ratio > ratio.rolling(20).mean(), 30, 0)
+    else:
+        out["breadth"] = 0
+
+    # 3. 轮动：(XLK+XLI)/(XLU+XLP) 高于其 20 日均线 +30
+    if all(c in data.columns for c in ["XLK", "XLI", "XLU", "XLP"]):
+        ratio_od = (data["XLK"] + data["XLI"]) / (data["XLU"] + data["XLP"])
+        out["rotation"] = np.where(ratio_od > ratio_od.rolling(20).mean(), 30, 0)
+    else:
+        out["rotation"] = 0
+
+    # 4. 情绪：VIX < 15 +10，VIX > 25 -20
+    if "^VIX" in data.columns:
+        vix = data["^VIX"]
+        out["sentiment"] = np.select([vix < 15, vix > 25], [10, -20], 0)
+    else:
+        out["sentiment"] = 0
+
+    # 5. 参与度：与 MarketRadarSystem 共用 breadth.participation_points
+    if participation is not None:
+        p = participation.reindex(data.index).ffill()
+        points = participation_points(p["pct_above_50"], p["pct_above_200"], p["mcclellan"],
+                                      p["new_highs"], p["new_lows"])
+        out["participation"] = np.where(p["pct_above_200"].notna(), points, 0)
+    else:
+        out["participation"] = 0
+
+    out["score"] = out[["trend", "breadth", "rotation", "sentiment", "participation"]].sum(axis=1).clip(upper=100)
+    out["light"] = light_state(out["score"])
+    return out
+
+
+def light_state(score, green=GREEN, yellow=YELLOW):
+    return pd.Series(
+        np.select([score >= green, score >= yellow], ["green", "yellow"], "red"),
+        index=score.index,
+    )
+
+
+def forward_returns(spy, horizons):
+    return pd.DataFrame({f"fwd_{h}d": spy.shift(-h) / spy - 1 for h in horizons}, index=spy.index)
+
+
+def backtest(data, horizons=(5, 20, 60), green=GREEN, yellow=YELLOW, warmup=50, participation=None):
+    """按灯色统计 SPY 远期收益；warmup 之前均线未成形的样本不计入"""
+    comp = score_components(data, participation).iloc[warmup:]
+    light = light_state(comp["score"], green, yellow)
+    fwd = forward_returns(data["SPY"], horizons).loc[comp.index]
+
+    rows = {}
+    for state in ["green", "yellow", "red"]:
+        mask = light == state
+        row = {"days": int(mask.sum()), "share": float(mask.mean())}
+        for col in fwd.columns:
+            r = fwd.loc[mask, col].dropna()
+            row[f"{col}_mean_%"] = float(r.mean() * 100) if len(r) else None
+            row[f"{col}_median_%"] = float(r.median() * 100) if len(r) else None
+            row[f"{col}_hit_%"] = float((r > 0).mean() * 100) if len(r) else None
+        rows[state] = row
+
+    changed = light != light.shift()
+    changed.iloc[0] = False
+    transitions = pd.crosstab(light.shift()[changed], light[changed])
+    runs = changed.cumsum()
+    return {
+        "start": comp.index[0].strftime("%Y-%m-%d"),
+        "end": comp.index[-1].strftime("%Y-%m-%d"),
+        "thresholds": {"green": green, "yellow": yellow},
+        "by_light": rows,
+        "transitions": int(changed.sum()),
+        "transition_matrix": {f"{a}->{b}": int(transitions.at[a, b])
+                              for a in transitions.index for b in transitions.columns if a != b},
+        "avg_run_days": float(runs.value_counts().mean()),
+    }
+
+
+def threshold_sweep(data, greens=range(50, 95, 5), yellows=range(20, 65, 5), horizon=20, warmup=50,
+                    participation=None):
+    """不同阈值组合下 绿灯 vs 红灯 的远期收益差 (越大说明阈值区分度越好)"""
+    comp = score_components(data, participation).iloc[warmup:]
+    fwd = forward_returns(data["SPY"], [horizon]).loc[comp.index, f"fwd_{horizon}d"]
+    score = comp["score"]
+    rows = []
+    for g in greens:
+        for y in yellows:
+            if y >= g:
+                continue
+            green_r = fwd[score >= g].mean()
+            red_r = fwd[score < y].mean()
+            rows.append({"green": g, "yellow": y,
+                         "green_days": int((score >= g).sum()), "red_days": int((score < y).sum()),
+                         "spread_%": float((green_r - red_r) * 100) if pd.notna(green_r) and pd.notna(red_r) else None})
+    return pd.DataFrame(rows).sort_values("spread_%", ascending=False)
+
+
+def load_history(years):
+    from .store import get_price_store
+    start = datetime.now() - timedelta(days=int(365.25 * years))
+    data = get_price_store().get_closes(BACKTEST_TICKERS, start=start)
+    return data.ffill().dropna()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Traffic-light score backtest")
+    parser.add_argument("--years", type=float, default=15)
+    parser.add_argument("--horizons", type=int, nargs="+", default=[5, 20, 60])
+    parser.add_argument("--green", type=int, default=GREEN)
+    parser.add_argument("--yellow", type=int, default=YELLOW)
+    parser.add_argument("--sweep", action="store_true", help="also print a threshold sweep")
+    parser.add_argument("--breadth", choices=["sp500", "ndx"],
+                        help="add the constituent participation component (current constituents)")
+    parser.add_argument("--json", help="write the report to this file")
+    args = parser.parse_args(argv)
+
+    data = load_history(args.years)
+    participation = indicator_history(args.breadth) if args.breadth else None
+    report = backtest(data, args.horizons, args.green, args.yellow, participation=participation)
+    print(f"{report['start']} -> {report['end']}  thresholds {report['thresholds']}")
+    print(pd.DataFrame(report["by_light"]).T.round(2).to_string())
+    print(f"\ntransitions: {report['transitions']}  avg run: {report['avg_run_days']:.1f} days")
+    print(report["transition_matrix"])
+    if args.sweep:
+        sweep = threshold_sweep(data, horizon=args.horizons[min(1, len(args.horizons) - 1)],
+                                participation=participation)
+        print("\n" + sweep.head(15).round(2).to_string(index=False))
+        report["sweep"] = sweep.to_dict(orient="records")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,366 @@
+"""成分股广度引擎：标普500 / 纳指100 全部成分股的参与度指标
+
+RSP/SPY 只能看出等权与市值加权的背离；这里对 500+ 只成分股逐日计算
+  * 站上 50 / 200 日均线的比例
+  * 涨跌家数与腾落线 (A/D line)
+  * 52 周新高 / 新低家数
+  * McClellan 振荡器 (比例调整后的净上涨家数 19/39 日 EMA 之差)
+
+收盘价放在一个紧凑的 float32 面板里 (日期 x ticker，缺失为 NaN)，持久化为 .npz，
+每次只从本地行情库读最近几根K线增量更新；全部指标都在 NumPy 上按列向量化计算，
+没有逐 ticker 的 Python 循环 (500 只 x 10 年约 0.15 秒)。
+
+    python -m stockbot.breadth --index sp500
+"""
+import argparse
+import io
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from . import settings
+from .cache import cached
+from .resilience import upstream
+from .store import get_price_store
+from .telemetry import external_span
+
+logger = logging.getLogger(__name__)
+
+INDEXES = {
+    "sp500": {"name": "S&P 500", "url": "https://en.wikipedia.org/wiki/List_of_S%26P_500_companies",
+              "column": "Symbol"},
+    "ndx": {"name": "Nasdaq 100", "url": "https://en.wikipedia.org/wiki/Nasdaq-100", "column": "Ticker"},
+}
+HIGH_LOW_WINDOW = 252
+
+
+# === 成分股清单 ===
+def _constituents_path(index):
+    return os.path.join(settings.DATA_DIR, f"constituents-{index}.json")
+
+
+def _fetch_constituents(index):
+    """从维基百科成分股表格解析 ticker (BRK.B -> BRK-B，与 Yahoo 一致)"""
+    from .sources import get_http_session
+
+    spec = INDEXES[index]
+
+    def fetch():
+        with external_span("wiki", f"constituents {index}") as span:
+            r = get_http_session().get(spec["url"], timeout=10)
+            span.bytes = len(r.content)
+            r.raise_for_status()
+        return r
+
+    r = upstream("wiki").call(fetch)
+    tables = pd.read_html(io.StringIO(r.text), match=spec["column"])
+    table = next(t for t in tables if spec["column"] in t.columns)
+    tickers = [str(t).strip().upper().replace(".", "-") for t in table[spec["column"]].dropna()]
+    if len(tickers) < 90:
+        raise ValueError(f"{index}: only {len(tickers)} constituents parsed")
+    return list(dict.fromkeys(tickers))
+
+
+def get_constituents(index):
+    """成分股列表；本地快照超过 BREADTH_CONSTITUENTS_MAX_AGE 才重新抓取，抓取失败沿用旧快照"""
+    path = _constituents_path(index)
+    saved = None
+    if os.path.exists(path):
+        with open(path) as f:
+            saved = json.load(f)
+        if time.time() - saved["fetched_at"] < settings.BREADTH_CONSTITUENTS_MAX_AGE:
+            return saved["tickers"]
+    try:
+        tickers = _fetch_constituents(index)
+    except Exception as e:
+        logger.warning("constituents %s unavailable: %s", index, e)
+        return saved["tickers"] if saved else []
+
+    os.makedirs(settings.DATA_DIR, exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        json.dump({"fetched_at": time.time(), "tickers": tickers}, f)
+    os.replace(tmp, path)
+    return tickers
+
+
+# === 收盘价面板 ===
+class BreadthPanel:
+    """float32 收盘价面板：dates (datetime64[D]) x tickers，缺失为 NaN；持久化为 .npz"""
+
+    def __init__(self, path=None):
+        self.path = path
+        self.dates = np.array([], dtype="datetime64[D]")
+        self.tickers = []
+        self.closes = np.empty((0, 0), dtype=np.float32)
+        self._lock = threading.Lock()
+        if path and os.path.exists(path):
+            with np.load(path, allow_pickle=False) as npz:
+                self.dates = npz["dates"]
+                self.tickers = npz["tickers"].tolist()
+                self.closes = npz["closes"]
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp = f"{self.path}.tmp.npz"
+        np.savez(tmp, dates=self.dates, tickers=np.array(self.tickers), closes=self.closes)
+        os.replace(tmp, self.path)
+
+    def update(self, tickers, start, store=None, tolerance=1e-4):
+        """对齐到新的成分股列表并补上最新K线
+
+        已有的 ticker 只从行情库读最近 PRICE_REVALIDATE_BARS 根 (复权价被修订时整列重读)，
+        新加入的 ticker 读完整历史；面板只保留 start 之后的日期。
+        """
+        store = store or get_price_store()
+        tickers = list(dict.fromkeys(tickers))
+        start = np.datetime64(pd.Timestamp(start).date(), "D")
+        with self._lock:
+            old_col = {t: i for i, t in enumerate(self.tickers)}
+            has_history = self.dates.size > 0 and self.dates[0] <= start
+            known = [t for t in tickers if t in old_col] if has_history else []
+
+            tail = pd.DataFrame()
+            if known:
+                tail_start = self.dates[max(0, self.dates.size - max(settings.PRICE_REVALIDATE_BARS, 1))]
+                tail = store.get_closes(known, start=pd.Timestamp(tail_start))
+                restated = self._restated(tail, old_col, tolerance)
+                known = [t for t in known if t not in restated]
+                tail = tail.drop(columns=restated)
+            fresh = [t for t in tickers if t not in known]
+            full = store.get_closes(fresh, start=pd.Timestamp(start)) if fresh else pd.DataFrame()
+
+            kept = self.dates >= start
+            dates = np.union1d(self.dates[kept] if known else np.array([], dtype="datetime64[D]"),
+                               np.union1d(_to_days(tail.index), _to_days(full.index)))
+            closes = np.full((dates.size, len(tickers)), np.nan, dtype=np.float32)
+            col = {t: i for i, t in enumerate(tickers)}
+            if known:
+                rows = np.searchsorted(dates, self.dates[kept])
+                closes[np.ix_(rows, [col[t] for t in known])] = self.closes[kept][:, [old_col[t] for t in known]]
+            for frame in (tail, full):
+                frame = frame.reindex(columns=[t for t in frame.columns if t in col])
+                if frame.empty:
+                    continue
+                values = frame.to_numpy(dtype=np.float32)
+                rows = np.searchsorted(dates, _to_days(frame.index))
+                block = closes[np.ix_(rows, [col[t] for t in frame.columns])]
+                closes[np.ix_(rows, [col[t] for t in frame.columns])] = np.where(np.isnan(values), block, values)
+
+            self.dates, self.tickers, self.closes = dates, tickers, closes
+            if self.path:
+                self.save()
+        return self
+
+    def _restated(self, tail, old_col, tolerance):
+        """回溯窗口内与面板不一致的 ticker (分红/拆股后复权价被修订)；最后一根可能是盘中价，不比对"""
+        if tail.empty or self.dates.size < 2:
+            return []
+        overlap = np.intersect1d(_to_days(tail.index), self.dates[:-1])
+        if overlap.size == 0:
+            return []
+        stored = self.closes[np.searchsorted(self.dates, overlap)][:, [old_col[t] for t in tail.columns]]
+        fetched = tail.loc[pd.DatetimeIndex(overlap)].to_numpy(dtype=np.float32)
+        diff = np.abs(fetched - stored) > tolerance * np.abs(stored)
+        return [t for t, changed in zip(tail.columns, diff.any(axis=0)) if changed]
+
+    def frame(self):
+        return pd.DataFrame(self.closes, index=pd.DatetimeIndex(self.dates), columns=self.tickers)
+
+
+def _to_days(index):
+    return np.asarray(pd.DatetimeIndex(index).values.astype("datetime64[D]"))
+
+
+_panels = {}
+_panels_lock = threading.Lock()
+
+
+def get_panel(index):
+    """每个指数一个进程级面板 (首次使用时从磁盘加载)"""
+    with _panels_lock:
+        if index not in _panels:
+            _panels[index] = BreadthPanel(os.path.join(settings.DATA_DIR, f"breadth-{index}.npz"))
+        return _panels[index]
+
+
+# === 向量化指标 ===
+def rolling_mean(a, window):
+    """按列滑动均值；窗口内有缺失时为 NaN (float64 累加，避免 float32 累积误差)"""
+    valid = ~np.isnan(a)
+    out = np.full(a.shape, np.nan, dtype=np.float32)
+    if a.shape[0] < window:
+        return out
+    sums = np.cumsum(np.where(valid, a, 0), axis=0, dtype=np.float64)
+    counts = np.cumsum(valid, axis=0, dtype=np.int32)
+    sums = np.vstack([np.zeros((1, a.shape[1])), sums])
+    counts = np.vstack([np.zeros((1, a.shape[1]), dtype=np.int32), counts])
+    window_sum = sums[window:] - sums[:-window]
+    full = (counts[window:] - counts[:-window]) == window
+    out[window - 1:] = np.where(full, window_sum / window, np.nan)
+    return out
+
+
+def rolling_max(a, window):
+    """按列滑动最大值 (van Herk / Gil-Werman 分块前缀/后缀最大值，O(T x N))；窗口内有缺失时为 NaN"""
+    T, N = a.shape
+    out = np.full(a.shape, np.nan, dtype=a.dtype)
+    if T < window:
+        return out
+    missing = np.isnan(a)
+    x = np.where(missing, -np.inf, a)
+    x = np.vstack([x, np.full(((-T) % window, N), -np.inf, dtype=a.dtype)]).reshape(-1, window, N)
+    prefix = np.maximum.accumulate(x, axis=1).reshape(-1, N)
+    suffix = np.maximum.accumulate(x[:, ::-1], axis=1)[:, ::-1].reshape(-1, N)
+    out[window - 1:] = np.maximum(suffix[:T - window + 1], prefix[window - 1:T])
+    gaps = np.cumsum(np.vstack([np.zeros((1, N), dtype=np.int32), missing]), axis=0, dtype=np.int32)
+    out[window - 1:][(gaps[window:] - gaps[:-window]) > 0] = np.nan
+    return out
+
+
+def rolling_min(a, window):
+    return -rolling_max(-a, window)
+
+
+def ema(x, span):
+    """一维 EMA (adjust=False)；只在时间轴上递推，与成分股数量无关"""
+    alpha = 2.0 / (span + 1)
+    out = np.empty(len(x), dtype=np.float64)
+    acc = x[0] if len(x) else 0.0
+    for i, v in enumerate(x):
+        acc = acc + alpha * (v - acc)
+        out[i] = acc
+    return out
+
+
+def _share(hit, valid):
+    n = valid.sum(axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(n > 0, (hit & valid).sum(axis=1) / n * 100, np.nan)
+
+
+def compute_indicators(closes, high_low_window=HIGH_LOW_WINDOW):
+    """closes: (T, N) float32 收盘价面板 -> 每个指标一条长度为 T 的逐日序列"""
+    c = np.asarray(closes, dtype=np.float32)
+    T = c.shape[0]
+    ma50, ma200 = rolling_mean(c, 50), rolling_mean(c, 200)
+
+    # NaN 参与比较一律为 False，缺失的 ticker 自然不计入涨跌家数
+    change = c[1:] - c[:-1]
+    advances = np.zeros(T, dtype=np.int32)
+    declines = np.zeros(T, dtype=np.int32)
+    advances[1:] = (change > 0).sum(axis=1)
+    declines[1:] = (change < 0).sum(axis=1)
+    net = advances - declines
+
+    highs, lows = rolling_max(c, high_low_window), rolling_min(c, high_low_window)
+    traded = advances + declines
+    with np.errstate(invalid="ignore", divide="ignore"):
+        rana = np.where(traded > 0, net / traded * 1000, 0.0)
+
+    return {
+        "pct_above_50": _share(c > ma50, ~np.isnan(ma50)),
+        "pct_above_200": _share(c > ma200, ~np.isnan(ma200)),
+        "advances": advances,
+        "declines": declines,
+        "ad_line": np.cumsum(net),
+        "new_highs": ((c >= highs) & ~np.isnan(highs)).sum(axis=1),
+        "new_lows": ((c <= lows) & ~np.isnan(lows)).sum(axis=1),
+        "mcclellan": ema(rana, 19) - ema(rana, 39),
+    }
+
+
+def participation_points(pct_above_50, pct_above_200, mcclellan, new_highs, new_lows):
+    """红绿灯的参与度分项 (-20 ~ +20)；标量和逐日数组都可以传
+
+    长期：站上 200 日线的成分股 >= 60% +10，<= 40% -10
+    短期：McClellan > 0 且过半站上 50 日线 +10；McClellan < 0 且新低多于新高 -10
+    """
+    pct_above_50, pct_above_200, mcclellan = map(np.asarray, (pct_above_50, pct_above_200, mcclellan))
+    trend = np.select([pct_above_200 >= 60, pct_above_200 <= 40], [10, -10], 0)
+    thrust = np.select([(mcclellan > 0) & (pct_above_50 >= 50),
+                        (mcclellan < 0) & (np.asarray(new_lows) > np.asarray(new_highs))], [10, -10], 0)
+    return trend + thrust
+
+
+# === 对外接口 ===
+def history_start():
+    return datetime.now() - timedelta(days=settings.BREADTH_HISTORY_DAYS)
+
+
+def indicator_history(index):
+    """更新面板并返回逐日指标 DataFrame (index=日期)；拿不到成分股时返回 None"""
+    tickers = get_constituents(index)
+    if not tickers:
+        return None
+    panel = get_panel(index).update(tickers, history_start())
+    if panel.dates.size == 0:
+        return None
+    return pd.DataFrame(compute_indicators(panel.closes), index=pd.DatetimeIndex(panel.dates))
+
+
+@cached("breadth", key=lambda index="sp500", until=None: (index, until), skip=lambda stats: stats is None)
+def constituent_breadth(index="sp500", until=None):
+    """最新一个交易日 (给了 until 时为 until 当天或之前最近的一天) 的广度快照 (dict，可 JSON 序列化)；失败时返回 None"""
+    try:
+        history = indicator_history(index)
+    except Exception as e:
+        logger.warning("constituent breadth %s failed: %s", index, e)
+        return None
+    if history is not None and until is not None:
+        # 指标都只依赖当天及以前的数据，截掉之后的行与只用截止日之前的面板计算结果相同
+        history = history[history.index <= pd.Timestamp(until)]
+    if history is None or len(history) < 2:
+        return None
+    latest = history.iloc[-1]
+    ad_line = history["ad_line"]
+    return {
+        "index": INDEXES[index]["name"],
+        "date": history.index[-1].strftime("%Y-%m-%d"),
+        "constituents": len(get_panel(index).tickers),
+        "pct_above_50": round(float(latest["pct_above_50"]), 1),
+        "pct_above_200": round(float(latest["pct_above_200"]), 1),
+        "advances": int(latest["advances"]),
+        "declines": int(latest["declines"]),
+        "ad_line_20d": int(ad_line.iloc[-1] - ad_line.iloc[max(0, len(ad_line) - 21)]),
+        "new_highs": int(latest["new_highs"]),
+        "new_lows": int(latest["new_lows"]),
+        "mcclellan": round(float(latest["mcclellan"]), 1),
+    }
+
+
+def scan_breadth(cold_start=True, until=None):
+    """settings.BREADTH_INDEXES 中每个指数的快照 {index: dict}；全部不可用时返回空 dict
+
+    冷启动要把约 600 只成分股 x 3 年同步进行情库 (期间占着行情库的锁)，只该在预热 / CLI 里做；
+    交互扫描传 cold_start=False，本地还没有面板的指数直接跳过。until 见 constituent_breadth
+    """
+    indexes = [index for index in settings.BREADTH_INDEXES if cold_start or get_panel(index).dates.size]
+    results = {index: constituent_breadth(index, until=until) for index in indexes}
+    return {index: stats for index, stats in results.items() if stats}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Constituent breadth for S&P 500 / Nasdaq 100")
+    parser.add_argument("--index", choices=list(INDEXES), default="sp500")
+    parser.add_argument("--tail", type=int, default=10, help="print the last N days")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    history = indicator_history(args.index)
+    if history is None:
+        print("constituents unavailable")
+        return 1
+    print(history.tail(args.tail).round(1).to_string())
+    print(f"\n{len(get_panel(args.index).tickers)} tickers x {len(history)} days  {time.perf_counter() - started:.2f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,199 @@
+"""进程级 TTL + LRU 缓存 (所有 Streamlit 会话共享)
+
+每个数据源一个独立的缓存实例，TTL / 容量见 settings.CACHE_TTLS / CACHE_MAXSIZE。
+缓存对象挂在模块上而不是 app.py 里，Streamlit 每次 rerun 重新执行脚本时不会被清空。
+过期条目不立即删除 (只会被 LRU 挤掉)：上游失败或熔断时 cached() 回退到上一次成功的值。
+"""
+import functools
+import threading
+import time
+from collections import OrderedDict
+
+from . import settings
+from .singleflight import SingleFlight
+from .telemetry import note_coalesced
+
+
+class TTLCache:
+    def __init__(self, name, ttl, maxsize):
+        self.name = name
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.stale_served = 0
+        self.coalesced = 0
+        self.inflight = SingleFlight()
+        self._data = OrderedDict()  # key -> (stored_at, expires_at, value)
+        self._lock = threading.RLock()
+
+    def get(self, key, count=True):
+        """返回 (命中与否, 值)；count=False 时不计入命中统计 (内部复查用)"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and time.time() < entry[1]:
+                self._data.move_to_end(key)
+                if count:
+                    self.hits += 1
+                return True, entry[2]
+            if count:
+                self.misses += 1
+            return False, None
+
+    def get_stale(self, key, max_age=None):
+        """不管是否过期，返回 (找到与否, 值)；存入超过 max_age 秒 (默认 CACHE_STALE_MAX_AGE) 的不算"""
+        max_age = settings.CACHE_STALE_MAX_AGE if max_age is None else max_age
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or time.time() - entry[0] > max_age:
+                return False, None
+            self.stale_served += 1
+            return True, entry[2]
+
+    def set(self, key, value, ttl=None):
+        """ttl 为空时使用数据源默认 TTL；预热任务会按自己的刷新周期写入更长的 TTL"""
+        with self._lock:
+            now = time.time()
+            self._data[key] = (now, now + (self.ttl if ttl is None else ttl), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def note_coalesced(self):
+        with self._lock:
+            self.coalesced += 1
+        note_coalesced(self.name)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def expire(self):
+        """让所有条目立即过期但保留旧值 (基准测试/调试用)"""
+        with self._lock:
+            for key, (stored_at, _, value) in self._data.items():
+                self._data[key] = (stored_at, 0.0, value)
+
+    def ages(self):
+        """全部条目 (含可回退的过期条目) 的 (最新, 最旧) 存入时长 (秒)；没有条目时返回 (None, None)"""
+        with self._lock:
+            now = time.time()
+            stored = [entry[0] for entry in self._data.values()]
+        if not stored:
+            return None, None
+        return now - max(stored), now - min(stored)
+
+    def stats(self):
+        newest, oldest = self.ages()
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "source": self.name,
+                "entries": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl_s": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 3) if total else 0.0,
+                "evictions": self.evictions,
+                "stale_served": self.stale_served,
+                "coalesced": self.coalesced,
+                "newest_age_s": round(newest, 1) if newest is not None else None,
+                "oldest_age_s": round(oldest, 1) if oldest is not None else None,
+            }
+
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def get_cache(source):
+    with _caches_lock:
+        if source not in _caches:
+            _caches[source] = TTLCache(
+                source,
+                ttl=settings.CACHE_TTLS.get(source, 300),
+                maxsize=settings.CACHE_MAXSIZE.get(source, 128),
+            )
+        return _caches[source]
+
+
+def reset_caches():
+    """丢弃所有缓存实例，下次使用时按当前 settings 重新创建 (基准测试/调试用)"""
+    with _caches_lock:
+        _caches.clear()
+
+
+def cache_stats():
+    with _caches_lock:
+        caches = list(_caches.values())
+    return [c.stats() for c in caches]
+
+
+def source_ages(sources):
+    """{数据源: 缓存中最旧一条的存入时长 (秒)}，没有条目的数据源为 None"""
+    stats = {row["source"]: row for row in cache_stats()}
+    return {source: stats[source]["oldest_age_s"] if source in stats else None for source in sources}
+
+
+def _freeze(value):
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    return value
+
+
+def cached(source, key=None, skip=None):
+    """按数据源缓存函数结果
+
+    key:  自定义 key 函数 (参数同被装饰函数)，默认用全部参数
+    skip: skip(result) 为 True 时不写缓存 (例如请求失败返回的空结果)，
+          此时如果该 key 有上一次成功的值 (即使已过期) 就返回旧值
+
+    未命中时同一个 key 的并发调用只执行一次 (single-flight)，合并掉的调用数见 stats()["coalesced"]。
+    被装饰函数多一个 refresh(ttl, *args, **kwargs)：跳过缓存直接调用并写回 (预热任务用)
+    """
+    def decorator(func):
+        name = f"{func.__module__}.{func.__qualname__}"
+
+        def load(cache, cache_key, args, kwargs, ttl=None):
+            """同一个 key 同时只有一个调用者真正执行 func，其余的等它的结果 (跨会话/线程合并请求)"""
+            def run():
+                if ttl is None:
+                    # 排队期间别的调用者可能已经写好了
+                    hit, value = cache.get(cache_key, count=False)
+                    if hit:
+                        return value
+                value = func(*args, **kwargs)
+                if skip and skip(value):
+                    found, last = cache.get_stale(cache_key)
+                    return last if found else value
+                cache.set(cache_key, value, ttl=ttl)
+                return value
+
+            value, shared = cache.inflight.do(cache_key, run)
+            if shared:
+                cache.note_coalesced()
+            return value
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            raw_key = key(*args, **kwargs) if key else (args, kwargs)
+            cache_key = (name, _freeze(raw_key))
+            cache = get_cache(source)
+            hit, value = cache.get(cache_key)
+            if hit:
+                return value
+            return load(cache, cache_key, args, kwargs)
+
+        def refresh(ttl, *args, **kwargs):
+            raw_key = key(*args, **kwargs) if key else (args, kwargs)
+            return load(get_cache(source), (name, _freeze(raw_key)), args, kwargs, ttl=ttl)
+
+        wrapper.refresh = refresh
+        return wrapper
+
+    return decorator
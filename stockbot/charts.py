@@ -0,0 +1,87 @@
+"""图表：渲染成 PNG 字节并按数据快照缓存 (只有 UI 需要；无头模式不会导入本模块)
+
+直接用 matplotlib.figure.Figure 而不是 pyplot：图不会登记到 pyplot 的全局图表管理器里，
+渲染完即可被回收，长时间运行的 Streamlit 进程内存不会随扫描次数增长。
+同一份数据快照 (内容哈希相同) 的图表只画一次，之后直接返回缓存的 PNG 字节。
+"""
+import hashlib
+import io
+import json
+
+import pandas as pd
+from matplotlib.figure import Figure
+
+from .cache import cached
+
+DPI = 110
+
+
+def snapshot_key(data):
+    """数据快照的内容哈希 (dict 或 DataFrame)"""
+    if isinstance(data, pd.DataFrame):
+        digest = hashlib.sha256(pd.util.hash_pandas_object(data, index=True).values.tobytes())
+        digest.update(",".join(map(str, data.columns)).encode())
+    else:
+        digest = hashlib.sha256(json.dumps(data, sort_keys=True, default=str).encode())
+    return digest.hexdigest()
+
+
+def _to_png(fig):
+    buf = io.BytesIO()
+    try:
+        fig.savefig(buf, format="png", dpi=DPI)
+    finally:
+        fig.clear()
+    return buf.getvalue()
+
+
+@cached("charts", key=snapshot_key)
+def sector_heatmap_png(sector_perf):
+    """行业强弱横向柱状图；sector_perf 来自 MarketRadarSystem.sector_performance，为空时返回 None"""
+    if not sector_perf:
+        return None
+
+    df_perf = pd.DataFrame(list(sector_perf.items()), columns=['Sector', 'Change'])
+    df_perf = df_perf.sort_values('Change', ascending=True)
+
+    fig = Figure(figsize=(8, 5))
+    ax = fig.subplots()
+    colors = ['#d32f2f' if x < 0 else '#388e3c' for x in df_perf['Change']]
+    bars = ax.barh(df_perf['Sector'], df_perf['Change'], color=colors)
+
+    ax.set_title("Sector Rotation (20-Day Performance)", fontsize=12, fontweight='bold')
+    ax.set_xlabel("% Change", fontsize=10)
+    ax.grid(axis='x', linestyle='--', alpha=0.3)
+
+    for bar in bars:
+        width = bar.get_width()
+        label_x_pos = width if width > 0 else width - 0.5
+        ax.text(label_x_pos, bar.get_y() + bar.get_height()/2, f'{width:.1f}%',
+                va='center', fontsize=9, color='black')
+
+    fig.tight_layout()
+    return _to_png(fig)
+
+
+@cached("charts", key=snapshot_key)
+def breadth_png(df):
+    """SPY 与 RSP/SPY 广度比的双轴背离图；df 来自 radar.analyze_market_breadth"""
+    fig = Figure(figsize=(10, 4))
+    ax1 = fig.subplots()
+    color = 'tab:red'
+    ax1.set_xlabel('Date')
+    ax1.set_ylabel('S&P 500 (SPY)', color=color, fontweight='bold')
+    ax1.plot(df.index, df['SPY_Normalized'], color=color, label='SPY Price', linewidth=1.5)
+    ax1.tick_params(axis='y', labelcolor=color)
+    ax1.grid(False)
+
+    ax2 = ax1.twinx()
+    color = 'tab:blue'
+    ax2.set_ylabel('Market Breadth (RSP/SPY)', color=color, fontweight='bold')
+    ax2.plot(df.index, df['Normalized_Ratio'], color=color, label='Breadth Ratio', linewidth=1.5)
+    ax2.plot(df.index, df['Ratio_MA20'], color=color, linestyle='--', alpha=0.3, linewidth=1)
+    ax2.tick_params(axis='y', labelcolor=color)
+
+    ax2.set_title('Market Breadth Divergence (Red=Index, Blue=Breadth)', fontsize=10)
+    fig.tight_layout()
+    return _to_png(fig)
@@ -0,0 +1,102 @@
+"""无头扫描入口：不启动 Streamlit，跑完整条流水线并写出 JSON + Markdown
+
+    python -m stockbot scan --lang CN --out reports/
+    python -m stockbot watch --lang CN --webhook http://127.0.0.1:9000/hook
+    # crontab：美东开盘前预生成早报
+    # 0 8 * * 1-5  cd /srv/stock-bot && python -m stockbot scan --lang CN --lang EN
+
+API Key 依次从环境变量 GEMINI_API_KEY / FRED_API_KEY 和 .streamlit/secrets.toml
+(GEMINI_DEMO_KEY、[general] FRED_API_KEY) 中读取。
+"""
+import argparse
+import logging
+import os
+import sys
+
+try:
+    import tomllib
+except ImportError:  # Python < 3.11：只读环境变量
+    tomllib = None
+
+from . import settings
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def load_keys(secrets_path=None):
+    """返回 (gemini_key, fred_key)；环境变量优先"""
+    secrets = {}
+    path = secrets_path or os.path.join(ROOT, ".streamlit", "secrets.toml")
+    if tomllib and os.path.exists(path):
+        with open(path, "rb") as f:
+            secrets = tomllib.load(f)
+    gemini = os.environ.get("GEMINI_API_KEY") or secrets.get("GEMINI_DEMO_KEY")
+    fred = os.environ.get("FRED_API_KEY") or secrets.get("general", {}).get("FRED_API_KEY")
+    return gemini, fred
+
+
+def cmd_scan(args):
+    from .artifacts import write_artifacts
+    from .pipeline import run_scan
+
+    gemini_key, fred_key = load_keys(args.secrets)
+    failed = False
+    for lang in args.lang or ["CN"]:
+        result = run_scan(lang, gemini_key, fred_key, with_report=not args.no_report,
+                          on_status=lambda step: logging.info("[%s] %s", lang, step), report_mode=args.report_mode)
+        json_path, md_path = write_artifacts(result, args.out)
+        light = result["traffic_light"]
+        print(f"[{lang}] {light['status']} score={light['score']}  "
+              f"{result['diagnostics']['total']:.1f}s -> {json_path}, {md_path}")
+        if result["report_error"]:
+            print(f"[{lang}] report failed: {result['report_error']}", file=sys.stderr)
+            failed = True
+    return 1 if failed else 0
+
+
+def cmd_watch(args):
+    from .watch import AlertSink, Watcher, alert_file
+
+    path = alert_file() if args.alerts is None else args.alerts
+    sink = AlertSink(path=path or None, webhook=args.webhook or None)
+    watcher = Watcher(args.lang, sink)
+
+    def on_alert(alert):
+        print(f"[{alert['ts']}] {alert['rule']}: {alert['message']}", flush=True)
+
+    if args.once:
+        for alert in watcher.tick():
+            on_alert(alert)
+        light = watcher.light.value
+        print(f"{light['status']} score={light['score']} bars={light['bars']}" if light else "no intraday bars")
+    else:
+        watcher.run(args.interval, until_close=args.until_close, on_alert=on_alert)
+    print(watcher.stats())
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m stockbot", description="Headless market radar scan")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("scan", help="run the full scan and write JSON + markdown artifacts")
+    p.add_argument("--lang", action="append", choices=["CN", "EN"], help="repeatable, default CN")
+    p.add_argument("--out", default=os.path.join(settings.DATA_DIR, "reports"))
+    p.add_argument("--no-report", action="store_true", help="skip the Gemini report (data only)")
+    p.add_argument("--report-mode", choices=["single", "mapreduce"], default=settings.REPORT_MODE,
+                   help="single prompt, or per-group digests in parallel then the CIO report")
+    p.add_argument("--secrets", help="path to a secrets.toml (default .streamlit/secrets.toml)")
+    p.set_defaults(func=cmd_scan)
+
+    p = sub.add_parser("watch", help="poll intraday bars and alert on traffic light / VIX / breadth changes")
+    p.add_argument("--lang", choices=["CN", "EN"], default="CN")
+    p.add_argument("--interval", type=int, default=settings.WATCH_POLL_SECONDS, help="seconds between polls")
+    p.add_argument("--alerts", help="JSON lines file (default <DATA_DIR>/alerts.jsonl, '' to disable)")
+    p.add_argument("--webhook", default=settings.WATCH_WEBHOOK, help="POST each alert as JSON to this URL")
+    p.add_argument("--until-close", action="store_true", help="exit after the session closes")
+    p.add_argument("--once", action="store_true", help="poll once and exit")
+    p.set_defaults(func=cmd_watch)
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    return args.func(args)
@@ -0,0 +1,225 @@
+"""FRED 宏观序列：并行抓取 + 按发布日历落盘缓存
+
+宏观数据只在发布日变化。每个序列按频率和发布时滞估算下一次发布日期，
+没到发布日就直接读本地缓存；到期后再拉取 (拉不到新值则按间隔重试)。
+YoY 等变换基于观测日期计算，月度/周度序列通用。
+"""
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from . import settings
+from .resilience import upstream
+from .telemetry import external_span, wrap
+
+# series_id -> (频率, 观测期结束后到发布的大致天数)
+# 季度/月度序列的观测日期记在期初 (如 2025-04-01 代表 Q2)，周度序列记在周末 (周六)
+SERIES_CALENDAR = {
+    # 时滞从 "下一期的期末" 算起，取最早可能的发布日：到点之后由 RECHECK_SECONDS 轮询，拿到新值为止
+    "A191RL1Q225SBEA": ("Q", 25),   # GDP 初值：季度结束后约 4 周 (通常 25~30 日)
+    "CPIAUCNS": ("M", 9),           # CPI：次月 10~15 日
+    "PCEPI": ("M", 25),             # PCE：次月最后一周
+    "PCEPILFE": ("M", 25),
+    "UNRATE": ("M", 0),             # 非农报告：次月第一个周五 (1~7 日)
+    "PAYEMS": ("M", 0),
+    "DGS10": ("D", 1),
+    "ICSA": ("W", 5),               # 初请：周六截止，下周四公布
+    "CCSA": ("W", 12),              # 续请：比初请晚一周
+}
+PERIODS = {
+    "D": pd.offsets.BDay(1),
+    "W": pd.DateOffset(weeks=1),
+    "M": pd.DateOffset(months=1),
+    "Q": pd.DateOffset(months=3),
+}
+# 到期后没拿到新值时的重试间隔，以及无论如何都要刷新的最长缓存时间 (覆盖数据修订)
+RECHECK_SECONDS = {"D": 3600, "W": 6 * 3600, "M": 6 * 3600, "Q": 12 * 3600}
+MAX_AGE_SECONDS = {"D": 86400, "W": 7 * 86400, "M": 14 * 86400, "Q": 30 * 86400}
+
+HISTORY_DAYS = 730
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS observations (
+    series_id TEXT NOT NULL,
+    date      TEXT NOT NULL,
+    value     REAL,
+    PRIMARY KEY (series_id, date)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS series_sync (
+    series_id  TEXT PRIMARY KEY,
+    checked_at REAL NOT NULL
+);
+"""
+
+
+def next_expected_release(series_id, last_obs):
+    """按 "下一期观测的期末 + 发布时滞" 估算下一次发布时间"""
+    freq, lag_days = SERIES_CALENDAR.get(series_id, ("D", 1))
+    next_obs = pd.Timestamp(last_obs) + PERIODS[freq]
+    period_end = next_obs + PERIODS[freq] if freq in ("M", "Q") else next_obs
+    return period_end + pd.Timedelta(days=lag_days)
+
+
+class FredSeriesStore:
+    def __init__(self, path=None):
+        self.path = path or os.path.join(settings.DATA_DIR, "fred.sqlite")
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    def load(self, series_id):
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT date, value FROM observations WHERE series_id = ? ORDER BY date", (series_id,)
+            ).fetchall()
+            checked = conn.execute(
+                "SELECT checked_at FROM series_sync WHERE series_id = ?", (series_id,)
+            ).fetchone()
+        series = pd.Series(
+            [v for _, v in rows], index=pd.to_datetime([d for d, _ in rows]), name=series_id, dtype=float
+        )
+        return series, (checked[0] if checked else None)
+
+    def save(self, series_id, series, checked_at):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM observations WHERE series_id = ?", (series_id,))
+            conn.executemany(
+                "INSERT INTO observations (series_id, date, value) VALUES (?, ?, ?)",
+                [(series_id, d.strftime("%Y-%m-%d"), float(v)) for d, v in series.items()],
+            )
+            conn.execute(
+                "INSERT OR REPLACE INTO series_sync (series_id, checked_at) VALUES (?, ?)",
+                (series_id, checked_at),
+            )
+
+    def touch(self, series_id, checked_at):
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO series_sync (series_id, checked_at) VALUES (?, ?)",
+                (series_id, checked_at),
+            )
+
+    def is_due(self, series_id, series, checked_at, now=None):
+        now = now or time.time()
+        if series.empty or checked_at is None:
+            return True
+        freq = SERIES_CALENDAR.get(series_id, ("D", 1))[0]
+        age = now - checked_at
+        if age >= MAX_AGE_SECONDS[freq]:
+            return True
+        released = pd.Timestamp(now, unit="s") >= next_expected_release(series_id, series.index[-1])
+        return released and age >= RECHECK_SECONDS[freq]
+
+    def get_many(self, client, series_ids, max_workers=None):
+        """返回 {series_id: Series}；只有到期的序列才会并行请求 FRED"""
+        with self._lock:
+            now = time.time()
+            cached = {sid: self.load(sid) for sid in series_ids}
+            due = [sid for sid, (series, checked) in cached.items() if self.is_due(sid, series, checked, now)]
+            result = {sid: series for sid, (series, _) in cached.items()}
+            if not due:
+                return result
+
+            start = (pd.Timestamp(now, unit="s") - pd.Timedelta(days=HISTORY_DAYS)).strftime("%Y-%m-%d")
+
+            def download(sid):
+                with external_span("fred", sid) as span:
+                    series = client.get_series(sid, observation_start=start).dropna()
+                    span.frame_bytes = int(series.memory_usage(deep=True))
+                return series
+
+            def fetch(sid):
+                return upstream("fred").call(lambda: download(sid))
+
+            with ThreadPoolExecutor(max_workers=max_workers or len(due)) as pool:
+                futures = {sid: pool.submit(wrap(fetch), sid) for sid in due}
+            errors = []
+            for sid, future in futures.items():
+                try:
+                    series = future.result()
+                except Exception as e:
+                    # 拉取失败时沿用旧缓存 (如果有)
+                    if result[sid].empty:
+                        errors.append(f"{sid}: {e}")
+                    continue
+                if series.empty:
+                    self.touch(sid, now)
+                    continue
+                series.index = pd.to_datetime(series.index)
+                self.save(sid, series, now)
+                result[sid] = series
+            if errors and all(result[sid].empty for sid in series_ids):
+                raise RuntimeError("; ".join(errors))
+            return result
+
+
+def create_client(api_key):
+    """没有 Key 时返回 None (宏观数据一节会提示未配置)；fredapi 只在这里导入"""
+    if not api_key:
+        return None
+    from fredapi import Fred
+
+    return Fred(api_key=api_key)
+
+
+# === 频率感知的变换 ===
+def value_year_ago(series):
+    """按日期回溯一年 (月度/周度通用)，没有足够历史时返回 None"""
+    target = series.index[-1] - pd.DateOffset(years=1)
+    if series.index[0] > target:
+        return None
+    return series.asof(target)
+
+
+def yoy(series):
+    base = value_year_ago(series)
+    if base is None or base == 0:
+        return None
+    return (series.iloc[-1] - base) / base * 100
+
+
+def describe_series(series_id, series):
+    """把一个序列格式化成展示文本 (与语言无关)"""
+    latest_val = series.iloc[-1]
+    freq = SERIES_CALENDAR.get(series_id, ("D", 1))[0]
+
+    if series_id == "A191RL1Q225SBEA":
+        emoji = "🔥" if latest_val >= 3.0 else ("❄️" if latest_val < 1.0 else "⚖️")
+        return f"{latest_val:.2f}% {emoji}"
+    if series_id in ("CPIAUCNS", "PCEPI", "PCEPILFE"):
+        change = yoy(series)
+        return f"{change:.2f}% (YoY)" if change is not None else f"{latest_val:.1f}"
+    if series_id == "PAYEMS":
+        change = latest_val - series.iloc[-2] if len(series) > 1 else 0
+        return f"Total {latest_val:,.0f}k | Change: {change:+,.0f}k"
+    if freq == "W":
+        text = f"{latest_val / 1000:.0f}k"
+        if len(series) >= 4:
+            text += f" | 4wk avg {series.iloc[-4:].mean() / 1000:.0f}k"
+        change = yoy(series)
+        if change is not None:
+            text += f" | {change:+.1f}% YoY"
+        return text
+    return f"{latest_val:.2f}"
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_fred_store():
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = FredSeriesStore()
+        return _store
@@ -0,0 +1,41 @@
+"""Gemini 调用封装 (google.generativeai 在首次使用时才导入)"""
+import time
+
+from .telemetry import external_span
+
+GEMINI_MODEL = 'gemini-3-pro-preview'
+
+
+def create_model(api_key, model_name=GEMINI_MODEL):
+    import google.generativeai as genai
+
+    genai.configure(api_key=api_key.strip(), transport='rest')
+    return genai.GenerativeModel(model_name)
+
+
+def generate_report(model, prompt, stream=True, on_text=None, on_first_chunk=None):
+    """调用 Gemini 生成报告；流式模式下每收到一段就回调 on_text(累计文本)，返回 (报告, 耗时统计)"""
+    started = time.perf_counter()
+    first_chunk_at = None
+    with external_span("gemini", getattr(model, "model_name", GEMINI_MODEL)) as span:
+        if stream:
+            text = ""
+            for chunk in model.generate_content(prompt, stream=True):
+                try:
+                    piece = chunk.text
+                except ValueError:
+                    # 被安全策略拦截或无文本的分片
+                    continue
+                if first_chunk_at is None:
+                    first_chunk_at = time.perf_counter()
+                    if on_first_chunk:
+                        on_first_chunk()
+                text += piece
+                if on_text:
+                    on_text(text)
+        else:
+            text = model.generate_content(prompt).text
+            first_chunk_at = time.perf_counter()
+        span.bytes = len(text.encode("utf-8"))
+    finished = time.perf_counter()
+    return text, {"ttft": (first_chunk_at or finished) - started, "total": finished - started}
@@ -0,0 +1,118 @@
+"""界面文本 (根据语言返回不同的翻译字典)"""
+import functools
+
+
+@functools.lru_cache(maxsize=None)
+def get_translations(lang):
+    """每种语言只构建一次，Streamlit 每次 rerun 不再重建 (调用方只读，不要修改返回的 dict)"""
+    if lang == "CN":
+        return {
+            "title": "📡 美股全景AI雷达",
+            "caption": "Powered by Google Gemini 3.0 Pro & Yahoo Finance | 宏观·广度·情绪·轮动",
+            "sidebar_header": "⚙️ 控制台",
+            "api_input": "Google API Key",
+            "api_help": "即刻申请: https://aistudio.google.com/",
+            "key_user": "✅ 使用您的个人 Key (速度快/隐私)",
+            "key_system": "⚠️ 取消试用模式，请使用自有API key",
+            "key_none": "❌ 未检测到 Key，请先配置",
+            "key_info": "提示：AI模型变更为Gemini3.0 Pro，请使用自有API key。",
+            "start_btn": "🚀 启动全景雷达 (Full Scan)",
+            "traffic_light_title": "🚦 市场全景红绿灯 (Market Traffic Light)",
+            "score": "综合得分 (0-100)",
+            "decision_basis": "📊 决策依据:",
+            "breadth_chart": "📉 查看市场广度与背离图 (鳄鱼嘴监测)",
+            "fred_title": "🔢 官方宏观经济硬数据",
+            "fred_info": "💡 这些是未经调整的官方原始数值，AI 将结合这些数据与市场新闻进行交叉验证。",
+            "ai_processing": "🤖 AI 正在基于全景数据撰写深度内参 (约需 10-20 秒)...",
+            "analysis_done": "✅ 分析完成！",
+            "success_msg": "深度分析报告已生成",
+            "error_gen": "AI 生成失败: ",
+            "tab_macro_topics": "🔍 宏观话题",
+            "tab_macro_data": "🔢 宏观数据 (FRED)",
+            "cache_stats": "🗄️ 数据缓存命中统计",
+            "freshness": "📶 数据新鲜度",
+            "upstream_status": "🚦 上游状态 (限流 / 熔断)",
+            "upstream_caption": "熔断打开 (open) 的上游直接跳过请求，使用上一次成功的缓存数据",
+            "prewarm_on": "后台预热已开启：age 为缓存中最旧一条数据的时长，next_refresh 为距下次刷新",
+            "prewarm_off": "后台预热未开启 (STOCKBOT_PREWARM=0)，数据在扫描时按需抓取",
+            "prewarm_follower": "本机另一个进程负责预热并发布共享快照，扫描时直接读取该快照",
+            "data_age": "🕒 数据时效",
+            "shared_snapshot": "📦 使用本机共享快照 (发布于 {time}，{age} 前)",
+            "scan_diagnostics": "🩺 扫描诊断",
+            "diag_summary": "总耗时 {total:.2f}s | 外部调用 {calls} 次 | 失败 {errors} 次 | 与其他会话合并 {coalesced} 次",
+            "diag_stages": "阶段耗时",
+            "diag_calls": "最慢的外部调用 (高亮前 {n} 名)",
+            "stream_toggle": "⚡ 流式输出报告",
+            "ai_streaming": "✍️ AI 正在输出报告...",
+            "gen_timing": "⏱️ 首字耗时 {ttft:.1f}s | 总生成耗时 {total:.1f}s",
+            "report_cached": "🗄️ 输入数据未变化，复用 {time} 生成的报告 (cached)",
+            "intraday_toggle": "⏱️ 盘中模式 (5分钟K线)",
+            "intraday_help": "开盘期间每隔几分钟用最新 5 分钟K线增量更新红绿灯，不重新下载历史",
+            "intraday_title": "⏱️ 盘中红绿灯",
+            "intraday_caption": "最新K线 {time} | 已累计 {bars} 根 | 每 {every} 分钟自动刷新",
+            "intraday_warmup": "均线窗口尚未填满 (需要 50 根K线)，评分仅供参考",
+            "intraday_empty": "暂无盘中K线数据",
+            "lang_name": "中文",
+            "report_other_lang": "本次扫描的报告只有 {langs} 版本；行情与新闻已按当前语言显示，无需重新扫描。",
+            "regen_report": "📝 用中文生成报告",
+            "prompt_size": "🧮 Prompt 约 {tokens_total} tokens (预算 {budget_tokens} + 模板 {tokens_template})，保留 {headlines_kept} 条新闻，裁剪 {headlines_dropped} 条，去重 {duplicates_removed} 条",
+            "mapreduce_toggle": "🧩 两级生成 (分组并行摘要)",
+            "mapreduce_help": "先并行把每个自选分组、宏观专题和 FRED 数据压缩成摘要，再由摘要生成报告；分组再多也不用裁剪新闻，耗时基本不变",
+            "ai_digesting": "🧩 AI 正在并行整理各分组摘要...",
+            "digest_stats": "🧩 两级生成：{digests} 段摘要耗时 {digest_seconds:.1f}s (复用 {digests_cached} 段，失败 {digests_failed} 段)，原文约 {tokens_sections} tokens 压缩为 {tokens_digests} tokens"
+        }
+    return {
+            "title": "📡 US Market AI Radar",
+            "caption": "Powered by Google Gemini 3.0 Pro & Yahoo Finance | Macro·Breadth·Sentiment·Rotation",
+            "sidebar_header": "⚙️ Control Panel",
+            "api_input": "Google API Key",
+            "api_help": "Get one here: https://aistudio.google.com/",
+            "key_user": "✅ Using your personal Key (Fast/Private)",
+            "key_system": "⚠️ Demo mode disabled, please use own API key",
+            "key_none": "❌ No Key detected, please configure",
+            "key_info": "Note: Model updated to Gemini 3.0 Pro. Please use your own API Key.",
+            "start_btn": "🚀 Start Full Scan",
+            "traffic_light_title": "🚦 Market Traffic Light System",
+            "score": "Composite Score (0-100)",
+            "decision_basis": "📊 Decision Basis:",
+            "breadth_chart": "📉 View Market Breadth & Divergence Chart",
+            "fred_title": "🔢 Official Macro Hard Data",
+            "fred_info": "💡 These are raw official figures. AI will cross-validate them with market news.",
+            "ai_processing": "🤖 AI is generating the Deep Dive Report (approx 10-20s)...",
+            "analysis_done": "✅ Analysis Complete!",
+            "success_msg": "Deep Dive Report Generated",
+            "error_gen": "AI Generation Failed: ",
+            "tab_macro_topics": "🔍 Macro Topics",
+            "tab_macro_data": "🔢 Macro Data (FRED)",
+            "cache_stats": "🗄️ Data Cache Stats",
+            "freshness": "📶 Data Freshness",
+            "upstream_status": "🚦 Upstream Status (rate limit / circuit breaker)",
+            "upstream_caption": "Upstreams with an open circuit are skipped; the last successful cached data is used instead",
+            "prewarm_on": "Background pre-warming is on: age is the oldest cached item, next_refresh is time until the next refresh",
+            "prewarm_off": "Background pre-warming is off (STOCKBOT_PREWARM=0); data is fetched on demand during a scan",
+            "prewarm_follower": "Another process on this host pre-warms and publishes the shared snapshot; scans read it directly",
+            "data_age": "🕒 Data age",
+            "shared_snapshot": "📦 Using this host's shared snapshot (published {time}, {age} ago)",
+            "scan_diagnostics": "🩺 Scan Diagnostics",
+            "diag_summary": "Total {total:.2f}s | {calls} external calls | {errors} failed | {coalesced} shared with other sessions",
+            "diag_stages": "Stage timings",
+            "diag_calls": "Slowest external calls (top {n} highlighted)",
+            "stream_toggle": "⚡ Stream report output",
+            "ai_streaming": "✍️ AI is writing the report...",
+            "gen_timing": "⏱️ Time to first token {ttft:.1f}s | Total generation {total:.1f}s",
+            "report_cached": "🗄️ Inputs unchanged, reusing report generated at {time} (cached)",
+            "intraday_toggle": "⏱️ Intraday mode (5m bars)",
+            "intraday_help": "During the session, update the traffic light from the latest 5-minute bars every few minutes without re-downloading history",
+            "intraday_title": "⏱️ Intraday Traffic Light",
+            "intraday_caption": "Last bar {time} | {bars} bars | auto-refresh every {every} min",
+            "intraday_warmup": "Moving-average windows not yet full (50 bars needed); score is indicative only",
+            "intraday_empty": "No intraday bars yet",
+            "lang_name": "English",
+            "report_other_lang": "The report for this scan is only available in {langs}; market data and news are shown in the current language without rescanning.",
+            "regen_report": "📝 Generate report in English",
+            "prompt_size": "🧮 Prompt ≈ {tokens_total} tokens (budget {budget_tokens} + template {tokens_template}); kept {headlines_kept} headlines, trimmed {headlines_dropped}, deduplicated {duplicates_removed}",
+            "mapreduce_toggle": "🧩 Two-stage report (parallel group digests)",
+            "mapreduce_help": "Condense each watchlist group, the macro topics and the FRED data into digests in parallel, then write the report from the digests; no headlines are trimmed and latency stays flat as groups grow",
+            "ai_digesting": "🧩 AI is digesting each group in parallel...",
+            "digest_stats": "🧩 Two-stage: {digests} digests in {digest_seconds:.1f}s ({digests_cached} reused, {digests_failed} failed); ~{tokens_sections} raw tokens condensed to {tokens_digests}"
+        }
@@ -0,0 +1,193 @@
+"""盘中模式：5 分钟K线上的红绿灯，均线用增量滑动和维护，每根新K线 O(1) 更新
+
+日线模式每次都对一年的宽表重新 rolling；盘中模式只在启动时拉一次最近几天的K线做种子，
+之后每次刷新只取当天的K线，把比上次更新的几根推进状态：
+  * SPY 50 根均线、RSP/SPY 20 根均线、进攻/防御比 20 根均线 -> RollingMean (滑动和)
+  * VIX 直接取最新值套用 15 / 25 的区间
+评分规则和文案与 MarketRadarSystem.score_inputs 完全共用。
+
+    python -m stockbot.intraday --lang EN --loop 300
+"""
+import argparse
+import math
+import threading
+import time
+from collections import deque
+
+import pandas as pd
+
+from . import settings
+from .radar import MarketRadarSystem
+from .resilience import upstream
+from .store import is_market_open
+from .telemetry import external_span
+
+TICKERS = ['SPY', 'RSP', '^VIX', 'XLK', 'XLI', 'XLU', 'XLP']
+
+
+class RollingMean:
+    """定长窗口的滑动均值：push / revise 都是 O(1)
+
+    每推入 RESUM_EVERY 个窗口长度的数据后用 math.fsum 重算一次和，消除浮点累加误差 (均摊 O(1))
+    """
+    RESUM_EVERY = 100
+
+    def __init__(self, window):
+        self.window = window
+        self.values = deque()
+        self.total = 0.0
+        self._pushes = 0
+
+    def push(self, x):
+        self.values.append(x)
+        self.total += x
+        if len(self.values) > self.window:
+            self.total -= self.values.popleft()
+        self._pushes += 1
+        if self._pushes % (self.window * self.RESUM_EVERY) == 0:
+            self.total = math.fsum(self.values)
+
+    def revise(self, x):
+        """改写最后一个值 (还没走完的K线价格变了)"""
+        self.total += x - self.values[-1]
+        self.values[-1] = x
+
+    @property
+    def value(self):
+        return self.total / self.window if len(self.values) == self.window else math.nan
+
+
+class IntradayState:
+    """盘中评分状态 (与语言无关)；update() 每根K线 O(1)，traffic_light() 按语言出结果"""
+
+    def __init__(self, interval=None):
+        self.interval = interval or settings.INTRADAY_INTERVAL
+        self.spy_ma50 = RollingMean(50)
+        self.breadth_ma20 = RollingMean(20)
+        self.od_ma20 = RollingMean(20)
+        self.last = {}
+        self.last_ts = None
+        self.bars = 0
+        self.fetched_at = None
+        self._lock = threading.Lock()
+
+    def update(self, ts, closes):
+        """推入一根K线 {ticker: close}；与上一根时间相同则视为同一根K线的更新，更早的直接忽略"""
+        if self.last_ts is not None and ts < self.last_ts:
+            return False
+        # 个别 ticker 这一根没有成交时沿用它上一根的价格
+        self.last.update({t: float(v) for t, v in closes.items() if v == v})
+        last = self.last
+        if 'SPY' not in last:
+            return False
+        values = [(self.spy_ma50, last['SPY'])]
+        if 'RSP' in last:
+            values.append((self.breadth_ma20, last['RSP'] / last['SPY']))
+        if all(t in last for t in ['XLK', 'XLI', 'XLU', 'XLP']):
+            values.append((self.od_ma20, ((last['XLK'] + last['XLI']) / 2) / ((last['XLU'] + last['XLP']) / 2)))
+
+        new_bar = self.last_ts is None or ts > self.last_ts
+        for rolling, x in values:
+            if new_bar or not rolling.values:
+                rolling.push(x)
+            else:
+                rolling.revise(x)
+        if new_bar:
+            self.bars += 1
+        self.last_ts = ts
+        return True
+
+    def feed(self, bars):
+        """bars: index=时间、columns=ticker 的收盘价表；只推进 last_ts 及之后的K线"""
+        if self.last_ts is not None:
+            bars = bars[bars.index >= self.last_ts]
+        for ts, row in zip(bars.index, bars.to_dict("records")):
+            self.update(ts, row)
+
+    def inputs(self):
+        last = self.last
+        return {
+            "spy": last.get('SPY', math.nan),
+            "spy_ma50": self.spy_ma50.value,
+            "breadth": self.breadth_ma20.values[-1] if self.breadth_ma20.values else None,
+            "breadth_ma20": self.breadth_ma20.value,
+            "offense_defense": self.od_ma20.values[-1] if self.od_ma20.values else None,
+            "od_ma20": self.od_ma20.value,
+            "vix": last.get('^VIX'),
+        }
+
+    def traffic_light(self, lang="CN", constituents=None):
+        """与日线同一套规则打分；还没有任何K线时返回 None"""
+        with self._lock:
+            if 'SPY' not in self.last:
+                return None
+            result = MarketRadarSystem(lang=lang).score_inputs(self.inputs(), constituents, bar=self.interval)
+            result.update(bar_time=self.last_ts, bars=self.bars, warm=len(self.spy_ma50.values) == self.spy_ma50.window)
+            return result
+
+    # --- 数据 ---
+    def refresh(self, force=False):
+        """拉取新K线并推进状态：首次用最近几天做种子，之后只取当天；休市时不再请求"""
+        with self._lock:
+            if self.last_ts is not None and not force:
+                if not is_market_open() or time.time() - self.fetched_at < settings.INTRADAY_MIN_FETCH_SECONDS:
+                    return self
+            period = "1d" if self.last_ts is not None else settings.INTRADAY_SEED_PERIOD
+            self.feed(_download_bars(period, self.interval))
+            self.fetched_at = time.time()
+        return self
+
+
+def _download_bars(period, interval):
+    import yfinance as yf  # 导入较慢，只在真正需要下载时加载
+
+    def download():
+        with external_span("yahoo", f"intraday x{len(TICKERS)} {period}/{interval}") as span:
+            raw = yf.download(TICKERS, period=period, interval=interval, auto_adjust=True,
+                              threads=True, progress=False, multi_level_index=True)
+            span.frame_bytes = int(raw.memory_usage(deep=True).sum()) if raw is not None else 0
+        return raw
+
+    raw = upstream("yahoo").call(download)
+    if raw is None or raw.empty:
+        return pd.DataFrame(columns=TICKERS)
+    closes = raw['Close'].dropna(how="all")
+    closes.columns.name = None
+    return closes
+
+
+_state = None
+_state_lock = threading.Lock()
+
+
+def get_intraday_state():
+    """进程级单例：所有会话共享同一份盘中状态"""
+    global _state
+    with _state_lock:
+        if _state is None:
+            _state = IntradayState()
+        return _state
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Intraday traffic light on incremental rolling state")
+    parser.add_argument("--lang", choices=["CN", "EN"], default="CN")
+    parser.add_argument("--loop", type=int, default=0, help="refresh every N seconds (0 = once)")
+    args = parser.parse_args(argv)
+
+    state = get_intraday_state()
+    while True:
+        result = state.refresh().traffic_light(args.lang)
+        if result is None:
+            print("no intraday bars")
+        else:
+            print(f"[{result['bar_time']}] {result['status']} score={result['score']} bars={result['bars']}")
+            for reason in result["reasons"]:
+                print(f"  {reason}")
+        if not args.loop:
+            return 0
+        time.sleep(args.loop)
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
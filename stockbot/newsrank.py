@@ -0,0 +1,136 @@
+"""新闻后处理：跨查询合并近似重复标题 (MinHash + LSH)，再按相关度排序
+
+同一条通稿会以略有不同的标题出现在多个查询里 ("... - Reuters" / "... - Yahoo Finance"，
+或多一两个词)。这里把标题去掉来源后缀 (按 get_news 记下的 source)、切成词 2-gram，用 MinHash 签名 + LSH 分桶找候选对，
+再用精确 Jaccard 相似度确认，并查集合并成簇；每簇只保留一条代表标题，
+同时记下它涉及的全部 ticker / 话题。
+
+簇的得分 = 新鲜度 (按 NEWS_HALF_LIFE_HOURS 半衰) + 在查询结果里的位置 + 涉及的 ticker/话题数，
+PromptBuilder 按得分保留前 K 条并在超出 token 预算时从最低分开始丢。
+"""
+import itertools
+import math
+import re
+import time
+import zlib
+
+import numpy as np
+
+NUM_PERM = 64
+BANDS = 32                     # 32 段 x 2 行：Jaccard 0.5 的一对几乎必然进入同一个桶
+SIMILARITY = 0.5               # 候选对的精确 Jaccard 阈值
+NEWS_HALF_LIFE_HOURS = 24
+UNKNOWN_AGE_HOURS = 72         # 没有发布时间的新闻按 3 天前处理
+
+_PRIME = (1 << 31) - 1
+_WORD = re.compile(r"[0-9a-z一-鿿]+")
+_SEPARATORS = "-|–—"
+# 没有来源字段时的兜底：只认 1~5 个首字母大写 (或中文) 的词，不误删 " - what it means for bonds" 这类正文
+_SOURCE_SUFFIX = re.compile(r"\s+[-|–—]\s+[A-Z0-9一-鿿][\w.&'’]*(?:\s+[A-Z0-9一-鿿][\w.&'’]*){0,4}$")
+
+_rng = np.random.default_rng(20240601)
+_A = _rng.integers(1, _PRIME, NUM_PERM, dtype=np.uint64)
+_B = _rng.integers(0, _PRIME, NUM_PERM, dtype=np.uint64)
+
+
+def strip_source(title, source=None):
+    """去掉 Google News 标题末尾的 " - 来源"：优先按 get_news 记下的 source 精确去掉"""
+    title = title.strip()
+    if source:
+        head, sep, tail = title.rpartition(source.strip())
+        if sep and not tail.strip() and head.rstrip()[-1:] in _SEPARATORS:
+            return head.rstrip()[:-1].rstrip()
+        return title
+    return _SOURCE_SUFFIX.sub("", title)
+
+
+def normalize_title(title, source=None):
+    """去掉来源后缀、转小写，只保留字母数字词"""
+    return " ".join(_WORD.findall(strip_source(title, source).lower()))
+
+
+def shingles(title, k=2, source=None):
+    words = normalize_title(title, source).split()
+    if len(words) < k:
+        return {" ".join(words)}
+    return {" ".join(words[i:i + k]) for i in range(len(words) - k + 1)}
+
+
+def minhash(shingle_sets):
+    """(n, NUM_PERM) 签名矩阵；所有 shingle 一次性向量化哈希，按所属标题 reduceat 取最小值"""
+    sizes = [len(s) for s in shingle_sets]
+    hashes = np.fromiter((zlib.crc32(s.encode()) % _PRIME for group in shingle_sets for s in group),
+                         dtype=np.uint64, count=sum(sizes))
+    values = (np.outer(hashes, _A) + _B) % _PRIME
+    starts = np.concatenate([[0], np.cumsum(sizes)[:-1]]).astype(np.intp)
+    return np.minimum.reduceat(values, starts, axis=0)
+
+
+def _find(parent, i):
+    while parent[i] != i:
+        parent[i] = parent[parent[i]]
+        i = parent[i]
+    return i
+
+
+def cluster(titles, sources=None):
+    """近似重复标题分簇，返回 [[下标, ...], ...] (按每簇第一次出现的位置排序)；sources 与 titles 一一对应"""
+    if not titles:
+        return []
+    sources = sources or [None] * len(titles)
+    sets = [shingles(t, source=src) for t, src in zip(titles, sources)]
+    signatures = minhash(sets)
+    rows = NUM_PERM // BANDS
+    parent = list(range(len(titles)))
+    checked = set()
+    for band in range(BANDS):
+        buckets = {}
+        for i, key in enumerate(map(bytes, signatures[:, band * rows:(band + 1) * rows])):
+            buckets.setdefault(key, []).append(i)
+        for members in buckets.values():
+            # 桶内两两比较 (桶很小)：只和第一个比会漏掉 [a, b, c] 中 b ~ c 而 a 与二者都不像的情况
+            for i, j in itertools.combinations(members, 2):
+                if (i, j) in checked:
+                    continue
+                checked.add((i, j))
+                union = len(sets[i] | sets[j])
+                if union and len(sets[i] & sets[j]) / union >= SIMILARITY:
+                    parent[_find(parent, j)] = _find(parent, i)
+
+    clusters = {}
+    for i in range(len(titles)):
+        clusters.setdefault(_find(parent, i), []).append(i)
+    return sorted(clusters.values(), key=lambda members: members[0])
+
+
+def recency(published, now=None):
+    age_hours = UNKNOWN_AGE_HOURS if not published else max(0.0, ((now or time.time()) - published) / 3600)
+    return math.pow(0.5, age_hours / NEWS_HALF_LIFE_HOURS)
+
+
+def rank_headlines(headlines, now=None):
+    """headlines: [{kind, group, key, rank, title, published, source}] -> (按得分降序的簇列表, 被合并掉的条数)
+
+    每个簇：代表标题取得分最高的成员；keys 为涉及的全部 ticker / 话题 (个股在前)，
+    有个股成员时归到该个股的分组下，否则算宏观话题。
+    """
+    now = now or time.time()
+    ranked = []
+    for members in cluster([h["title"] for h in headlines], [h.get("source") for h in headlines]):
+        items = [headlines[i] for i in members]
+        base = [recency(h.get("published"), now) + 0.5 / (1 + h["rank"]) for h in items]
+        best = items[max(range(len(items)), key=base.__getitem__)]
+        assets = [h for h in items if h["kind"] == "asset"]
+        keys = list(dict.fromkeys([h["key"] for h in assets] + [h["key"] for h in items if h["kind"] == "topic"]))
+        owner = assets[0] if assets else best
+        ranked.append({
+            "kind": owner["kind"],
+            "group": owner["group"],
+            "keys": keys,
+            "title": best["title"],
+            "published": best.get("published"),
+            "score": max(base) + 0.3 * (min(len(keys), 4) - 1),
+            "order": members[0],
+        })
+    ranked.sort(key=lambda c: (-c["score"], c["order"]))
+    return ranked, len(headlines) - len(ranked)
@@ -0,0 +1,393 @@
+"""扫描流水线：雷达 -> 恐贪 -> 广度 -> FRED -> 报价/新闻 -> Prompt (或分段摘要) -> 报告
+
+Streamlit 页面和无头 CLI 共用这里的步骤函数；每一步只返回数据 (dict / DataFrame)，
+不做任何渲染，调用方可以在步骤之间自行展示进度。run_scan() 把全部步骤串起来，
+返回可直接写成 JSON 的结果。本模块不导入 streamlit / matplotlib。
+"""
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from . import settings, shared
+from .breadth import scan_breadth
+from .fred import create_client
+from .gemini import GEMINI_MODEL, create_model, generate_report
+from .prompt import PromptBuilder, estimate_tokens
+from .radar import MarketRadarSystem, analyze_market_breadth
+from .reports import get_or_generate_report, report_key
+from .sources import NewsBatch, get_cnn_fear_and_greed, get_macro_hard_data, get_watchlist_quotes
+from .store import is_market_open
+from .telemetry import ScanTimer, start_scan, wrap
+from .templates import build_digest_prompt, build_prompt
+from .watchlist import SPECIAL_TOPICS, get_watchlist_groups
+
+logger = logging.getLogger(__name__)
+
+
+# === 步骤 ===
+def scan_market(lang, timer, cold_breadth=False):
+    """红绿灯评分 (含成分股参与度)、CNN 恐贪指数与 RSP/SPY 广度
+
+    cold_breadth=False 时不做成分股面板的冷启动 (交互扫描；冷启动交给预热或 CLI)
+    """
+    with timer.stage("radar"):
+        data = MarketRadarSystem(lang=lang).get_data()
+    with timer.stage("constituent_breadth"):
+        constituents = scan_breadth(cold_start=cold_breadth)
+    market = market_view(lang, data, None, None, None, constituents)
+    with timer.stage("fear_greed"):
+        market["fear_greed"] = get_cnn_fear_and_greed()
+    with timer.stage("breadth"):
+        market["breadth"], market["breadth_signal"] = analyze_market_breadth()
+    return market
+
+
+def market_view(lang, data, fear_greed, breadth, breadth_signal, constituents=None):
+    """由行情数据生成某种语言的红绿灯结果 (纯本地计算，不访问网络)"""
+    radar = MarketRadarSystem(lang=lang)
+    traffic_light = radar.analyze_traffic_light(data, constituents)
+    return {
+        "radar": radar,
+        "data": data,
+        "traffic_light": {k: v for k, v in traffic_light.items() if k != "sector_data"},
+        "sector_perf": radar.sector_performance(data),
+        "fear_greed": fear_greed,
+        "breadth": breadth,
+        "breadth_signal": breadth_signal,
+        "constituents": constituents or {},
+    }
+
+
+def scan_macro(lang, fred_client, timer):
+    with timer.stage("fred"):
+        return get_macro_hard_data(fred_client, lang=lang)
+
+
+def watchlist_assets(groups):
+    """[(group, ticker, info)]，顺序即新闻批次里资产查询的顺序"""
+    return [(group, ticker, info) for group, items in groups.items() for ticker, info in items.items()]
+
+
+def news_queries(groups):
+    """全部资产新闻 + 宏观话题的查询 (前 len(assets) 条为资产)"""
+    return [info[1] for _, _, info in watchlist_assets(groups)] + SPECIAL_TOPICS
+
+
+def start_news(groups):
+    """立即在后台开始抓取全部新闻查询，可与其他步骤并行"""
+    return NewsBatch(news_queries(groups))
+
+
+def fetch_quotes(groups, timer):
+    """一次批量请求拿到全部报价，Tab 渲染和 Prompt 共用这张表"""
+    with timer.stage("quotes"):
+        return get_watchlist_quotes([t for items in groups.values() for t in items])
+
+
+def iter_news(batch, n_assets, timer):
+    """按完成顺序产出 (idx, query, news)；资产新闻与话题新闻各自记录 "从开始到最后一条完成" 的耗时"""
+    last_done = {"news_assets": batch.started, "news_topics": batch.started}
+    for idx, query, news in batch.as_completed():
+        last_done["news_assets" if idx < n_assets else "news_topics"] = time.perf_counter()
+        yield idx, query, news
+    for name, finished in last_done.items():
+        timer.add(name, batch.started, finished - batch.started)
+
+
+def asset_row(group, ticker, info, quotes, news):
+    error = quotes.at[ticker, "error"]
+    return {
+        "group": group, "ticker": ticker, "name": info[0],
+        "price": _num(quotes.at[ticker, "price"]),
+        "change_pct": _num(quotes.at[ticker, "change_pct"]),
+        "error": error if isinstance(error, str) else None,
+        "news": news,
+    }
+
+
+def scan_watchlist(lang, timer, on_news=None, batch=None):
+    """批量报价 + 资产/话题新闻并发抓取；on_news(done, total, query) 按完成顺序回调
+
+    batch 为 start_news() 提前开始的新闻批次 (不传则在这里开始)
+    """
+    groups = get_watchlist_groups(lang)
+    assets = watchlist_assets(groups)
+    batch = batch or start_news(groups)
+    quotes = fetch_quotes(groups, timer)
+
+    for done, (idx, query, news) in enumerate(iter_news(batch, len(assets), timer), 1):
+        if on_news:
+            on_news(done, len(batch.queries), query)
+
+    return build_watch(groups, quotes, batch.results)
+
+
+def build_watch(groups, quotes, all_news):
+    """把报价和按输入顺序排列的新闻结果整理成 {"groups", "quotes", "assets", "topics"}"""
+    assets = watchlist_assets(groups)
+    asset_rows = [asset_row(group, ticker, info, quotes, news)
+                  for (group, ticker, info), news in zip(assets, all_news[:len(assets)])]
+    topics = [{"topic": topic, "news": news} for topic, news in zip(SPECIAL_TOPICS, all_news[len(assets):])]
+    return {"groups": groups, "quotes": quotes, "assets": asset_rows, "topics": topics}
+
+
+def assemble_prompt(lang, today_date, market, macro_hard_data, watch, timer):
+    """先量出模板本身的开销，剩余预算留给行情+新闻；返回 (prompt, market_data, 统计)"""
+    with timer.stage("prompt_build"):
+        builder = PromptBuilder()
+        for row in watch["assets"]:
+            builder.add_asset(row["group"], row["ticker"], row["name"], row["price"], row["change_pct"], row["news"])
+        for topic in watch["topics"]:
+            if topic["news"]:
+                builder.add_topic(topic["topic"], topic["news"])
+
+        args = (lang, today_date, market["traffic_light"], market["fear_greed"], market["breadth_signal"],
+                macro_hard_data)
+        overhead = estimate_tokens(build_prompt(*args, ""))
+        market_data, prompt_stats = builder.build(settings.PROMPT_TOKEN_BUDGET - overhead)
+        prompt = build_prompt(*args, market_data)
+    prompt_stats.update(tokens_template=overhead, tokens_total=estimate_tokens(prompt))
+    logger.info("prompt size: %s", prompt_stats)
+    return prompt, market_data, prompt_stats
+
+
+# === 两级生成 (map-reduce) ===
+def digest_sections(watch, macro_hard_data):
+    """第一级的输入：[(kind, 名称, 原文)]，每个分组一段 + 宏观专题 + FRED；返回 (段落, 统计)"""
+    builder = PromptBuilder()
+    for row in watch["assets"]:
+        builder.add_asset(row["group"], row["ticker"], row["name"], row["price"], row["change_pct"], row["news"])
+    for topic in watch["topics"]:
+        if topic["news"]:
+            builder.add_topic(topic["topic"], topic["news"])
+    groups, topic_text, stats = builder.sections()
+    sections = [("group", group, text) for group, text in groups.items() if text]
+    if topic_text:
+        sections.append(("topics", "Macro Topics", topic_text))
+    if macro_hard_data:
+        sections.append(("macro", "FRED", macro_hard_data))
+    stats["tokens_sections"] += estimate_tokens(macro_hard_data or "")
+    return sections, stats
+
+
+def write_digests(model, lang, today_date, sections, timer, model_name=GEMINI_MODEL):
+    """并行把每段压缩成摘要，返回与 sections 同序的 [(kind, 名称, 摘要, source)]
+
+    每段按自己的 Prompt 单独缓存：没变的分组直接复用上次的摘要；某段失败时退回原文，不拖垮整份报告。
+    """
+    def digest(kind, name, content):
+        prompt = build_digest_prompt(lang, today_date, kind, name, content)
+        key = report_key(model_name, lang, kind="digest", prompt=prompt)
+        try:
+            entry, source = get_or_generate_report(
+                key, lambda: generate_report(model, prompt, stream=False), cache_name="digest")
+            return kind, name, entry["text"].strip(), source
+        except Exception as e:
+            logger.warning("digest %s/%s failed, using raw section: %s", kind, name, e)
+            return kind, name, content, "raw"
+
+    with timer.stage("digests"):
+        if not sections:
+            return []
+        with ThreadPoolExecutor(max_workers=min(settings.DIGEST_MAX_WORKERS, len(sections))) as pool:
+            futures = [pool.submit(wrap(digest), *section) for section in sections]
+            return [f.result() for f in futures]
+
+
+def assemble_digest_prompt(model, lang, today_date, market, macro_hard_data, watch, timer, model_name=GEMINI_MODEL):
+    """两级生成：最终 Prompt 只带各段摘要 + 红绿灯 + 恐贪 + 广度，长度与分组数基本无关
+
+    返回 (prompt, market_data, macro_digest, 统计)；market_data / macro_digest 用于 report_cache_key
+    """
+    started = time.perf_counter()
+    sections, prompt_stats = digest_sections(watch, macro_hard_data)
+    digests = write_digests(model, lang, today_date, sections, timer, model_name)
+    map_seconds = time.perf_counter() - started
+
+    with timer.stage("prompt_build"):
+        macro_digest = next((text for kind, _, text, _ in digests if kind == "macro"), macro_hard_data)
+        market_data = "\n\n".join(f"=== [{name}] ===\n{text}" for kind, name, text, _ in digests if kind != "macro")
+        args = (lang, today_date, market["traffic_light"], market["fear_greed"], market["breadth_signal"], macro_digest)
+        overhead = estimate_tokens(build_prompt(*args, ""))
+        prompt = build_prompt(*args, market_data)
+    prompt_stats.update(
+        tokens_template=overhead,
+        tokens_total=estimate_tokens(prompt),
+        budget_tokens=settings.PROMPT_TOKEN_BUDGET - overhead,
+        digests=len(digests),
+        digests_cached=sum(1 for *_, source in digests if source != "fresh"),
+        digests_failed=sum(1 for *_, source in digests if source == "raw"),
+        tokens_digests=sum(estimate_tokens(text) for _, _, text, _ in digests),
+        digest_seconds=round(map_seconds, 3),
+    )
+    logger.info("digest prompt size: %s", prompt_stats)
+    return prompt, market_data, macro_digest, prompt_stats
+
+
+def digest_model(api_key):
+    """第一级用的模型 (STOCKBOT_DIGEST_MODEL，留空时与报告同一个模型)；返回 (model, model_name)"""
+    name = settings.DIGEST_MODEL or GEMINI_MODEL
+    return create_model(api_key, name), name
+
+
+# === 与语言无关的扫描结果 ===
+def scan_snapshot(today_date, market, quotes, all_news):
+    """只保留与语言无关的数据：行情、恐贪、广度、报价和按查询顺序排列的新闻
+
+    标签 (分组名、资产名、红绿灯理由) 由 localize() 按当前语言重新生成；
+    FRED 文本和报告本身跟语言绑定，按语言存在 "macro" / "reports" 里，缺哪种语言再补。
+    """
+    return {
+        "date": today_date,
+        "data": market["data"],
+        "fear_greed": market["fear_greed"],
+        "breadth": market["breadth"],
+        "breadth_signal": market["breadth_signal"],
+        "constituents": market["constituents"],
+        "quotes": quotes,
+        "news": list(all_news),
+        "macro": {},
+        "reports": {},
+    }
+
+
+# === 多进程共享快照 ===
+def collect_snapshot(lang="CN"):
+    """不渲染地取齐一份扫描快照 (预热之后基本全部命中缓存)，用于发布到共享快照"""
+    timer = ScanTimer("snapshot")
+    groups = get_watchlist_groups(lang)
+    batch = start_news(groups)
+    market = scan_market(lang, timer)
+    quotes = fetch_quotes(groups, timer)
+    for _ in batch.as_completed():
+        pass
+    return scan_snapshot(datetime.now().strftime('%Y-%m-%d'), market, quotes, batch.results)
+
+
+def publish_scan(scan, lang):
+    """发布给同一台机器上的其他进程；失败只记日志，不影响本次扫描"""
+    if not settings.SHARED_SNAPSHOT:
+        return None
+    try:
+        return shared.publish(scan, news_queries(get_watchlist_groups(lang)))
+    except Exception as e:
+        logger.warning("publish shared snapshot failed: %s", e)
+        return None
+
+
+def shared_scan(lang):
+    """别的进程刚发布过今天的快照时直接映射读取 (不访问网络)；没有或太旧时返回 None"""
+    if not settings.SHARED_SNAPSHOT:
+        return None
+    try:
+        snapshot = shared.load()
+    except Exception as e:
+        logger.warning("shared snapshot unreadable: %s", e)
+        return None
+    max_age = settings.SHARED_SNAPSHOT_MAX_AGE[0 if is_market_open() else 1]
+    if snapshot is None or snapshot.age() > max_age or snapshot.meta["date"] != datetime.now().strftime('%Y-%m-%d'):
+        return None
+    return snapshot.as_scan(news_queries(get_watchlist_groups(lang)))
+
+
+def localize(snapshot, lang):
+    """把快照渲染成某种语言的 (market, watch)，只做本地计算"""
+    market = market_view(lang, snapshot["data"], snapshot["fear_greed"], snapshot["breadth"],
+                         snapshot["breadth_signal"], snapshot["constituents"])
+    watch = build_watch(get_watchlist_groups(lang), snapshot["quotes"], snapshot["news"])
+    return market, watch
+
+
+def report_cache_key(lang, today_date, market, macro_hard_data, market_data, model_name=GEMINI_MODEL):
+    """输入完全相同 (且在缓存窗口内) 时直接复用报告"""
+    return report_key(
+        model_name, lang,
+        date=today_date,
+        radar_result=market["traffic_light"],
+        fng_score=market["fear_greed"], breadth_signal=market["breadth_signal"],
+        macro_hard_data=macro_hard_data, market_data=market_data,
+    )
+
+
+def write_report(model, prompt, cache_key, timer, stream=False, on_text=None, on_first_chunk=None):
+    """返回 (entry, source)；并发的相同请求只调用一次 Gemini"""
+    def generate():
+        return generate_report(model, prompt, stream=stream, on_text=on_text, on_first_chunk=on_first_chunk)
+
+    with timer.stage("generation"):
+        return get_or_generate_report(cache_key, generate)
+
+
+# === 整条流水线 (无头模式) ===
+def run_scan(lang="CN", gemini_api_key=None, fred_api_key=None, with_report=True, on_status=None,
+             report_mode=None):
+    """跑一次完整扫描，返回可 JSON 序列化的结果 dict；report_mode 为 single / mapreduce (默认 REPORT_MODE)"""
+    report_mode = report_mode or settings.REPORT_MODE
+    status = on_status or (lambda text: None)
+    timer = start_scan(f"headless-{lang}")
+    today_date = datetime.now().strftime('%Y-%m-%d')
+
+    # 新闻最慢，先在后台开始抓，与雷达/FRED 并行
+    batch = start_news(get_watchlist_groups(lang))
+    status("radar")
+    market = scan_market(lang, timer, cold_breadth=True)
+    status("fred")
+    macro_hard_data = scan_macro(lang, create_client(fred_api_key), timer)
+    status("watchlist")
+    watch = scan_watchlist(lang, timer, batch=batch)
+    # 两级生成要先调模型出摘要，没有 Key 或不生成报告时仍按单次方式拼 Prompt (只用于统计)
+    mapreduce = bool(report_mode == "mapreduce" and with_report and gemini_api_key)
+    if mapreduce:
+        prompt_stats = {}
+    else:
+        prompt, market_data, prompt_stats = assemble_prompt(lang, today_date, market, macro_hard_data, watch, timer)
+
+    report, report_error = None, None
+    if with_report:
+        status("report")
+        if not gemini_api_key:
+            report_error = "Gemini API key missing"
+        else:
+            try:
+                report_macro = macro_hard_data
+                if mapreduce:
+                    status("digests")
+                    model, model_name = digest_model(gemini_api_key)
+                    prompt, market_data, report_macro, prompt_stats = assemble_digest_prompt(
+                        model, lang, today_date, market, macro_hard_data, watch, timer, model_name)
+                cache_key = report_cache_key(lang, today_date, market, report_macro, market_data)
+                entry, source = write_report(create_model(gemini_api_key), prompt, cache_key, timer)
+                report = {**entry, "source": source}
+            except Exception as e:
+                logger.exception("report generation failed")
+                report_error = f"{type(e).__name__}: {e}"
+    timer.finish()
+
+    return {
+        "lang": lang,
+        "date": today_date,
+        "generated_at": datetime.now().isoformat(timespec="seconds"),
+        "traffic_light": market["traffic_light"],
+        "sector_perf_20d": market["sector_perf"],
+        "fear_greed": market["fear_greed"],
+        "breadth_signal": market["breadth_signal"],
+        "constituent_breadth": market["constituents"],
+        "macro_hard_data": macro_hard_data,
+        "assets": watch["assets"],
+        "topics": watch["topics"],
+        "report_mode": "mapreduce" if mapreduce else "single",
+        "prompt_stats": prompt_stats,
+        "report": report,
+        "report_error": report_error,
+        "diagnostics": timer.as_dict(),
+    }
+
+
+def _num(value):
+    """pandas 的 NaN / numpy 标量 -> float 或 None，便于 JSON 输出"""
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return None
+    return None if value != value else value
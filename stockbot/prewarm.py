@@ -0,0 +1,177 @@
+"""后台预热：按固定间隔把各数据源提前写进进程级缓存
+
+用户点击扫描时，雷达行情、成分股广度、报价、新闻、恐贪指数和 FRED 基本都已在缓存里，
+一次扫描只剩本地读取 + Gemini 调用。刷新间隔按美股开盘/休市区分
+(settings.PREWARM_INTERVALS)，休市期间的长间隔不会跨过下一次开盘。
+预热写入的条目有效期为 2 倍刷新间隔，因此两次刷新之间缓存不会过期。
+开启共享快照时，同一台机器上只有拿到发布锁的进程预热，并在每轮之后把快照发布给其他进程 (stockbot.shared)。
+数据源模块 (yfinance / feedparser / fredapi) 在预热线程里才导入，不拖慢页面首次加载。
+"""
+import logging
+import threading
+import time
+
+from . import settings
+from .store import is_market_open, next_market_open
+from .watchlist import SPECIAL_TOPICS, get_watchlist_groups
+
+logger = logging.getLogger(__name__)
+
+LANGS = ("CN", "EN")
+# 任务失败后的重试间隔上限 (秒)
+RETRY_SECONDS = 120
+
+
+def _watchlist_inputs():
+    """两种语言的报价 ticker 列表 (去重) 与全部新闻查询"""
+    ticker_lists, queries = [], []
+    for lang in LANGS:
+        groups = get_watchlist_groups(lang)
+        tickers = [t for items in groups.values() for t in items]
+        if tickers not in ticker_lists:
+            ticker_lists.append(tickers)
+        queries += [info[1] for items in groups.values() for info in items.values()]
+    return ticker_lists, list(dict.fromkeys(queries + SPECIAL_TOPICS))
+
+
+class Prewarmer:
+    def __init__(self, fred_api_key=None, intervals=None):
+        self.fred_api_key = fred_api_key
+        self._fred_client = None
+        self.intervals = intervals or settings.PREWARM_INTERVALS
+        self.jobs = {
+            "radar": self._radar,
+            "quotes": self._quotes,
+            "news": self._news,
+            "fear_greed": self._fear_greed,
+        }
+        if settings.BREADTH_INDEXES:
+            self.jobs["breadth"] = self._breadth
+        if fred_api_key:
+            self.jobs["fred"] = self._fred
+        if settings.SHARED_SNAPSHOT:
+            # 放在最后：启动时其余任务都跑完再发布
+            self.jobs["snapshot"] = self._snapshot
+        self.status = {name: {"last_run": None, "seconds": None, "ok": None, "error": None, "next_run": 0.0}
+                       for name in self.jobs}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._loop, name="stockbot-prewarm", daemon=True)
+
+    # --- 任务 ---
+    def _radar(self, ttl):
+        from .radar import MarketRadarSystem
+
+        # 同时把 RSP/SPY 同步进本地行情库，广度图直接读盘
+        MarketRadarSystem.get_data.refresh(ttl, MarketRadarSystem())
+
+    def _quotes(self, ttl):
+        from .sources import get_watchlist_quotes
+
+        for tickers in _watchlist_inputs()[0]:
+            get_watchlist_quotes.refresh(ttl, tickers)
+
+    def _news(self, ttl):
+        from .sources import fetch_news_batch
+
+        fetch_news_batch(_watchlist_inputs()[1], refresh_ttl=ttl)
+
+    def _fear_greed(self, ttl):
+        from .sources import get_cnn_fear_and_greed
+
+        get_cnn_fear_and_greed.refresh(ttl)
+
+    def _breadth(self, ttl):
+        from .breadth import constituent_breadth
+
+        # 首次运行要把 500+ 只成分股的历史同步进本地行情库，之后每次只读最近几根K线
+        for index in settings.BREADTH_INDEXES:
+            constituent_breadth.refresh(ttl, index)
+
+    def _fred(self, ttl):
+        from .fred import create_client
+        from .sources import get_macro_hard_data
+
+        if self._fred_client is None:
+            self._fred_client = create_client(self.fred_api_key)
+        for lang in LANGS:
+            get_macro_hard_data.refresh(ttl, self._fred_client, lang=lang)
+
+    def _snapshot(self, ttl):
+        from .cache import source_ages
+        from .pipeline import collect_snapshot, news_queries
+        from .shared import publish
+
+        scan = collect_snapshot(LANGS[0])
+        scan["data_age"] = source_ages(settings.FRESHNESS_SOURCES)
+        publish(scan, news_queries(get_watchlist_groups(LANGS[0])))
+
+    # --- 调度 ---
+    def interval(self, name):
+        open_seconds, closed_seconds = self.intervals[name]
+        return open_seconds if is_market_open() else closed_seconds
+
+    def run_job(self, name):
+        interval = self.interval(name)
+        started = time.time()
+        try:
+            self.jobs[name](2 * interval)
+            ok, error = True, None
+        except Exception as e:
+            logger.warning("prewarm %s failed: %s", name, e)
+            ok, error = False, f"{type(e).__name__}: {e}"
+        finished = time.time()
+
+        next_run = finished + (interval if ok else min(interval, RETRY_SECONDS))
+        if not is_market_open():
+            next_run = min(next_run, next_market_open().timestamp())
+        with self._lock:
+            self.status[name] = {"last_run": finished, "seconds": round(finished - started, 3),
+                                 "ok": ok, "error": error, "next_run": next_run}
+
+    def _loop(self):
+        while not self._stop.is_set():
+            now = time.time()
+            for name in [n for n, s in self.snapshot().items() if s["next_run"] <= now]:
+                if self._stop.is_set():
+                    return
+                self.run_job(name)
+            wait = min(s["next_run"] for s in self.snapshot().values()) - time.time()
+            self._stop.wait(max(1.0, wait))
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def snapshot(self):
+        with self._lock:
+            return {name: dict(status) for name, status in self.status.items()}
+
+
+_prewarmer = None
+_prewarmer_lock = threading.Lock()
+
+
+def start_prewarmer(fred_api_key=None):
+    """进程内只启动一个预热线程 (多次调用安全)
+
+    settings.PREWARM_ENABLED 为假、或共享快照由同一台机器上的另一个进程负责预热时返回 None
+    """
+    global _prewarmer
+    if not settings.PREWARM_ENABLED:
+        return None
+    from .shared import acquire_publisher
+
+    if settings.SHARED_SNAPSHOT and not acquire_publisher():
+        return None
+    with _prewarmer_lock:
+        if _prewarmer is None:
+            _prewarmer = Prewarmer(fred_api_key).start()
+        return _prewarmer
+
+
+def get_prewarmer():
+    return _prewarmer
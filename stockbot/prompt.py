@@ -0,0 +1,121 @@
+"""Prompt 组装：把报价与新闻压缩成结构化表格，并按 token 预算裁剪
+
+价格表永远保留；新闻先经 stockbot.newsrank 跨查询合并近似重复标题并按相关度打分，
+只保留得分最高的 PROMPT_TOP_K 条，超出预算时再从最低分开始丢。
+一条新闻同时涉及多个 ticker / 话题时只出现一次，标签里列出全部涉及对象。
+两级生成 (stockbot.pipeline.assemble_digest_prompt) 用 sections() 按分组切开，不做裁剪。
+"""
+import logging
+import re
+
+from . import settings
+from .newsrank import rank_headlines
+
+logger = logging.getLogger(__name__)
+
+_CJK = re.compile(r"[　-〿㐀-䶿一-鿿＀-￯]")
+
+
+def estimate_tokens(text):
+    """本地估算 token 数 (CJK 约 1 字 1 token，其余约 4 字符 1 token)，避免每次都请求 count_tokens"""
+    cjk = len(_CJK.findall(text))
+    return cjk + (len(text) - cjk + 3) // 4
+
+
+class PromptBuilder:
+    def __init__(self):
+        self.groups = {}      # group_name -> [(ticker, name, price, change_pct)]
+        self.headlines = []   # dict(kind, group, key, rank, title, published)
+
+    def add_asset(self, group, ticker, name, price, change_pct, news):
+        """news: get_news 返回的 [{title, published, ...}]，rank 为在该查询结果中的位置"""
+        self.groups.setdefault(group, []).append((ticker, name, price, change_pct))
+        for rank, n in enumerate(news):
+            self.headlines.append({"kind": "asset", "group": group, "key": ticker, "rank": rank,
+                                   "title": n["title"], "published": n.get("published"), "source": n.get("source")})
+
+    def add_topic(self, topic, news):
+        for rank, n in enumerate(news):
+            self.headlines.append({"kind": "topic", "group": None, "key": topic, "rank": rank,
+                                   "title": n["title"], "published": n.get("published"), "source": n.get("source")})
+
+    # --- 渲染 ---
+    @staticmethod
+    def _fmt_num(value, fmt):
+        return "NA" if value is None or value != value else format(value, fmt)
+
+    def _render_prices(self, group):
+        lines = [f"=== [{group}] ===", "ticker|name|last|chg%"]
+        for ticker, name, price, change in self.groups[group]:
+            lines.append(f"{ticker}|{name}|{self._fmt_num(price, '.2f')}|{self._fmt_num(change, '+.2f')}")
+        return lines
+
+    @staticmethod
+    def _line(h):
+        return f"- [{','.join(h['keys'][:3])}] {h['title']}"
+
+    def _render_group(self, group, kept):
+        return self._render_prices(group) + [self._line(h) for h in kept if h["group"] == group]
+
+    def _render_topics(self, kept):
+        topics = [h for h in kept if h["kind"] == "topic"]
+        return ["=== [Macro Topics] ==="] + [self._line(h) for h in topics] if topics else []
+
+    def _render(self, kept):
+        """kept 已按得分降序，每个分组内也按得分从高到低列出"""
+        asset_lines = [line for group in self.groups for line in self._render_group(group, kept)]
+        return "\n".join(asset_lines), "\n".join(self._render_topics(kept))
+
+    def build(self, budget_tokens, top_k=None):
+        """返回 (market_data 文本, 统计信息)；budget_tokens 为 market_data 可用的 token 数"""
+        top_k = settings.PROMPT_TOP_K if top_k is None else top_k
+        ranked, duplicates = rank_headlines(self.headlines)
+        unique = ranked[:top_k]
+        dropped = len(ranked) - len(unique)
+
+        # 超预算时从得分最低的开始丢
+        drop_order = range(len(unique) - 1, -1, -1)
+        kept_flags = [True] * len(unique)
+        asset_text, topic_text = self._render(unique)
+        tokens = estimate_tokens(asset_text) + estimate_tokens(topic_text)
+        for i in drop_order:
+            if tokens <= budget_tokens:
+                # 逐条扣减只是近似值，以重新渲染后的实际大小为准
+                asset_text, topic_text = self._render([h for h, keep in zip(unique, kept_flags) if keep])
+                tokens = estimate_tokens(asset_text) + estimate_tokens(topic_text)
+                if tokens <= budget_tokens:
+                    break
+            kept_flags[i] = False
+            dropped += 1
+            tokens -= estimate_tokens(self._line(unique[i]) + "\n")
+        kept = [h for h, keep in zip(unique, kept_flags) if keep]
+        asset_text, topic_text = self._render(kept)
+
+        text = asset_text + ("\n\n" + topic_text if topic_text else "")
+        stats = {
+            "assets": sum(len(rows) for rows in self.groups.values()),
+            "headlines_kept": len(kept),
+            "headlines_dropped": dropped,
+            "duplicates_removed": duplicates,
+            "tokens_assets": estimate_tokens(asset_text),
+            "tokens_topics": estimate_tokens(topic_text),
+            "tokens_market_data": estimate_tokens(text),
+            "budget_tokens": budget_tokens,
+        }
+        logger.info("prompt market_data sections: %s", stats)
+        return text, stats
+
+    def sections(self):
+        """两级生成用：({分组: 文本}, 话题文本, 统计)；格式与 build() 相同，但不限条数、不按预算裁剪
+        (每段单独交给模型压缩成摘要，单段都很小)"""
+        ranked, duplicates = rank_headlines(self.headlines)
+        groups = {group: "\n".join(self._render_group(group, ranked)) for group in self.groups}
+        topic_text = "\n".join(self._render_topics(ranked))
+        stats = {
+            "assets": sum(len(rows) for rows in self.groups.values()),
+            "headlines_kept": len(ranked),
+            "headlines_dropped": 0,
+            "duplicates_removed": duplicates,
+            "tokens_sections": sum(map(estimate_tokens, groups.values())) + estimate_tokens(topic_text),
+        }
+        return groups, topic_text, stats
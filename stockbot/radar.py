@@ -0,0 +1,238 @@
+"""全景红绿灯系统 (Market Radar System) 与 RSP/SPY 广度背离
+
+只做数据与评分，不依赖 Streamlit / matplotlib；图表在 stockbot.charts 里绘制。
+"""
+import logging
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+from . import settings
+from .breadth import participation_points
+from .cache import cached
+from .store import get_price_store
+
+logger = logging.getLogger(__name__)
+
+
+class MarketRadarSystem:
+    def __init__(self, lang="CN"):
+        self.lang = lang
+        self.sectors = {
+            'XLK': '科技' if lang=='CN' else 'Tech', 
+            'XLI': '工业' if lang=='CN' else 'Industrials', 
+            'XLB': '材料' if lang=='CN' else 'Materials', 
+            'XLE': '能源' if lang=='CN' else 'Energy',
+            'XLF': '金融' if lang=='CN' else 'Financials', 
+            'XLV': '医疗' if lang=='CN' else 'Healthcare', 
+            'XLY': '可选' if lang=='CN' else 'Cons. Disc', 
+            'XLP': '必选' if lang=='CN' else 'Cons. Staples',
+            'XLC': '通信' if lang=='CN' else 'Comm. Svcs', 
+            'XLRE': '地产' if lang=='CN' else 'Real Estate', 
+            'XLU': '公用' if lang=='CN' else 'Utilities'
+        }
+        self.tickers = ['SPY', 'RSP', '^VIX'] + list(self.sectors.keys())
+        
+    @cached("radar", key=lambda self: self.tickers, skip=lambda data: data.empty)
+    def get_data(self):
+        # 走本地增量行情库：热启动只拉取最新几根K线
+        try:
+            data = get_price_store().get_closes(self.tickers, start=datetime.now() - timedelta(days=365))
+        except Exception as e:
+            logger.warning("radar data error: %s", e)
+            return pd.DataFrame()
+
+        data = data.ffill().dropna()
+        return data
+
+    def analyze_traffic_light(self, data, constituents=None):
+        """constituents: breadth.scan_breadth() 的结果，提供时加入成分股参与度分项"""
+        if data.empty or 'SPY' not in data.columns:
+            is_cn = (self.lang == "CN")
+            return {
+                "status": "⚪ 数据获取失败" if is_cn else "⚪ Data Error", 
+                "color": "gray", "score": 0,
+                "reasons": ["无法连接 Yahoo Finance" if is_cn else "Cannot connect to Yahoo Finance"], 
+                "vix": 0, "sector_data": data
+            }
+        result = self.score_inputs(self.traffic_light_inputs(data), constituents)
+        result["sector_data"] = data
+        return result
+
+    @staticmethod
+    def traffic_light_inputs(data):
+        """日线宽表 -> 评分用到的最新值与均线；缺少对应 ticker 的分项为 None
+
+        盘中模式 (stockbot.intraday) 用增量状态直接给出同样的 dict，不经过这里
+        """
+        spy = data['SPY']
+        inputs = {"spy": spy.iloc[-1], "spy_ma50": spy.rolling(50).mean().iloc[-1],
+                  "breadth": None, "breadth_ma20": None, "offense_defense": None, "od_ma20": None, "vix": None}
+        if 'RSP' in data.columns:
+            breadth_ratio = data['RSP'] / spy
+            inputs["breadth"] = breadth_ratio.iloc[-1]
+            inputs["breadth_ma20"] = breadth_ratio.rolling(20).mean().iloc[-1]
+        if all(c in data.columns for c in ['XLK', 'XLI', 'XLU', 'XLP']):
+            offense = (data['XLK'] + data['XLI']) / 2
+            defense = (data['XLU'] + data['XLP']) / 2
+            ratio_od = offense / defense
+            inputs["offense_defense"] = ratio_od.iloc[-1]
+            inputs["od_ma20"] = ratio_od.rolling(20).mean().iloc[-1]
+        if '^VIX' in data.columns:
+            inputs["vix"] = data['^VIX'].iloc[-1]
+        return inputs
+
+    def score_inputs(self, inputs, constituents=None, bar=None):
+        """按规则打分；bar 为盘中K线周期 (如 "5m")，只影响理由文案里均线的写法"""
+        score = 0
+        reasons = []
+        is_cn = (self.lang == "CN")
+        if bar:
+            ma50 = f"50×{bar}均线" if is_cn else f"50×{bar} MA"
+        else:
+            ma50 = "50日线" if is_cn else "50MA"
+
+        # --- 1. 趋势判定 (Trend) ---
+        spy_ma50 = inputs["spy_ma50"]
+        spy_curr = inputs["spy"]
+        
+        if pd.isna(spy_curr) or pd.isna(spy_ma50):
+            reasons.append("⚠️ 数据不足，无法计算均线" if is_cn else "⚠️ Insufficient data for MA calc")
+        elif spy_curr > spy_ma50:
+            score += 20
+            diff = (spy_curr - spy_ma50) / spy_ma50 * 100
+            reasons.append(f"✅ 大盘(SPY) 站上 {ma50} (+{diff:.1f}%)" if is_cn else f"✅ SPY above {ma50} (+{diff:.1f}%)")
+        else:
+            diff = (spy_ma50 - spy_curr) / spy_ma50 * 100
+            reasons.append(f"⚠️ 大盘(SPY) 跌破 {ma50} (-{diff:.1f}%)" if is_cn else f"⚠️ SPY below {ma50} (-{diff:.1f}%)")
+
+        # --- 2. 广度判定 (Structure) ---
+        if inputs["breadth"] is not None:
+            breadth_ma20 = inputs["breadth_ma20"]
+            breadth_curr = inputs["breadth"]
+            
+            if breadth_curr > breadth_ma20:
+                score += 30
+                reasons.append("✅ 市场广度 (RSP/SPY) 走强 (中小票复苏)" if is_cn else "✅ Market Breadth (RSP/SPY) Strengthening")
+            else:
+                reasons.append("⚠️ 市场广度走弱 (巨头吸血/背离)" if is_cn else "⚠️ Market Breadth Weakening (Megacap divergence)")
+
+        # --- 3. 行业攻击性判定 (Rotation) ---
+        if inputs["offense_defense"] is not None:
+            if inputs["offense_defense"] > inputs["od_ma20"]:
+                score += 30
+                reasons.append("✅ 资金流向进攻板块 (科技/工业)" if is_cn else "✅ Capital Flow to Cyclicals (Tech/Ind)")
+            else:
+                reasons.append("🛡️ 资金流向防御板块 (避险模式)" if is_cn else "🛡️ Capital Flow to Defensives (Risk Off)")
+        else:
+            reasons.append("⚪ 板块数据缺失，跳过结构分析" if is_cn else "⚪ Missing sector data, skipping structure analysis")
+
+        # --- 4. 恐慌指数修正 (Sentiment) ---
+        if inputs["vix"] is not None:
+            vix = inputs["vix"]
+            if vix < 15:
+                score += 10
+                reasons.append(f"✅ VIX 低位 ({vix:.2f})" if is_cn else f"✅ VIX Low ({vix:.2f})")
+            elif vix > 25:
+                score -= 20 
+                reasons.append(f"🛑 VIX 飙升 ({vix:.2f})" if is_cn else f"🛑 VIX Spiking ({vix:.2f})")
+        else:
+            vix = 0
+
+        # --- 5. 成分股参与度 (Participation)：BREADTH_SCORE 打开时只有主指数 (第一个) 计分，其余作为参考 ---
+        constituents = constituents or {}
+        primary = next(iter(constituents), None) if settings.BREADTH_SCORE else None
+        for index, stats in constituents.items():
+            line = (f"{stats['index']} 成分股 {stats['pct_above_200']:.0f}% 站上200日线 / {stats['pct_above_50']:.0f}% 站上50日线，"
+                    f"McClellan {stats['mcclellan']:+.0f}，新高/新低 {stats['new_highs']}/{stats['new_lows']}" if is_cn else
+                    f"{stats['index']}: {stats['pct_above_200']:.0f}% above 200MA / {stats['pct_above_50']:.0f}% above 50MA, "
+                    f"McClellan {stats['mcclellan']:+.0f}, new highs/lows {stats['new_highs']}/{stats['new_lows']}")
+            if index != primary:
+                reasons.append(f"ℹ️ {line}")
+                continue
+            points = int(participation_points(stats['pct_above_50'], stats['pct_above_200'], stats['mcclellan'],
+                                              stats['new_highs'], stats['new_lows']))
+            score += points
+            reasons.append(f"{'✅' if points > 0 else '⚠️' if points < 0 else '⚪'} {line}")
+        score = min(score, 100)
+
+        # --- 判定红绿灯 ---
+        if score >= 70:
+            status = "🟢 绿灯 (积极进攻)" if is_cn else "🟢 GREEN LIGHT (Risk On)"
+            color_code = "green"
+        elif score >= 40:
+            status = "🟡 黄灯 (震荡/观察)" if is_cn else "🟡 YELLOW LIGHT (Caution)"
+            color_code = "orange"
+        else:
+            status = "🔴 红灯 (防守/空仓)" if is_cn else "🔴 RED LIGHT (Defensive)"
+            color_code = "red"
+            
+        return {
+            "status": status,
+            "color": color_code,
+            "score": score,
+            "reasons": reasons,
+            "vix": vix,
+        }
+
+    def sector_performance(self, data):
+        """各行业 ETF 近 20 个交易日涨跌幅 (%)，键为图表使用的英文名称"""
+        # 基础英文名称映射，用于图表统一
+        base_map = {
+             'XLK': 'Technology (XLK)', 'XLI': 'Industrial (XLI)', 'XLB': 'Materials (XLB)', 
+             'XLE': 'Energy (XLE)', 'XLF': 'Financials (XLF)', 'XLV': 'Healthcare (XLV)', 
+             'XLY': 'Cons. Disc (XLY)', 'XLP': 'Cons. Staples (XLP)', 'XLC': 'Comm. Svcs (XLC)', 
+             'XLRE': 'Real Estate (XLRE)', 'XLU': 'Utilities (XLU)'
+        }
+
+        sector_perf = {}
+        if data.empty:
+            return sector_perf
+
+        # 使用 ticker 直接遍历
+        for ticker in self.sectors.keys():
+            if ticker in data.columns:
+                hist = data[ticker]
+                if len(hist) >= 20:
+                    pct_change = (hist.iloc[-1] - hist.iloc[-20]) / hist.iloc[-20] * 100
+                    en_name = base_map.get(ticker, ticker)
+                    sector_perf[en_name] = float(pct_change)
+        return sector_perf
+
+
+@cached("radar", skip=lambda result: result[0] is None)
+def analyze_market_breadth(until=None):
+    """RSP/SPY 广度比与 SPY 的归一化走势，返回 (DataFrame 或 None, 信号文本)
+
+    until: 只用这一天 (含) 及以前的日线，排除行情库里当天盘中的未完成K线 (盯盘模式按收盘日算)
+    """
+    tickers = ['RSP', 'SPY']
+    try:
+        data = get_price_store().get_closes(tickers, start=datetime.now() - timedelta(days=365))
+        if until is not None:
+            data = data[data.index <= pd.Timestamp(until)]
+        df = pd.DataFrame()
+        df['RSP'] = data['RSP']
+        df['SPY'] = data['SPY']
+        
+        df['Breadth_Ratio'] = df['RSP'] / df['SPY']
+        df['Normalized_Ratio'] = df['Breadth_Ratio'] / df['Breadth_Ratio'].iloc[0]
+        df['SPY_Normalized'] = df['SPY'] / df['SPY'].iloc[0]
+        df['Ratio_MA20'] = df['Normalized_Ratio'].rolling(window=20).mean()
+
+        latest = df.iloc[-1]
+        prev_week = df.iloc[-5]
+        
+        spy_trend = "UP" if latest['SPY_Normalized'] > prev_week['SPY_Normalized'] else "DOWN"
+        breadth_trend = "UP" if latest['Normalized_Ratio'] > prev_week['Normalized_Ratio'] else "DOWN"
+        
+        signal_text = f"Current Status: SPY Trend is {spy_trend}, Breadth(Equal Weight) Trend is {breadth_trend}."
+        
+        if spy_trend == "UP" and breadth_trend == "DOWN":
+            signal_text += " [⚠️ WARNING: DIVERGENCE DETECTED]"
+        elif spy_trend == "UP" and breadth_trend == "UP":
+            signal_text += " [✅ HEALTHY: Broad Participation]"
+            
+        return df, signal_text
+    except Exception as e:
+        return None, f"Data Error: {str(e)}"
@@ -0,0 +1,62 @@
+"""AI 报告的内容寻址缓存
+
+Prompt 完全由扫描结果 + 语言 + 模型决定，因此对规范化后的输入做哈希作为 key：
+输入没变就直接复用已生成的报告；多个会话同时请求同一份报告时只调用一次 Gemini。
+"""
+import hashlib
+import json
+import time
+
+from .cache import get_cache
+from .singleflight import SingleFlight
+
+_inflight = SingleFlight()
+
+
+def _normalize(value):
+    if isinstance(value, dict):
+        return {str(k): _normalize(v) for k, v in sorted(value.items())}
+    if isinstance(value, (list, tuple)):
+        return [_normalize(v) for v in value]
+    if isinstance(value, float):
+        return round(value, 4)
+    if isinstance(value, str):
+        # 只规范行首尾空白，保留内容本身
+        return "\n".join(line.strip() for line in value.strip().splitlines())
+    if hasattr(value, "item"):
+        # numpy 标量
+        return _normalize(value.item())
+    return value
+
+
+def report_key(model_name, lang, **inputs):
+    payload = json.dumps(
+        {"model": model_name, "lang": lang, "inputs": _normalize(inputs)},
+        ensure_ascii=False, sort_keys=True, default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def get_or_generate_report(key, generate, cache_name="report"):
+    """返回 (entry, source)；两级生成的分段摘要用 cache_name="digest" 单独缓存，不挤占报告
+
+    entry:  {"text", "timing", "created_at"}
+    source: "fresh" 本次生成 / "cache" 命中缓存 / "coalesced" 等待了另一个会话的同一次生成
+    """
+    cache = get_cache(cache_name)
+    hit, entry = cache.get(key)
+    if hit:
+        return entry, "cache"
+
+    def run():
+        # 排队期间可能已经有人生成完
+        hit, entry = cache.get(key, count=False)
+        if hit:
+            return entry
+        text, timing = generate()
+        entry = {"text": text, "timing": timing, "created_at": time.time()}
+        cache.set(key, entry)
+        return entry
+
+    entry, shared = _inflight.do(key, run)
+    return entry, ("coalesced" if shared else "fresh")
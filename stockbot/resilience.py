@@ -0,0 +1,224 @@
+"""上游数据源的限流 / 重试 / 熔断
+
+每个上游 (按 span 的 kind 区分：rss、yahoo、cnn、fred、wiki) 一个 Upstream，配置见 settings.UPSTREAM_POLICIES：
+  * 令牌桶：平时按 rate 放行、允许 burst 的突发；收到 429 时速率减半，之后每次成功慢慢加回 (AIMD)
+  * 重试：429 / 5xx / 连接错误 / 空结果按带抖动的指数退避重试，有 Retry-After 时照它等；
+    超时不重试 —— 上游已经慢到超时，再等一轮只会让整次扫描更慢
+  * 熔断：连续 threshold 次失败后打开，打开期间直接抛 CircuitOpenError、不发请求；
+    reset 秒后放一个探测请求 (half-open)，成功则关闭，失败则重新打开
+熔断时调用方走原有的失败路径，stockbot.cache 会回退到该 key 上一次成功的值。
+"""
+import random
+import threading
+import time
+
+from . import settings
+
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+
+class CircuitOpenError(RuntimeError):
+    """熔断打开期间直接失败，没有发出请求"""
+
+
+class EmptyResponse(RuntimeError):
+    """请求本身没报错但拿到的是空结果 (yfinance 被限流时的表现)"""
+
+
+class TokenBucket:
+    """令牌桶；acquire() 先预占一个令牌，不够时睡到轮到自己为止"""
+    MIN_RATE_FRACTION = 0.1
+
+    def __init__(self, rate, burst):
+        self.max_rate = float(rate)
+        self.rate = float(rate)
+        self.burst = float(burst)
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """返回等待的秒数"""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+        if wait:
+            time.sleep(wait)
+        return wait
+
+    def penalize(self):
+        with self._lock:
+            self.rate = max(self.max_rate * self.MIN_RATE_FRACTION, self.rate / 2)
+
+    def reward(self):
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.max_rate * 0.1)
+
+
+class CircuitBreaker:
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, threshold, reset_seconds):
+        self.threshold = threshold
+        self.reset_seconds = reset_seconds
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = None
+        self.trips = 0
+        self.rejected = 0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """是否放行这次请求；half-open 时只放一个探测请求"""
+        with self._lock:
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_seconds:
+                self.state = self.HALF_OPEN
+                self._probing = False
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.HALF_OPEN and not self._probing:
+                self._probing = True
+                return True
+            self.rejected += 1
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or (self.state == self.CLOSED and self.failures >= self.threshold):
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+                self.trips += 1
+                self._probing = False
+
+    def is_open(self):
+        with self._lock:
+            return self.state == self.OPEN
+
+
+def _status(e):
+    status = getattr(getattr(e, "response", None), "status_code", None)
+    if status is None and ("429" in str(e) or "Too Many Requests" in str(e)):
+        return 429  # fredapi 把 HTTP 错误转成了 ValueError
+    return status
+
+
+def _retryable(e):
+    import requests  # 走到这里时调用方早已加载过 requests
+
+    if isinstance(e, (requests.Timeout, TimeoutError)):
+        return False
+    if isinstance(e, EmptyResponse):
+        return True
+    status = _status(e)
+    if status is not None:
+        return status in RETRY_STATUS
+    return isinstance(e, (requests.ConnectionError, ConnectionError))
+
+
+def _retry_after(e):
+    headers = getattr(getattr(e, "response", None), "headers", None) or {}
+    try:
+        return float(headers.get("Retry-After"))
+    except (TypeError, ValueError):
+        return None
+
+
+class Upstream:
+    def __init__(self, name, rate, burst, retries, threshold, reset):
+        self.name = name
+        self.retries = retries
+        self.bucket = TokenBucket(rate, burst)
+        self.breaker = CircuitBreaker(threshold, reset)
+        self.calls = 0
+        self.retried = 0
+        self.failures = 0
+        self.throttled_s = 0.0
+
+    def backoff(self, attempt, error=None):
+        """带抖动的指数退避 (full jitter)；Retry-After 超过上限时返回 None，表示不值得等"""
+        base, cap = settings.UPSTREAM_BACKOFF
+        retry_after = _retry_after(error)
+        if retry_after is not None:
+            return retry_after if retry_after <= cap else None
+        return random.uniform(0, min(cap, base * 2 ** attempt))
+
+    def call(self, fn, is_failure=None):
+        """返回 fn() 的结果；熔断打开时抛 CircuitOpenError，重试用完后抛最后一次的异常
+
+        is_failure(result) 为 True 时把结果当作失败 (计入熔断，按可重试处理)
+        """
+        if not settings.UPSTREAM_GUARD:
+            return fn()
+        for attempt in range(self.retries + 1):
+            if not self.breaker.allow():
+                raise CircuitOpenError(f"{self.name}: circuit open")
+            self.throttled_s += self.bucket.acquire()
+            self.calls += 1
+            try:
+                result = fn()
+                if is_failure and is_failure(result):
+                    raise EmptyResponse(f"{self.name}: empty response")
+            except Exception as e:
+                self.failures += 1
+                self.breaker.record_failure()
+                if _status(e) == 429:
+                    self.bucket.penalize()
+                delay = self.backoff(attempt, e)
+                if attempt >= self.retries or delay is None or not _retryable(e) or self.breaker.is_open():
+                    raise
+                self.retried += 1
+                time.sleep(delay)
+                continue
+            self.breaker.record_success()
+            self.bucket.reward()
+            return result
+
+    def stats(self):
+        breaker = self.breaker
+        return {
+            "upstream": self.name,
+            "state": breaker.state,
+            "consecutive_failures": breaker.failures,
+            "trips": breaker.trips,
+            "rejected": breaker.rejected,
+            "calls": self.calls,
+            "retried": self.retried,
+            "failures": self.failures,
+            "rate": round(self.bucket.rate, 2),
+            "throttled_s": round(self.throttled_s, 2),
+        }
+
+
+_upstreams = {}
+_upstreams_lock = threading.Lock()
+
+
+def upstream(name):
+    with _upstreams_lock:
+        if name not in _upstreams:
+            policy = {**settings.UPSTREAM_DEFAULT_POLICY, **settings.UPSTREAM_POLICIES.get(name, {})}
+            _upstreams[name] = Upstream(name, **policy)
+        return _upstreams[name]
+
+
+def reset_upstreams():
+    """丢弃所有限流/熔断状态，下次使用时按当前 settings 重新创建 (基准测试/调试用)"""
+    with _upstreams_lock:
+        _upstreams.clear()
+
+
+def upstream_stats():
+    with _upstreams_lock:
+        upstreams = list(_upstreams.values())
+    return [u.stats() for u in upstreams]
@@ -0,0 +1,122 @@
+"""运行时配置 (均可通过环境变量覆盖)"""
+import os
+
+# 本地持久化目录 (行情库等)，默认放在项目根目录下
+DATA_DIR = os.environ.get(
+    "STOCKBOT_DATA_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".stockbot_data"),
+)
+
+# 行情库：每次增量更新时回溯校验的交易日数 (用于发现分红/拆股导致的复权价修订)
+PRICE_REVALIDATE_BARS = int(os.environ.get("STOCKBOT_PRICE_REVALIDATE_BARS", 5))
+# 盘中两次增量检查的最小间隔 (秒)
+PRICE_RECHECK_SECONDS = int(os.environ.get("STOCKBOT_PRICE_RECHECK_SECONDS", 300))
+
+# 进程级缓存：各数据源的 TTL (秒) 与最大条目数 (超出按 LRU 淘汰)
+CACHE_TTLS = {
+    "quotes": 120,
+    "radar": 300,
+    "news": 900,
+    "fear_greed": 900,
+    "fred": 6 * 3600,
+    "report": 900,
+    "digest": 900,
+    "charts": 86400,
+    "breadth": 600,
+}
+CACHE_MAXSIZE = {
+    "quotes": 16,
+    "radar": 16,
+    "news": 512,
+    "fear_greed": 4,
+    "fred": 8,
+    "report": 32,
+    "digest": 128,
+    "charts": 32,
+    "breadth": 4,
+}
+for _source in CACHE_TTLS:
+    CACHE_TTLS[_source] = int(os.environ.get(f"STOCKBOT_CACHE_TTL_{_source.upper()}", CACHE_TTLS[_source]))
+
+# 缓存条目过期后仍保留 (直到被 LRU 挤掉)，上游失败/熔断时最多回退到多旧的上一次成功结果 (秒)
+CACHE_STALE_MAX_AGE = int(os.environ.get("STOCKBOT_CACHE_STALE_MAX_AGE", 86400))
+
+# 上游限流 / 重试 / 熔断 (按 span 的 kind)：rate 每秒请求数、burst 突发上限、retries 失败后重试次数、
+# threshold 连续失败多少次熔断、reset 熔断后多少秒放一个探测请求；STOCKBOT_UPSTREAM_GUARD=0 关闭 (只试一次)
+UPSTREAM_GUARD = os.environ.get("STOCKBOT_UPSTREAM_GUARD", "1") != "0"
+UPSTREAM_DEFAULT_POLICY = {"rate": 5, "burst": 10, "retries": 2, "threshold": 5, "reset": 60}
+UPSTREAM_POLICIES = {
+    "rss": {"rate": 20, "burst": 60},
+    "yahoo": {"rate": 2, "burst": 4, "threshold": 3, "reset": 120},
+    "cnn": {"rate": 0.5, "burst": 2, "retries": 1, "threshold": 3, "reset": 300},
+    "fred": {"rate": 2, "burst": 10, "reset": 120},
+    "wiki": {"rate": 1, "burst": 2, "retries": 1, "threshold": 3, "reset": 600},
+    "webhook": {"rate": 1, "burst": 5, "threshold": 3, "reset": 300},
+}
+# 退避的 (初始, 上限) 秒数；Retry-After 超过上限时不再重试
+UPSTREAM_BACKOFF = (0.5, 8.0)
+
+# 发送给 Gemini 的 Prompt 总 token 预算 (本地估算)，超出时按价值从低到高丢弃新闻
+PROMPT_TOKEN_BUDGET = int(os.environ.get("STOCKBOT_PROMPT_TOKEN_BUDGET", 8000))
+# 近似重复合并、按相关度排序之后最多保留的新闻条数
+PROMPT_TOP_K = int(os.environ.get("STOCKBOT_PROMPT_TOP_K", 80))
+
+# 报告生成方式：single 一次调用 (Prompt 受上面的预算限制) / mapreduce 先并行把每个分组、宏观专题、FRED
+# 压缩成摘要，再只把摘要交给最终的 CIO Prompt；摘要调用的并发数和模型 (留空沿用报告模型)
+REPORT_MODE = os.environ.get("STOCKBOT_REPORT_MODE", "single")
+DIGEST_MAX_WORKERS = int(os.environ.get("STOCKBOT_DIGEST_MAX_WORKERS", 16))
+DIGEST_MODEL = os.environ.get("STOCKBOT_DIGEST_MODEL", "")
+
+# 诊断：外部调用 span 的 JSON 行日志文件 (为空则写 stderr)，以及诊断面板高亮的最慢调用数
+SPAN_LOG = os.environ.get("STOCKBOT_SPAN_LOG", "")
+DIAG_SLOWEST_N = int(os.environ.get("STOCKBOT_DIAG_SLOWEST_N", 5))
+
+# 新闻并发抓取的线程数 (沿用旧的环境变量名)
+NEWS_MAX_WORKERS = int(os.environ.get("NEWS_MAX_WORKERS", 8))
+
+# 后台预热：是否启用，以及各数据源在 (开盘, 休市) 时的刷新间隔 (秒)
+# 预热写入的缓存条目有效期为 2 倍刷新间隔，两次刷新之间不会过期
+PREWARM_ENABLED = os.environ.get("STOCKBOT_PREWARM", "1") != "0"
+PREWARM_INTERVALS = {
+    "radar": (240, 3600),
+    "quotes": (60, 1800),
+    "news": (600, 1800),
+    "fear_greed": (600, 3600),
+    "fred": (3600, 6 * 3600),
+    "breadth": (600, 3600),
+    "snapshot": (60, 1800),
+}
+
+# 侧边栏 "数据新鲜度" 和共享快照里记录缓存时长的数据源
+FRESHNESS_SOURCES = ["radar", "breadth", "quotes", "news", "fear_greed", "fred"]
+
+# 多进程共享快照 (stockbot.shared)：开关、目录、保留的版本数，以及 (开盘, 休市) 时多旧以内的快照可以直接用 (秒)
+SHARED_SNAPSHOT = os.environ.get("STOCKBOT_SHARED_SNAPSHOT", "1") != "0"
+# 目录留空时为 <DATA_DIR>/shared，在用到时才拼 (见 stockbot.shared.shared_dir)，改了 DATA_DIR 也会跟着走
+SHARED_SNAPSHOT_DIR = os.environ.get("STOCKBOT_SHARED_SNAPSHOT_DIR", "")
+SHARED_SNAPSHOT_KEEP = 3
+SHARED_SNAPSHOT_MAX_AGE = (180, 3600)
+# 发布中途崩溃留下的 .tmp-* 目录，超过这个时长 (秒) 在下次发布时清掉
+SHARED_SNAPSHOT_TMP_MAX_AGE = 300
+
+# 成分股广度引擎：参与计算的指数 (逗号分隔，留空关闭)、面板保留的历史天数、成分股清单的刷新周期 (秒)
+BREADTH_INDEXES = [i for i in os.environ.get("STOCKBOT_BREADTH_INDEXES", "sp500,ndx").split(",") if i.strip()]
+BREADTH_HISTORY_DAYS = int(os.environ.get("STOCKBOT_BREADTH_HISTORY_DAYS", 3 * 365))
+BREADTH_CONSTITUENTS_MAX_AGE = int(os.environ.get("STOCKBOT_BREADTH_CONSTITUENTS_MAX_AGE", 7 * 86400))
+# 成分股参与度是否计入红绿灯评分 (±20，会改变 40 / 70 分界)；默认只作为参考信息列出，
+# 用 python -m stockbot.backtest --breadth 验证过之后再打开
+BREADTH_SCORE = os.environ.get("STOCKBOT_BREADTH_SCORE", "0") == "1"
+
+# 盘中模式：K线周期、启动时做种子的历史长度、两次下载的最小间隔 (秒)、页面自动刷新间隔 (秒)
+INTRADAY_INTERVAL = os.environ.get("STOCKBOT_INTRADAY_INTERVAL", "5m")
+INTRADAY_SEED_PERIOD = os.environ.get("STOCKBOT_INTRADAY_SEED_PERIOD", "5d")
+INTRADAY_MIN_FETCH_SECONDS = int(os.environ.get("STOCKBOT_INTRADAY_MIN_FETCH_SECONDS", 60))
+INTRADAY_REFRESH_SECONDS = int(os.environ.get("STOCKBOT_INTRADAY_REFRESH_SECONDS", 300))
+
+# 盯盘模式 (python -m stockbot watch)：轮询间隔 (秒)、告警 JSON 行文件、可选的本地 webhook (POST JSON)
+WATCH_POLL_SECONDS = int(os.environ.get("STOCKBOT_WATCH_POLL_SECONDS", 60))
+# 告警文件留空时为 <DATA_DIR>/alerts.jsonl，在用到时才拼 (见 stockbot.watch.alert_file)
+WATCH_ALERT_FILE = os.environ.get("STOCKBOT_WATCH_ALERT_FILE", "")
+WATCH_WEBHOOK = os.environ.get("STOCKBOT_WATCH_WEBHOOK", "")
+# 告警确认：新状态要在连续几根不同的K线上都成立才告警 (1 为立即告警)
+WATCH_CONFIRM_BARS = int(os.environ.get("STOCKBOT_WATCH_CONFIRM_BARS", 2))
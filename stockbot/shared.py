@@ -0,0 +1,242 @@
+"""多进程共享的扫描快照：Arrow IPC 文件 + 内存映射
+
+多个 Streamlit 进程挂在负载均衡后面时，由一个进程 (拿到 publisher.lock 的那个，见 acquire_publisher)
+预热并发布与语言无关的扫描快照，其余进程直接读：
+  <shared_dir()>/v<版本>/{data,breadth,quotes,news}.arrow + meta.json
+  <shared_dir()>/CURRENT    最新版本号 (写临时文件后 os.replace，读者不会看到写了一半的版本)
+Arrow 文件不压缩；读者用 pa.memory_map 打开，数值列直接引用映射的页 (零拷贝、不解析)，
+同一台机器上的所有进程共用一份页缓存，加进程不加内存。
+浮点列里的 NaN 按原值写入而不是转成 null，否则读回 pandas 时要复制一份来填 NaN。
+"""
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+
+import pandas as pd
+
+from . import settings
+
+try:
+    import fcntl
+except ImportError:  # Windows：不做多进程选主，每个进程都自己预热
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+INDEX = "__index__"
+FRAMES = ("data", "breadth", "quotes")
+
+
+def shared_dir():
+    """SHARED_SNAPSHOT_DIR，未配置时为 <DATA_DIR>/shared"""
+    return settings.SHARED_SNAPSHOT_DIR or os.path.join(settings.DATA_DIR, "shared")
+
+
+# === 写 ===
+def _frame_table(df):
+    import pyarrow as pa
+
+    columns = {INDEX: pa.array(df.index)}
+    for col in df.columns:
+        values = df[col]
+        if pd.api.types.is_float_dtype(values):
+            columns[str(col)] = pa.array(values.to_numpy(), from_pandas=False)
+        else:
+            columns[str(col)] = pa.array(values.to_numpy(dtype=object), type=pa.string(), from_pandas=True)
+    return pa.table(columns).replace_schema_metadata({"index_name": json.dumps(df.index.name)})
+
+
+def _quotes_frame(quotes):
+    """报价表原本是 object 列 (数值和 None 混在一起)，落盘前转成 float64 + 字符串"""
+    frame = quotes[["price", "prev_close", "change_pct"]].apply(pd.to_numeric, errors="coerce").astype("float64")
+    frame["error"] = quotes["error"].where(quotes["error"].map(lambda e: isinstance(e, str)), None)
+    return frame
+
+
+def _news_table(news, queries):
+    import pyarrow as pa
+
+    rows = [(query, rank, item) for query, items in zip(queries, news) for rank, item in enumerate(items)]
+    return pa.table({
+        "query": pa.array([r[0] for r in rows], type=pa.string()),
+        "rank": pa.array([r[1] for r in rows], type=pa.int16()),
+        "title": pa.array([r[2]["title"] for r in rows], type=pa.string()),
+        "link": pa.array([r[2].get("link") for r in rows], type=pa.string()),
+        "published": pa.array([r[2].get("published") for r in rows], type=pa.int64()),
+        "source": pa.array([r[2].get("source") for r in rows], type=pa.string()),
+    })
+
+
+def _write(table, path):
+    import pyarrow as pa
+
+    with pa.OSFile(path, "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+
+
+def publish(scan, queries, root=None):
+    """把 scan_snapshot() 的结果发布成新版本，返回版本号；queries 为 scan["news"] 对应的查询 (同顺序)"""
+    root = root or shared_dir()
+    os.makedirs(root, exist_ok=True)
+    version = f"{time.time_ns()}-{os.getpid()}"
+    tmp = os.path.join(root, f".tmp-{version}")
+    os.makedirs(tmp)
+    try:
+        frames = {"data": scan["data"], "breadth": scan["breadth"], "quotes": _quotes_frame(scan["quotes"])}
+        for name, frame in frames.items():
+            if frame is not None:
+                _write(_frame_table(frame), os.path.join(tmp, f"{name}.arrow"))
+        _write(_news_table(scan["news"], queries), os.path.join(tmp, "news.arrow"))
+        meta = {
+            "version": version,
+            "published_at": time.time(),
+            "date": scan["date"],
+            "fear_greed": scan["fear_greed"],
+            "breadth_signal": scan["breadth_signal"],
+            "constituents": scan["constituents"],
+            "data_age": scan.get("data_age") or {},
+        }
+        with open(os.path.join(tmp, "meta.json"), "w") as f:
+            json.dump(meta, f, ensure_ascii=False)
+        os.replace(tmp, os.path.join(root, f"v{version}"))
+    except BaseException:
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise
+
+    pointer = os.path.join(root, f".CURRENT-{version}")
+    with open(pointer, "w") as f:
+        f.write(version)
+    os.replace(pointer, os.path.join(root, "CURRENT"))
+    _prune(root, version)
+    return version
+
+
+def _prune(root, current):
+    """只保留最近 SHARED_SNAPSHOT_KEEP 个版本；已映射旧文件的读者不受影响 (POSIX 删除后映射仍有效)
+
+    发布进程中途被杀时 .tmp-* 不会被 publish 的 finally 清掉，超过 SHARED_SNAPSHOT_TMP_MAX_AGE 的一并删除
+    (按 mtime 判断，不会误删另一个进程正在写的目录)。
+    """
+    names = os.listdir(root)
+    versions = sorted((d for d in names if d.startswith("v")), key=lambda d: int(d[1:].split("-")[0]))
+    for name in versions[:-settings.SHARED_SNAPSHOT_KEEP]:
+        if name != f"v{current}":
+            shutil.rmtree(os.path.join(root, name), ignore_errors=True)
+    cutoff = time.time() - settings.SHARED_SNAPSHOT_TMP_MAX_AGE
+    for name in names:
+        path = os.path.join(root, name)
+        if not name.startswith(".tmp-"):
+            continue
+        try:
+            stale = os.path.getmtime(path) < cutoff
+        except FileNotFoundError:
+            continue
+        if stale:
+            shutil.rmtree(path, ignore_errors=True)
+
+
+# === 读 ===
+def _read_table(path):
+    import pyarrow as pa
+
+    return pa.ipc.open_file(pa.memory_map(path, "r")).read_all()
+
+
+def _read_frame(path):
+    table = _read_table(path)
+    frame = table.drop_columns([INDEX]).to_pandas(split_blocks=True)
+    frame.index = pd.Index(table.column(INDEX).to_pandas(), name=json.loads(table.schema.metadata[b"index_name"]))
+    return frame
+
+
+class SharedSnapshot:
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, "meta.json")) as f:
+            self.meta = json.load(f)
+        self.version = self.meta["version"]
+        self.frames = {}
+        for name in FRAMES:
+            file = os.path.join(path, f"{name}.arrow")
+            self.frames[name] = _read_frame(file) if os.path.exists(file) else None
+        self.news_by_query = {}
+        for row in _read_table(os.path.join(path, "news.arrow")).to_pylist():
+            self.news_by_query.setdefault(row.pop("query"), []).append(row)
+
+    def age(self):
+        return time.time() - self.meta["published_at"]
+
+    def as_scan(self, queries):
+        """还原成 pipeline.scan_snapshot() 的形状；macro / reports 是每个会话自己的"""
+        meta = self.meta
+        age = self.age()
+        news = [[{k: v for k, v in item.items() if k != "rank"} for item in self.news_by_query.get(q, [])]
+                for q in queries]
+        return {
+            "date": meta["date"],
+            "data": self.frames["data"],
+            "fear_greed": meta["fear_greed"],
+            "breadth": self.frames["breadth"],
+            "breadth_signal": meta["breadth_signal"],
+            "constituents": meta["constituents"],
+            "quotes": self.frames["quotes"],
+            "news": news,
+            "macro": {},
+            "reports": {},
+            "data_age": {k: (v + age if v is not None else None) for k, v in meta["data_age"].items()},
+            "shared": {"version": self.version, "published_at": meta["published_at"], "age": age},
+        }
+
+
+_loaded = None
+_loaded_lock = threading.Lock()
+
+
+def current_version(root=None):
+    try:
+        with open(os.path.join(root or shared_dir(), "CURRENT")) as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def load(root=None):
+    """最新版本的共享快照 (进程内按版本缓存：版本不变时不重新映射)；还没有发布过时返回 None"""
+    global _loaded
+    root = root or shared_dir()
+    version = current_version(root)
+    if version is None:
+        return None
+    with _loaded_lock:
+        if _loaded is None or _loaded.version != version:
+            try:
+                _loaded = SharedSnapshot(os.path.join(root, f"v{version}"))
+            except (FileNotFoundError, OSError) as e:
+                # 读的同时被新版本清理掉了：下次再读
+                logger.warning("shared snapshot %s unavailable: %s", version, e)
+                return _loaded
+        return _loaded
+
+
+# === 选主：同一台机器上只有一个进程负责预热和发布 ===
+_publisher_fd = None
+
+
+def acquire_publisher(root=None):
+    """非阻塞地拿 publisher.lock，拿到后一直持有到进程退出；返回本进程是否为发布者"""
+    global _publisher_fd
+    if _publisher_fd is not None or fcntl is None:
+        return True
+    root = root or shared_dir()
+    os.makedirs(root, exist_ok=True)
+    fd = os.open(os.path.join(root, "publisher.lock"), os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        os.close(fd)
+        return False
+    _publisher_fd = fd
+    return True
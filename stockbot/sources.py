@@ -0,0 +1,258 @@
+"""外部数据源：Yahoo 报价、Google News RSS、CNN 恐贪指数、FRED 宏观数据
+
+全部带进程级 TTL 缓存 (stockbot.cache)，每次外部调用都记一个诊断 span；
+请求经过各上游的限流/重试/熔断 (stockbot.resilience)，失败时缓存回退到上一次成功的值。
+"""
+import calendar
+import functools
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import quote
+
+import feedparser
+import pandas as pd
+import requests
+import yfinance as yf
+from requests.adapters import HTTPAdapter
+
+from . import settings
+from .cache import cached
+from .fred import describe_series, get_fred_store
+from .resilience import CircuitOpenError, upstream
+from .telemetry import external_span, wrap
+
+logger = logging.getLogger(__name__)
+
+
+@cached("quotes", skip=lambda quotes: quotes["price"].isna().all())
+def get_watchlist_quotes(tickers):
+    """一次批量请求获取所有资产的最新价/前收/涨跌幅，失败的 ticker 单独记录原因"""
+    tickers = list(dict.fromkeys(tickers))
+    quotes = pd.DataFrame(index=pd.Index(tickers, name="ticker"),
+                          columns=["price", "prev_close", "change_pct", "error"], dtype=object)
+    def download():
+        # 取 5 天而非 2 天：不同交易所 (港股/加密/期货) 休市日不同，保证每个资产都能拿到两根有效K线
+        with external_span("yahoo", f"quotes x{len(tickers)}") as span:
+            raw = yf.download(tickers, period="5d", interval="1d", auto_adjust=True,
+                              threads=True, progress=False)
+            span.frame_bytes = int(raw.memory_usage(deep=True).sum())
+        return raw
+
+    try:
+        # yfinance 被限流时不抛异常而是返回空表，按失败处理
+        raw = upstream("yahoo").call(download, is_failure=lambda raw: raw is None or raw.empty)
+        closes = raw['Close'] if isinstance(raw.columns, pd.MultiIndex) else raw[['Close']].set_axis(tickers[:1], axis=1)
+    except Exception as e:
+        quotes["error"] = f"Bulk download failed: {e}"
+        return quotes
+
+    for ticker in tickers:
+        if ticker not in closes.columns:
+            quotes.at[ticker, "error"] = "No data returned"
+            continue
+        hist = closes[ticker].dropna()
+        if hist.empty:
+            quotes.at[ticker, "error"] = "No data returned"
+            continue
+        last_price = float(hist.iloc[-1])
+        quotes.at[ticker, "price"] = last_price
+        if len(hist) > 1:
+            prev_price = float(hist.iloc[-2])
+            quotes.at[ticker, "prev_close"] = prev_price
+            quotes.at[ticker, "change_pct"] = (last_price - prev_price) / prev_price * 100
+    return quotes
+
+
+def format_quote(quotes, ticker):
+    """返回 (价格文本, 涨跌幅文本)，UI 与 Prompt 共用同一份格式"""
+    if ticker not in quotes.index or pd.isna(quotes.at[ticker, "price"]):
+        return "N/A", ""
+    price_str = f"{quotes.at[ticker, 'price']:.2f}"
+    change = quotes.at[ticker, "change_pct"]
+    if pd.isna(change):
+        return price_str, ""
+    emoji = "🔴" if change < 0 else "🟢"
+    return price_str, f"({emoji} {change:+.2f}%)"
+
+
+# === 新闻抓取：进程级共享的 HTTP 连接池 ===
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_http_session():
+    """进程级共享的 keep-alive 连接池 (所有会话/线程复用同一批到 news.google.com 的连接)"""
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=max(settings.NEWS_MAX_WORKERS, 10))
+            session.mount("https://", adapter)
+            session.headers.update({'User-Agent': 'Mozilla/5.0'})
+            _session = session
+        return _session
+
+
+def _news_item(entry):
+    """标题、链接，以及排序用的发布时间 (epoch 秒) 和来源"""
+    published = entry.get("published_parsed")
+    return {
+        "title": entry.title,
+        "link": entry.link,
+        "published": calendar.timegm(published) if published else None,
+        "source": entry.get("source", {}).get("title"),
+    }
+
+
+@cached("news", key=lambda query, session=None: query, skip=lambda news: not news)
+def get_news(query, session=None):
+    # 新闻抓取逻辑通用，无需翻译查询词（因为查询词本身多为英文或通用金融术语）
+    time_window = "when:3d"
+    q_upper = query.upper()
+    macro_keywords = ["CPI", "PCE", "INFLATION", "PAYROLL", "JOBS", "PMI", "FED", "GDP", "RECESSION"]
+    
+    if any(k in q_upper for k in macro_keywords):
+        time_window = "when:14d"
+    
+    search_query = f"{query} {time_window}"
+    encoded = quote(search_query)
+    url = f"https://news.google.com/rss/search?q={encoded}&hl=en-US&gl=US&ceid=US:en"
+
+    def fetch():
+        with external_span("rss", query) as span:
+            resp = (session or get_http_session()).get(url, timeout=6)
+            span.bytes = len(resp.content)
+            resp.raise_for_status()
+        return resp
+
+    try:
+        feed = feedparser.parse(upstream("rss").call(fetch).content)
+        return [_news_item(e) for e in feed.entries[:3]]
+    except CircuitOpenError:
+        return []
+    except Exception as e:
+        logger.warning("news %r failed: %s", query, e)
+        return []
+
+
+class NewsBatch:
+    """创建即在后台线程池开始抓取；as_completed() 在调用线程里按完成顺序产出 (idx, query, news)
+
+    refresh_ttl 非空时跳过缓存重新抓取，并以该 TTL 写回 (后台预热用)
+    """
+    def __init__(self, queries, max_workers=None, refresh_ttl=None):
+        self.queries = list(queries)
+        self.results = [[] for _ in self.queries]
+        self.started = time.perf_counter()
+        self._pool = None
+        self._futures = {}
+        if not self.queries:
+            return
+        max_workers = max_workers or settings.NEWS_MAX_WORKERS
+        session = get_http_session()
+        fetch = functools.partial(get_news.refresh, refresh_ttl) if refresh_ttl else get_news
+        self._pool = ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(self.queries))))
+        # wrap() 在提交时捕获扫描上下文，span 记到当前扫描上
+        self._futures = {self._pool.submit(wrap(fetch), q, session): idx for idx, q in enumerate(self.queries)}
+
+    def as_completed(self):
+        try:
+            for future in as_completed(self._futures):
+                idx = self._futures[future]
+                self.results[idx] = future.result()
+                yield idx, self.queries[idx], self.results[idx]
+        finally:
+            if self._pool:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+def fetch_news_batch(queries, max_workers=None, on_result=None, refresh_ttl=None):
+    """并发抓取多条新闻查询，结果按输入顺序返回；on_result(idx, query, news) 在调用线程中按完成顺序回调 (用于刷新进度条)"""
+    batch = NewsBatch(queries, max_workers, refresh_ttl)
+    for idx, query, news in batch.as_completed():
+        if on_result:
+            on_result(idx, query, news)
+    return batch.results
+
+
+@cached("fear_greed", skip=lambda text: text.startswith("N/A"))
+def get_cnn_fear_and_greed():
+    url = "https://production.dataviz.cnn.io/index/fearandgreed/graphdata"
+    headers = {
+        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
+        "Referer": "https://www.cnn.com/"
+    }
+
+    def fetch():
+        with external_span("cnn", "fear_and_greed") as span:
+            r = requests.get(url, headers=headers, timeout=5)
+            span.bytes = len(r.content)
+            r.raise_for_status()
+        return r
+
+    try:
+        data = upstream("cnn").call(fetch).json()
+        score = data['fear_and_greed']['score']
+        rating = data['fear_and_greed']['rating']
+        return f"{score:.0f} ({rating})"
+    except Exception as e:
+        return f"N/A (获取失败: {str(e)})"
+
+
+@cached("fred", key=lambda client, lang="CN": lang, skip=lambda text: text.startswith(("FRED Error", "⚠️")))
+def get_macro_hard_data(client, lang="CN"):
+    """从 FRED 获取数据，根据语言调整输出 (带日期版)；client 为 None 表示未配置 Key"""
+    if client is None:
+        return "⚠️ FRED Key Missing." if lang=="EN" else "⚠️ 未配置 FRED API Key。"
+
+    data_summary = ""
+    # 根据语言选择标签
+    if lang == "CN":
+        indicators = {
+            "Real GDP Growth (实际GDP)": "A191RL1Q225SBEA", 
+            "CPI (消费者物价)": "CPIAUCNS",
+            "PCE (名义PCE)": "PCEPI",          
+            "Core PCE (核心PCE)": "PCEPILFE", 
+            "Unemployment Rate (失业率)": "UNRATE",
+            "Non-Farm Payrolls (非农就业)": "PAYEMS",
+            "10Y Treasury Yield (10年美债)": "DGS10",
+            "Initial Jobless Claims (初请失业金)": "ICSA",
+            "Continuing Claims (续请失业金)": "CCSA" 
+        }
+        header = "--- 🔢 官方宏观硬数据 (FRED Verified) ---\n"
+    else:
+        indicators = {
+            "Real GDP Growth": "A191RL1Q225SBEA", 
+            "CPI (Consumer Price Index)": "CPIAUCNS",
+            "PCE (PCE Price Index)": "PCEPI",          
+            "Core PCE (Fed's Favorite)": "PCEPILFE", 
+            "Unemployment Rate": "UNRATE",
+            "Non-Farm Payrolls": "PAYEMS",
+            "10Y Treasury Yield": "DGS10",
+            "Initial Jobless Claims": "ICSA",
+            "Continuing Claims": "CCSA" 
+        }
+        header = "--- 🔢 Official Macro Hard Data (FRED Verified) ---\n"
+
+    data_summary += header
+
+    try:
+        # 并行抓取 + 本地缓存：未到发布日的序列直接读盘
+        all_series = get_fred_store().get_many(client, list(indicators.values()))
+        for name, series_id in indicators.items():
+            series = all_series.get(series_id)
+            if series is None or series.empty: continue
+
+            # === 新增：获取数据日期 ===
+            latest_date = series.index[-1].strftime('%Y-%m-%d')
+            display_val = describe_series(series_id, series)
+
+            # === 修改：输出时加上日期 ===
+            data_summary += f"* **{name}**: {display_val} [🗓️ {latest_date}]\n"
+            
+    except Exception as e:
+        return f"FRED Error: {str(e)}"
+
+    return data_summary
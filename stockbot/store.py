@@ -0,0 +1,245 @@
+"""本地增量日线行情库 (SQLite, 按 ticker + date 存储 OHLCV)
+
+冷启动时全量下载一次，之后每次只拉取最后一根已存K线之后的数据；
+同时回溯校验最近几根K线，发现复权价被修订 (分红/拆股) 时整段重拉该 ticker。
+"""
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+import pandas as pd
+
+from . import settings
+from .resilience import upstream
+from .telemetry import external_span
+
+FIELDS = ["Open", "High", "Low", "Close", "Volume"]
+NY_TZ = ZoneInfo("America/New_York")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS bars (
+    ticker TEXT NOT NULL,
+    date   TEXT NOT NULL,
+    open REAL, high REAL, low REAL, close REAL, volume REAL,
+    PRIMARY KEY (ticker, date)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS sync (
+    ticker     TEXT PRIMARY KEY,
+    first_date TEXT NOT NULL,
+    last_date  TEXT,
+    checked_at REAL NOT NULL
+);
+"""
+
+
+def last_session_close(now=None):
+    """最近一个已收盘交易日的收盘时刻 (美东 16:00，忽略节假日)"""
+    now = (now or datetime.now(NY_TZ)).astimezone(NY_TZ)
+    close = now.replace(hour=16, minute=0, second=0, microsecond=0)
+    if now < close:
+        close -= timedelta(days=1)
+    while close.weekday() >= 5:
+        close -= timedelta(days=1)
+    return close
+
+
+def is_market_open(now=None):
+    now = (now or datetime.now(NY_TZ)).astimezone(NY_TZ)
+    if now.weekday() >= 5:
+        return False
+    return now.replace(hour=9, minute=30, second=0, microsecond=0) <= now < now.replace(hour=16, minute=0, second=0, microsecond=0)
+
+
+def next_market_open(now=None):
+    """下一次开盘时刻 (美东 9:30，忽略节假日)；盘中调用返回下一个交易日的开盘"""
+    now = (now or datetime.now(NY_TZ)).astimezone(NY_TZ)
+    opening = now.replace(hour=9, minute=30, second=0, microsecond=0)
+    if now >= opening:
+        opening += timedelta(days=1)
+    while opening.weekday() >= 5:
+        opening += timedelta(days=1)
+    return opening
+
+
+class PriceStore:
+    def __init__(self, path=None, revalidate_bars=None, recheck_seconds=None, tolerance=1e-4):
+        self.path = path or os.path.join(settings.DATA_DIR, "prices.sqlite")
+        self.revalidate_bars = settings.PRICE_REVALIDATE_BARS if revalidate_bars is None else revalidate_bars
+        self.recheck_seconds = settings.PRICE_RECHECK_SECONDS if recheck_seconds is None else recheck_seconds
+        self.tolerance = tolerance
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    # --- 读取 ---
+    def get_closes(self, tickers, start):
+        """返回 start 以来的收盘价宽表 (index=日期, columns=ticker)，必要时先增量同步"""
+        return self.get_field(tickers, start, "Close")
+
+    def get_field(self, tickers, start, field="Close"):
+        start = pd.Timestamp(start).strftime("%Y-%m-%d")
+        tickers = list(dict.fromkeys(tickers))
+        self.refresh(tickers, start)
+        column = field.lower()
+        marks = ",".join("?" * len(tickers))
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT date, ticker, {column} FROM bars WHERE ticker IN ({marks}) AND date >= ?",
+                (*tickers, start),
+            ).fetchall()
+        if not rows:
+            return pd.DataFrame(columns=tickers)
+        long = pd.DataFrame(rows, columns=["date", "ticker", column])
+        wide = long.pivot(index="date", columns="ticker", values=column)
+        wide.index = pd.to_datetime(wide.index)
+        wide.columns.name = None
+        return wide.reindex(columns=[t for t in tickers if t in wide.columns]).sort_index()
+
+    # --- 同步 ---
+    def refresh(self, tickers, start):
+        with self._lock:
+            now = time.time()
+            with self._connect() as conn:
+                meta = {
+                    t: (first, last, checked)
+                    for t, first, last, checked in conn.execute(
+                        f"SELECT ticker, first_date, last_date, checked_at FROM sync WHERE ticker IN ({','.join('?' * len(tickers))})",
+                        tickers,
+                    )
+                }
+
+            full, incremental = [], []
+            for t in tickers:
+                if t in meta and self._is_fresh(meta[t][2], now, meta[t][1] is not None) and start >= meta[t][0]:
+                    continue
+                if t not in meta or meta[t][1] is None or start < meta[t][0]:
+                    full.append(t)
+                else:
+                    incremental.append(t)
+
+            if incremental:
+                full += self._sync_incremental(incremental, meta, now)
+            if full:
+                first = min([start] + [meta[t][0] for t in full if t in meta])
+                self._sync_full(full, first, now)
+
+    def _is_fresh(self, checked_at, now, synced=True):
+        """synced=False 表示上次全量下载失败 (sync 里只有占位行)：只按 recheck_seconds 退避，到期就重试"""
+        if now - checked_at < self.recheck_seconds:
+            return True
+        # 收盘后检查过一次，下一次开盘前不可能有新K线
+        return synced and not is_market_open() and checked_at >= last_session_close().timestamp()
+
+    def _sync_full(self, tickers, start, now):
+        frames = _download(tickers, start=start)
+        with self._connect() as conn:
+            for t in tickers:
+                bars = frames.get(t)
+                if bars is None:
+                    # 下载失败不覆盖已有数据；还没有数据的 ticker 记一笔 (或刷新) 空同步，recheck_seconds 后再重试全量
+                    conn.execute(
+                        "INSERT INTO sync (ticker, first_date, last_date, checked_at) VALUES (?, ?, NULL, ?) "
+                        "ON CONFLICT (ticker) DO UPDATE SET checked_at = excluded.checked_at WHERE last_date IS NULL",
+                        (t, start, now),
+                    )
+                    continue
+                conn.execute("DELETE FROM bars WHERE ticker = ?", (t,))
+                _upsert(conn, t, bars)
+                conn.execute(
+                    "INSERT OR REPLACE INTO sync (ticker, first_date, last_date, checked_at) VALUES (?, ?, ?, ?)",
+                    (t, start, bars.index[-1].strftime("%Y-%m-%d"), now),
+                )
+
+    def _sync_incremental(self, tickers, meta, now):
+        """拉取回溯窗口 + 新K线；返回需要整段重拉的 ticker (复权价被修订)"""
+        with self._connect() as conn:
+            anchors = {}
+            for t in tickers:
+                row = conn.execute(
+                    "SELECT date FROM bars WHERE ticker = ? ORDER BY date DESC LIMIT 1 OFFSET ?",
+                    (t, max(self.revalidate_bars - 1, 0)),
+                ).fetchone()
+                anchors[t] = row[0] if row else meta[t][0]
+        frames = _download(tickers, start=min(anchors.values()))
+
+        restated = []
+        with self._connect() as conn:
+            for t in tickers:
+                bars = frames.get(t)
+                if bars is None:
+                    # 本次请求失败：保留已有数据，下次再试
+                    continue
+                stored = dict(conn.execute(
+                    "SELECT date, close FROM bars WHERE ticker = ? AND date >= ?", (t, anchors[t])
+                ).fetchall())
+                closes = bars["Close"]
+                fetched = dict(zip(closes.index.strftime("%Y-%m-%d"), closes.values))
+                # 回溯窗口只比对已收盘的K线，最后一根 (可能是盘中) 直接覆盖
+                overlap = [d for d in stored if d != meta[t][1] and d in fetched]
+                if any(abs(fetched[d] - stored[d]) > self.tolerance * abs(stored[d]) for d in overlap):
+                    restated.append(t)
+                    continue
+                _upsert(conn, t, bars[bars.index >= pd.Timestamp(anchors[t])])
+                conn.execute(
+                    "UPDATE sync SET last_date = ?, checked_at = ? WHERE ticker = ?",
+                    (bars.index[-1].strftime("%Y-%m-%d"), now, t),
+                )
+        return restated
+
+
+def _download(tickers, start):
+    """一次批量请求，返回 {ticker: OHLCV DataFrame}，无数据的 ticker 不在结果中"""
+    import yfinance as yf  # 导入较慢，只在真正需要下载时加载
+
+    def download():
+        with external_span("yahoo", f"prices x{len(tickers)} from {start}") as span:
+            raw = yf.download(tickers, start=start, interval="1d", auto_adjust=True,
+                              threads=True, progress=False, multi_level_index=True)
+            span.frame_bytes = int(raw.memory_usage(deep=True).sum()) if raw is not None else 0
+        return raw
+
+    # 增量更新在没有新K线时本来就可能是空表，这里不把空结果当失败
+    raw = upstream("yahoo").call(download)
+    frames = {}
+    if raw is None or raw.empty:
+        return frames
+    for t in tickers:
+        try:
+            bars = raw.xs(t, axis=1, level=1)[FIELDS].dropna(subset=["Close"])
+        except KeyError:
+            continue
+        if not bars.empty:
+            frames[t] = bars
+    return frames
+
+
+def _upsert(conn, ticker, bars):
+    conn.executemany(
+        "INSERT OR REPLACE INTO bars (ticker, date, open, high, low, close, volume) VALUES (?, ?, ?, ?, ?, ?, ?)",
+        [
+            (ticker, d.strftime("%Y-%m-%d"), *(None if pd.isna(v) else float(v) for v in row))
+            for d, row in zip(bars.index, bars[FIELDS].itertuples(index=False))
+        ],
+    )
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_price_store():
+    """进程级单例"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = PriceStore()
+        return _store
@@ -0,0 +1,163 @@
+"""扫描诊断：阶段耗时 + 每次外部调用的 span
+
+每次扫描一个 ScanTimer。扫描线程里 activate() 之后，同一线程 (以及通过 wrap() 提交到线程池的任务)
+里的 external_span() 都会记到这次扫描上，并以 JSON 行写到 "stockbot.spans" 日志。
+最近几次扫描保存在进程内，供基准测试脚本和侧边栏诊断面板读取。
+"""
+import contextvars
+import json
+import logging
+import sys
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+from . import settings
+
+span_logger = logging.getLogger("stockbot.spans")
+if not span_logger.handlers:
+    _handler = logging.FileHandler(settings.SPAN_LOG) if settings.SPAN_LOG else logging.StreamHandler(sys.stderr)
+    _handler.setFormatter(logging.Formatter("%(message)s"))
+    span_logger.addHandler(_handler)
+    span_logger.setLevel(logging.INFO)
+    span_logger.propagate = False
+
+_current = contextvars.ContextVar("stockbot_scan", default=None)
+_recent = deque(maxlen=20)
+_recent_lock = threading.Lock()
+
+
+class Span:
+    __slots__ = ("kind", "name", "start", "seconds", "bytes", "frame_bytes", "status", "error", "thread")
+
+    def __init__(self, kind, name):
+        self.kind = kind
+        self.name = name
+        self.start = time.perf_counter()
+        self.seconds = None
+        self.bytes = None
+        self.frame_bytes = None
+        self.status = "ok"
+        self.error = None
+        self.thread = threading.current_thread().name
+
+    def as_dict(self, origin=None):
+        return {
+            "kind": self.kind,
+            "name": self.name,
+            "start": round(self.start - origin, 4) if origin is not None else None,
+            "seconds": round(self.seconds, 4) if self.seconds is not None else None,
+            "bytes": self.bytes,
+            "frame_bytes": self.frame_bytes,
+            "status": self.status,
+            "error": self.error,
+            "thread": self.thread,
+        }
+
+
+class ScanTimer:
+    def __init__(self, label=""):
+        self.label = label
+        self.started = time.perf_counter()
+        self.started_at = time.time()
+        self.stages = []  # {"stage", "start", "seconds"}，start 为相对扫描开始的秒数
+        self.spans = []
+        self.coalesced = {}  # source -> 等待别的会话正在进行的同一次请求、没有自己发请求的次数
+        self.total = None
+        self._lock = threading.Lock()
+
+    def add(self, name, start, seconds):
+        with self._lock:
+            self.stages.append({"stage": name, "start": round(start - self.started, 4), "seconds": round(seconds, 4)})
+        _emit({"event": "stage", "scan": self.label, "stage": name, "seconds": round(seconds, 4)})
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, start, time.perf_counter() - start)
+
+    def add_span(self, span):
+        with self._lock:
+            self.spans.append(span)
+
+    def add_coalesced(self, source):
+        with self._lock:
+            self.coalesced[source] = self.coalesced.get(source, 0) + 1
+
+    def activate(self):
+        """把本次扫描设为当前线程的上下文"""
+        _current.set(self)
+
+    def finish(self):
+        self.total = round(time.perf_counter() - self.started, 4)
+        _emit({"event": "scan", "scan": self.label, "seconds": self.total,
+               "calls": len(self.spans), "errors": sum(s.status != "ok" for s in self.spans),
+               "coalesced": sum(self.coalesced.values())})
+
+    def as_dict(self):
+        with self._lock:
+            return {
+                "label": self.label,
+                "started_at": self.started_at,
+                "total": self.total,
+                "stages": list(self.stages),
+                "spans": [s.as_dict(self.started) for s in self.spans],
+                "coalesced": dict(self.coalesced),
+            }
+
+
+def _emit(record):
+    span_logger.info(json.dumps({"ts": round(time.time(), 3), **record}, ensure_ascii=False, default=str))
+
+
+@contextmanager
+def external_span(kind, name):
+    """包住一次外部调用：记录耗时/字节数/错误；调用方可设置 span.bytes
+
+    bytes 只记网络负载的实际长度；yfinance / fredapi 拿不到原始响应，改记解析后 DataFrame 的内存占用
+    span.frame_bytes (两者单位不同，不要相加)
+    """
+    span = Span(kind, name)
+    try:
+        yield span
+    except BaseException as e:
+        span.status = "error"
+        span.error = f"{type(e).__name__}: {e}"[:300]
+        raise
+    finally:
+        span.seconds = time.perf_counter() - span.start
+        scan = _current.get()
+        if scan is not None:
+            scan.add_span(span)
+        _emit({"event": "call", "scan": scan.label if scan else None,
+               **span.as_dict(scan.started if scan else None)})
+
+
+def note_coalesced(source):
+    """记到当前扫描上：这次没有发请求，而是复用了别的会话正在进行的同一次请求"""
+    scan = _current.get()
+    if scan is not None:
+        scan.add_coalesced(source)
+
+
+def wrap(fn):
+    """线程池任务继承提交线程的扫描上下文"""
+    ctx = contextvars.copy_context()
+    return lambda *args, **kwargs: ctx.run(fn, *args, **kwargs)
+
+
+def start_scan(label=""):
+    timer = ScanTimer(label)
+    timer.activate()
+    with _recent_lock:
+        _recent.append(timer)
+    return timer
+
+
+def recent_scans():
+    with _recent_lock:
+        return list(_recent)
@@ -0,0 +1,253 @@
+"""盯盘模式：轮询增量K线，只在输入变化时重算下游，状态切换时发告警
+
+    python -m stockbot watch --lang CN --webhook http://127.0.0.1:9000/hook
+
+数据只有两条来源，都不会反复下载一年的历史：
+  * 盘中K线：stockbot.intraday 的增量状态 (启动时拉最近几天做种子，之后每次只取当天)
+  * 日线：本地行情库 (stockbot.store)，以最近一个收盘日为 key、只用截至该日的K线，一天只重算一次
+每个派生量是一个 Stage：输入 key 与上次相同就沿用上次结果，不调用计算函数。
+告警只看取值的变化 (第一次评估只建立基线)，新取值要在 WATCH_CONFIRM_BARS 根K线上都成立才告警：
+  light       红绿灯颜色切换 (评分跨过 40 / 70)
+  vix         VIX 进出 <15 低位区 / >25 高位区
+  divergence  盘中 SPY 在 50 根均线上方而 RSP/SPY 跌破 20 根均线 (出现 / 消失)
+  breadth     日线 RSP/SPY 广度背离 (analyze_market_breadth) 出现 / 消失
+告警追加写入 JSON 行文件 (alert_file())，配置了 WATCH_WEBHOOK 时同时 POST 过去。
+"""
+import json
+import logging
+import os
+import time
+from datetime import datetime
+
+from . import settings
+from .breadth import scan_breadth
+from .intraday import IntradayState
+from .radar import analyze_market_breadth
+from .resilience import upstream
+from .store import NY_TZ, is_market_open, last_session_close, next_market_open
+
+logger = logging.getLogger(__name__)
+
+# 与 MarketRadarSystem.score_inputs 的 VIX 区间一致
+VIX_LOW, VIX_HIGH = 15, 25
+
+_UNSET = object()
+
+
+class Stage:
+    """inputs() 给出的 key 变化时才调用 compute(key) 重算；计算失败时不记 key，retry_seconds 后再试"""
+
+    def __init__(self, name, inputs, compute, retry_seconds=0):
+        self.name = name
+        self.inputs = inputs
+        self.compute = compute
+        self.retry_seconds = retry_seconds
+        self.key = _UNSET
+        self.value = None
+        self.runs = 0
+        self.failed_at = None
+
+    def evaluate(self):
+        """返回本次是否重算"""
+        key = self.inputs()
+        if key == self.key:
+            return False
+        if self.failed_at is not None and time.monotonic() - self.failed_at < self.retry_seconds:
+            return False
+        try:
+            self.value = self.compute(key)
+        except Exception as e:
+            self.failed_at = time.monotonic()
+            logger.warning("watch stage %s failed: %s", self.name, e)
+            return False
+        self.key = key
+        self.runs += 1
+        self.failed_at = None
+        return True
+
+
+def vix_band(vix):
+    if vix is None:
+        return None
+    return "high" if vix > VIX_HIGH else "low" if vix < VIX_LOW else "normal"
+
+
+def intraday_divergence(inputs):
+    """SPY 在 50 根均线上方 (趋势向上) 但 RSP/SPY 低于 20 根均线：上涨只靠权重股；均线未填满时返回 None"""
+    values = [inputs[k] for k in ("spy", "spy_ma50", "breadth", "breadth_ma20")]
+    if any(v is None or v != v for v in values):
+        return None
+    spy, spy_ma50, breadth, breadth_ma20 = values
+    return bool(spy > spy_ma50 and breadth < breadth_ma20)
+
+
+# === 告警输出 ===
+def alert_file():
+    """WATCH_ALERT_FILE，未配置时为 <DATA_DIR>/alerts.jsonl"""
+    return settings.WATCH_ALERT_FILE or os.path.join(settings.DATA_DIR, "alerts.jsonl")
+
+
+class AlertSink:
+    """JSON 行文件 + 可选 webhook；webhook 走 upstream("webhook") 的限流/重试，失败只记日志"""
+
+    def __init__(self, path=None, webhook=None):
+        self.path = path
+        self.webhook = webhook
+        self.sent = 0
+        self.failed = 0
+
+    def emit(self, alert):
+        if self.path:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(alert, ensure_ascii=False, default=str) + "\n")
+        if self.webhook:
+            try:
+                upstream("webhook").call(lambda: self._post(alert))
+                self.sent += 1
+            except Exception as e:
+                self.failed += 1
+                logger.warning("alert webhook failed: %s", e)
+
+    def _post(self, alert):
+        import requests
+
+        response = requests.post(self.webhook, data=json.dumps(alert, ensure_ascii=False, default=str).encode("utf-8"),
+                                 headers={"Content-Type": "application/json"}, timeout=5)
+        response.raise_for_status()
+        return response
+
+
+# === 盯盘 ===
+class Watcher:
+    """一次 tick：推进盘中K线 -> 按需重算各 Stage -> 与上次的观测值比较，变化即告警"""
+
+    def __init__(self, lang="CN", sink=None, state=None, confirm=None):
+        self.lang = lang
+        self.confirm = confirm or settings.WATCH_CONFIRM_BARS
+        self.sink = sink or AlertSink()
+        self.state = state or IntradayState()
+        self.daily = Stage("daily", lambda: last_session_close().date().isoformat(), self._daily,
+                           retry_seconds=settings.PRICE_RECHECK_SECONDS)
+        self.light = Stage("light", lambda: (self._bars_key(), self.daily.key), self._light)
+        self.vix = Stage("vix", lambda: self.state.last.get('^VIX'), vix_band)
+        self.divergence = Stage("divergence", self._bars_key, lambda key: intraday_divergence(self.state.inputs()))
+        self.stages = [self.daily, self.light, self.vix, self.divergence]
+        self.observed = {}
+        self.pending = {}  # rule -> (待确认的新取值, 已出现的K线时间)
+        self.ticks = 0
+        self.alerts = 0
+
+    def _bars_key(self):
+        """最新K线时间 + 各 ticker 最新价：同一根K线价格没变时 key 不变"""
+        return self.state.last_ts, tuple(sorted(self.state.last.items()))
+
+    def _daily(self, session):
+        """只用截至 session (最近一个收盘日) 的日线：行情库里当天盘中的未完成K线不参与，结果与 key 一致"""
+        frame, signal = analyze_market_breadth(until=session)
+        if frame is None:
+            raise RuntimeError(signal)
+        return {"session": session, "signal": signal, "divergence": "DIVERGENCE" in signal,
+                "constituents": scan_breadth(until=session)}
+
+    def _light(self, key):
+        constituents = self.daily.value["constituents"] if self.daily.value else None
+        return self.state.traffic_light(self.lang, constituents)
+
+    def observe(self):
+        """各告警规则当前的取值；算不出来的为 None (不参与比较)"""
+        light = self.light.value
+        return {
+            "light": light["color"] if light else None,
+            "vix": self.vix.value,
+            "divergence": self.divergence.value,
+            "breadth": self.daily.value["divergence"] if self.daily.value else None,
+        }
+
+    def tick(self):
+        """拉新K线并按需重算，返回本次触发的告警列表"""
+        self.ticks += 1
+        self.state.refresh()
+        for stage in self.stages:
+            stage.evaluate()
+        alerts = []
+        for rule, value in self.observe().items():
+            if value is None:
+                continue
+            previous = self.observed.get(rule)
+            if previous is None or value == previous:
+                self.observed[rule] = value
+                self.pending.pop(rule, None)
+                continue
+            # 新取值要在 confirm 根不同的K线上都成立才算切换，避免在阈值附近来回抖动时反复告警
+            pending = self.pending.get(rule)
+            if pending is None or pending[0] != value:
+                pending = self.pending[rule] = (value, set())
+            pending[1].add(self.state.last_ts)
+            if len(pending[1]) >= self.confirm:
+                alerts.append(self._alert(rule, previous, value))
+                self.observed[rule] = value
+                del self.pending[rule]
+        for alert in alerts:
+            logger.info("alert: %s", alert["message"])
+            self.sink.emit(alert)
+        self.alerts += len(alerts)
+        return alerts
+
+    def _alert(self, rule, previous, value):
+        light = self.light.value or {}
+        return {
+            "ts": datetime.now(NY_TZ).isoformat(timespec="seconds"),
+            "rule": rule,
+            "from": previous,
+            "to": value,
+            "message": self._message(rule, previous, value),
+            "bar_time": self.state.last_ts,
+            "status": light.get("status"),
+            "score": light.get("score"),
+            "vix": self.state.last.get('^VIX'),
+        }
+
+    def _message(self, rule, previous, value):
+        is_cn = (self.lang == "CN")
+        light = self.light.value or {}
+        if rule == "light":
+            return (f"红绿灯切换为 {light['status']} (评分 {light['score']})" if is_cn else
+                    f"Traffic light changed to {light['status']} (score {light['score']})")
+        if rule == "vix":
+            vix = self.state.last.get('^VIX')
+            bands = ({"high": f"> {VIX_HIGH} 高位区", "low": f"< {VIX_LOW} 低位区", "normal": "正常区间"} if is_cn else
+                     {"high": f"> {VIX_HIGH} high band", "low": f"< {VIX_LOW} low band", "normal": "normal band"})
+            return (f"VIX {vix:.2f} 从{bands[previous]}进入{bands[value]}" if is_cn else
+                    f"VIX {vix:.2f} moved from {bands[previous]} to {bands[value]}")
+        if rule == "divergence":
+            if is_cn:
+                return "⚠️ 盘中广度背离：SPY 走强但 RSP/SPY 跌破均线" if value else "盘中广度背离解除"
+            return ("⚠️ Intraday breadth divergence: SPY up, RSP/SPY below its MA" if value else
+                    "Intraday breadth divergence cleared")
+        return self.daily.value["signal"]
+
+    def stats(self):
+        return {"ticks": self.ticks, "alerts": self.alerts, "bars": self.state.bars,
+                "stage_runs": {stage.name: stage.runs for stage in self.stages}}
+
+    def run(self, interval=None, until_close=False, on_alert=None):
+        """一直轮询；休市时睡到下次开盘 (until_close=True 时跑完一个交易时段、收盘后返回)"""
+        interval = interval or settings.WATCH_POLL_SECONDS
+        opened = False
+        while True:
+            try:
+                for alert in self.tick():
+                    if on_alert:
+                        on_alert(alert)
+            except Exception:
+                logger.exception("watch tick failed")
+            if is_market_open():
+                opened = True
+                time.sleep(interval)
+            elif until_close and opened:
+                return self.stats()
+            else:
+                wait = (next_market_open() - datetime.now(NY_TZ)).total_seconds()
+                logger.info("market closed, sleeping %.0fs until next open", wait)
+                time.sleep(max(interval, wait))
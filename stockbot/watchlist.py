@@ -0,0 +1,159 @@
+"""资产清单与宏观话题配置 (根据语言返回不同名称)"""
+import functools
+
+
+@functools.lru_cache(maxsize=None)
+def get_watchlist_groups(lang):
+    """每种语言只构建一次 (调用方只读，不要修改返回的 dict)"""
+    if lang == "CN":
+        return {
+            "🚀 市场总览": {
+                "^GSPC":   ["标普500 (美股基准)", "S&P 500 market analysis"],
+                "^IXIC":   ["纳斯达克 (科技风向)", "Nasdaq Composite analysis"],
+                "^DJI":    ["道琼斯 (传统蓝筹)", "Dow Jones Industrial Average news"],
+                "^RUT":    ["罗素2000 (美国实体经济)", "Russell 2000 small cap stocks"],
+                "^VIX":    ["VIX 恐慌指数", "CBOE VIX volatility index market fear"],
+                "^VXN":    ["纳指恐慌指数", "Nasdaq Volatility Index"],
+            },
+            "👑 科技七巨头": {
+                "NVDA":    ["英伟达 (AI算力)", "Nvidia stock news"],
+                "MSFT":    ["微软 (AI应用)", "Microsoft stock AI news"],
+                "AAPL":    ["苹果 (消费电子)", "Apple Inc stock news"],
+                "GOOGL":   ["谷歌 (搜索/AI)", "Alphabet Google stock news"],
+                "AMZN":    ["亚马逊 (云/电商)", "Amazon stock news"],
+                "META":    ["Meta (社交/广告)", "Meta Platforms stock news"],
+                "TSLA":    ["特斯拉 (电车/机器人)", "Tesla stock news"],
+            },
+            "⚙️ 硬核半导体": {
+                "TSM":     ["台积电 (代工霸主)", "TSMC stock news"],
+                "ASML":    ["ASML (光刻机)", "ASML stock lithography"],
+                "AVGO":    ["博通 (网络芯片)", "Broadcom stock news"],
+                "AMD":     ["AMD (算力老二)", "AMD stock news"],
+                "MU":      ["美光 (存储芯片)", "Micron Technology stock news"],
+                "SMH":     ["半导体ETF", "VanEck Vectors Semiconductor ETF"],
+            },
+            "💰 宏观流动性": {
+                "^TNX":    ["10年期美债", "US 10 year treasury yield"],
+                "DX-Y.NYB": ["美元指数", "US Dollar index"],
+                "JPY=X":   ["美元兑日元", "USD JPY exchange rate"],
+                "TLT":     ["20年+美债", "iShares 20+ Year Treasury Bond ETF"],
+                "BTC-USD": ["比特币", "Bitcoin crypto market sentiment"],
+            },
+            "🚨 信用与避险": {
+                "HYG":     ["高收益债ETF (垃圾债)", "High Yield Corporate Bond ETF default risk"],
+                "LQD":     ["投资级债ETF", "Investment Grade Corporate Bond ETF"],
+                "GLD":     ["黄金ETF (终极避险)", "Gold price investing safe haven"],
+                "SLV":     ["白银ETF", "Silver price investing"],
+            },
+            "🏭 周期与通胀": {
+                "CL=F":    ["原油期货 (通胀源头)", "Crude oil price energy news"],
+                "XLE":     ["能源板块ETF", "US Energy Sector ETF"],
+                "XLF":     ["金融板块 (银行)", "US Financials Sector ETF bank earnings"],
+                "XLI":     ["工业板块", "US Industrials Sector ETF economy"],
+                "CAT":     ["卡特彼勒 (工业风向)", "Caterpillar stock economy"],
+                "JETS":    ["航空ETF (地缘/消费)", "U.S. Global Jets ETF travel demand"],
+            },
+            "🛡️ 防御板块": {
+                "XLV":     ["医疗健康ETF", "Health Care Sector ETF"],
+                "XLP":     ["必需消费ETF", "Consumer Staples Sector ETF"],
+                "WMT":     ["沃尔玛 (零售巨头)", "Walmart stock consumer spending"],
+                "KO":      ["可口可乐", "Coca-Cola stock defensive"],
+                "UNH":     ["联合健康", "UnitedHealth Group stock"],
+            },
+            "🇨🇳 中国与新兴": {
+                "^HSI":    ["恒生指数", "Hang Seng Index Hong Kong"],
+                "FXI":     ["中国大盘股ETF", "China large cap ETF investing"],
+                "KWEB":    ["中国互联网ETF", "China internet ETF tech regulation"],
+                "EEM":     ["新兴市场ETF", "Emerging Markets ETF growth"],
+            }
+        }
+    else:
+        # 英文版配置
+        return {
+            "🚀 Market Overview": {
+                "^GSPC":   ["S&P 500", "S&P 500 market analysis"],
+                "^IXIC":   ["Nasdaq Composite", "Nasdaq Composite analysis"],
+                "^DJI":    ["Dow Jones", "Dow Jones Industrial Average news"],
+                "^RUT":    ["Russell 2000", "Russell 2000 small cap stocks"],
+                "^VIX":    ["VIX Index", "CBOE VIX volatility index market fear"],
+                "^VXN":    ["Nasdaq VIX", "Nasdaq Volatility Index"],
+            },
+            "👑 Mag 7 Tech": {
+                "NVDA":    ["Nvidia", "Nvidia stock news"],
+                "MSFT":    ["Microsoft", "Microsoft stock AI news"],
+                "AAPL":    ["Apple", "Apple Inc stock news"],
+                "GOOGL":   ["Google", "Alphabet Google stock news"],
+                "AMZN":    ["Amazon", "Amazon stock news"],
+                "META":    ["Meta", "Meta Platforms stock news"],
+                "TSLA":    ["Tesla", "Tesla stock news"],
+            },
+            "⚙️ Semiconductors": {
+                "TSM":     ["TSMC", "TSMC stock news"],
+                "ASML":    ["ASML", "ASML stock lithography"],
+                "AVGO":    ["Broadcom", "Broadcom stock news"],
+                "AMD":     ["AMD", "AMD stock news"],
+                "MU":      ["Micron", "Micron Technology stock news"],
+                "SMH":     ["Semi ETF (SMH)", "VanEck Vectors Semiconductor ETF"],
+            },
+            "💰 Macro Liquidity": {
+                "^TNX":    ["10Y Treasury", "US 10 year treasury yield"],
+                "DX-Y.NYB": ["DXY Index", "US Dollar index"],
+                "JPY=X":   ["USD/JPY", "USD JPY exchange rate"],
+                "TLT":     ["20Y+ Treasury ETF", "iShares 20+ Year Treasury Bond ETF"],
+                "BTC-USD": ["Bitcoin", "Bitcoin crypto market sentiment"],
+            },
+            "🚨 Credit & Safety": {
+                "HYG":     ["High Yield Bond", "High Yield Corporate Bond ETF default risk"],
+                "LQD":     ["Inv Grade Bond", "Investment Grade Corporate Bond ETF"],
+                "GLD":     ["Gold ETF", "Gold price investing safe haven"],
+                "SLV":     ["Silver ETF", "Silver price investing"],
+            },
+            "🏭 Cyclical/Inflation": {
+                "CL=F":    ["Crude Oil", "Crude oil price energy news"],
+                "XLE":     ["Energy ETF", "US Energy Sector ETF"],
+                "XLF":     ["Financials ETF", "US Financials Sector ETF bank earnings"],
+                "XLI":     ["Industrials ETF", "US Industrials Sector ETF economy"],
+                "CAT":     ["Caterpillar", "Caterpillar stock economy"],
+                "JETS":    ["Jets ETF", "U.S. Global Jets ETF travel demand"],
+            },
+            "🛡️ Defensive": {
+                "XLV":     ["Healthcare ETF", "Health Care Sector ETF"],
+                "XLP":     ["Staples ETF", "Consumer Staples Sector ETF"],
+                "WMT":     ["Walmart", "Walmart stock consumer spending"],
+                "KO":      ["Coca-Cola", "Coca-Cola stock defensive"],
+                "UNH":     ["UnitedHealth", "UnitedHealth Group stock"],
+            },
+            "🇨🇳 China/Emerging": {
+                "^HSI":    ["Hang Seng", "Hang Seng Index Hong Kong"],
+                "FXI":     ["China Large Cap", "China large cap ETF investing"],
+                "KWEB":    ["China Internet", "China internet ETF tech regulation"],
+                "EEM":     ["Emerging Markets", "Emerging Markets ETF growth"],
+            }
+        }
+
+SPECIAL_TOPICS = [
+    "Federal Reserve balance sheet QE QT expansion contraction", 
+    "Fed reverse repo facility RRP liquidity",          
+    "US Federal Reserve interest rate decision",        
+    "Fed Chair speech testimony",         
+    "Bank of Japan Governor Ueda monetary policy",      
+    "US GDP growth rate",                        
+    "US ISM Manufacturing PMI report",                  
+    "US ISM Services PMI report economy",               
+    "US inflation CPI PCE data report",                 
+    "US Core PCE Price Index inflation report",         
+    "US Non-farm payrolls unemployment rate",           
+    "US ADP National Employment Report private payrolls", 
+    "US unemployment rate jobless claims data",         
+    "US Initial and Continuing Jobless Claims report", 
+    "Donald Trump economic policy tariffs trade",       
+    "US government debt ceiling budget deficit",        
+    "Geopolitical tension Middle East Israel Iran",     
+    "Russia Ukraine war latest news",                   
+    "US China trade war tariffs restrictions",          
+    "US economic recession soft landing probability",   
+    "Global supply chain disruption shipping",          
+    "US commercial real estate crisis office",                  
+    "Artificial Intelligence regulation safety",        
+    "Global energy transition electric vehicles demand" 
+]
@@ -0,0 +1,67 @@
+"""回测的向量化评分必须与实时红绿灯 (MarketRadarSystem.score_inputs) 逐日一致"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from stockbot import settings
+from stockbot.backtest import score_components
+from stockbot.radar import MarketRadarSystem
+
+SECTORS = ["XLK", "XLI", "XLU", "XLP"]
+
+
+def price_frame(days=260, seed=0):
+    """随机游走的日线宽表；VIX 在 10~30 之间摆动，各分项在样本里都会翻转"""
+    rng = np.random.default_rng(seed)
+    index = pd.bdate_range(end="2025-06-27", periods=days)
+    tickers = ["SPY", "RSP"] + SECTORS
+    closes = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, (days, len(tickers))), axis=0))
+    data = pd.DataFrame(closes, index=index, columns=tickers)
+    data["^VIX"] = 20 + 10 * np.sin(np.arange(days) / 9) + rng.normal(0, 1, days)
+    return data
+
+
+def participation_frame(index, seed=1):
+    """成分股逐日指标，取值离 participation_points 的阈值足够远 (快照里的四舍五入不影响分项)"""
+    rng = np.random.default_rng(seed)
+    n = len(index)
+    return pd.DataFrame({
+        "pct_above_50": rng.choice([30.0, 70.0], n),
+        "pct_above_200": rng.choice([30.0, 50.0, 70.0], n),
+        "mcclellan": rng.choice([-20.0, 20.0], n),
+        "new_highs": rng.integers(0, 20, n),
+        "new_lows": rng.integers(0, 20, n),
+    }, index=index)
+
+
+def snapshot(row):
+    """与 breadth.constituent_breadth 同样字段的单日快照"""
+    return {"sp500": {"index": "S&P 500", "pct_above_50": round(float(row["pct_above_50"]), 1),
+                      "pct_above_200": round(float(row["pct_above_200"]), 1),
+                      "mcclellan": round(float(row["mcclellan"]), 1),
+                      "new_highs": int(row["new_highs"]), "new_lows": int(row["new_lows"])}}
+
+
+@pytest.mark.parametrize("drop", [[], ["RSP"], SECTORS, ["RSP"] + SECTORS, ["^VIX"]],
+                         ids=["all", "no-rsp", "no-sectors", "spy-vix-only", "no-vix"])
+def test_backtest_score_matches_live_score(drop):
+    data = price_frame().drop(columns=drop)
+    components = score_components(data)
+    radar = MarketRadarSystem("EN")
+    # 每个交易日截断一次，相当于那天收盘后跑实时评分
+    for end in range(30, len(data) + 1, 3):
+        window = data.iloc[:end]
+        live = radar.score_inputs(radar.traffic_light_inputs(window))
+        assert components["score"].iloc[end - 1] == live["score"], window.index[-1]
+
+
+def test_participation_points_match(monkeypatch):
+    monkeypatch.setattr(settings, "BREADTH_SCORE", True)
+    data = price_frame()
+    participation = participation_frame(data.index)
+    components = score_components(data, participation)
+    radar = MarketRadarSystem("EN")
+    for end in range(60, len(data) + 1, 3):
+        window = data.iloc[:end]
+        live = radar.score_inputs(radar.traffic_light_inputs(window), snapshot(participation.iloc[end - 1]))
+        assert components["score"].iloc[end - 1] == live["score"], window.index[-1]
@@ -0,0 +1,22 @@
+"""近似重复标题分簇"""
+import numpy as np
+
+from stockbot import newsrank
+
+
+def test_bucket_members_are_compared_pairwise(monkeypatch):
+    """所有标题落进同一个 LSH 桶：a 与 b、c 都不像，b ~ c 仍要合并"""
+    monkeypatch.setattr(newsrank, "minhash",
+                        lambda sets: np.zeros((len(sets), newsrank.NUM_PERM), dtype=np.uint32))
+    titles = ["Oil prices slump as OPEC output rises sharply",
+              "Nvidia beats earnings estimates on AI chip demand",
+              "Nvidia beats earnings estimates on strong AI chip demand"]
+    assert newsrank.cluster(titles) == [[0], [1, 2]]
+
+
+def test_only_the_source_suffix_is_stripped():
+    assert newsrank.strip_source("Stocks rally - Reuters", "Reuters") == "Stocks rally"
+    assert newsrank.strip_source("Fed holds rates - what it means for bonds") == \
+        "Fed holds rates - what it means for bonds"
+    assert newsrank.strip_source("Fed holds rates - what it means for bonds", "Reuters") == \
+        "Fed holds rates - what it means for bonds"
@@ -0,0 +1,228 @@
+"""熔断器状态切换、AIMD 限速与 cached 的失败回退 (用假时钟，不真的 sleep)"""
+import pytest
+import requests
+
+from stockbot import cache, resilience, settings
+from stockbot.cache import cached, get_cache, reset_caches
+from stockbot.resilience import CircuitBreaker, CircuitOpenError, TokenBucket, Upstream
+
+
+class FakeClock:
+    """替换模块里的 time：monotonic()/time() 返回假时间，sleep() 只把时间往前拨"""
+
+    def __init__(self, now=1000.0):
+        self.now = now
+        self.slept = []
+
+    def monotonic(self):
+        return self.now
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(resilience, "time", fake)
+    monkeypatch.setattr(cache, "time", fake)
+    monkeypatch.setattr(settings, "UPSTREAM_GUARD", True)
+    return fake
+
+
+def http_error(status):
+    response = requests.Response()
+    response.status_code = status
+    return requests.HTTPError(f"{status} error", response=response)
+
+
+class Flaky:
+    """按给定顺序抛异常或返回值的可调用对象"""
+
+    def __init__(self, *outcomes):
+        self.outcomes = list(outcomes)
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        outcome = self.outcomes.pop(0) if len(self.outcomes) > 1 else self.outcomes[0]
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+
+# === 熔断器 ===
+def test_breaker_trips_after_threshold_failures(clock):
+    breaker = CircuitBreaker(threshold=3, reset_seconds=60)
+    for _ in range(2):
+        assert breaker.allow()
+        breaker.record_failure()
+    assert breaker.state == breaker.CLOSED
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == breaker.OPEN
+    assert breaker.trips == 1
+
+
+def test_open_breaker_rejects_until_cooldown_then_probes_once(clock):
+    breaker = CircuitBreaker(threshold=1, reset_seconds=60)
+    breaker.record_failure()
+    clock.now += 59
+    assert not breaker.allow()
+    clock.now += 1
+    # half-open：只放一个探测请求，探测还没结束时其余请求继续被拒
+    assert breaker.allow()
+    assert breaker.state == breaker.HALF_OPEN
+    assert not breaker.allow()
+    assert breaker.rejected == 2
+    breaker.record_success()
+    assert breaker.state == breaker.CLOSED
+    assert breaker.failures == 0
+    assert breaker.allow()
+
+
+def test_failed_probe_reopens_breaker(clock):
+    breaker = CircuitBreaker(threshold=1, reset_seconds=60)
+    breaker.record_failure()
+    clock.now += 60
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == breaker.OPEN
+    assert breaker.trips == 2
+    # 冷却从探测失败的时刻重新计算
+    clock.now += 30
+    assert not breaker.allow()
+
+
+def test_upstream_call_walks_breaker_through_its_states(clock):
+    guard = Upstream("test", rate=100, burst=100, retries=0, threshold=2, reset=60)
+    down = Flaky(requests.ConnectionError("down"))
+    for _ in range(2):
+        with pytest.raises(requests.ConnectionError):
+            guard.call(down)
+    assert guard.breaker.state == CircuitBreaker.OPEN
+
+    with pytest.raises(CircuitOpenError):
+        guard.call(down)
+    assert down.calls == 2  # 熔断期间不发请求
+
+    clock.now += 60
+    assert guard.call(lambda: "ok") == "ok"
+    assert guard.stats()["state"] == CircuitBreaker.CLOSED
+    assert guard.stats()["rejected"] == 1
+
+
+def test_retries_stop_once_breaker_opens(clock):
+    guard = Upstream("test", rate=100, burst=100, retries=5, threshold=2, reset=60)
+    down = Flaky(http_error(503))
+    with pytest.raises(requests.HTTPError):
+        guard.call(down)
+    assert down.calls == 2
+    assert guard.retried == 1
+
+
+def test_timeouts_are_not_retried(clock):
+    guard = Upstream("test", rate=100, burst=100, retries=3, threshold=5, reset=60)
+    slow = Flaky(requests.Timeout("slow"))
+    with pytest.raises(requests.Timeout):
+        guard.call(slow)
+    assert slow.calls == 1
+
+
+def test_empty_result_counts_as_failure_and_is_retried(clock):
+    guard = Upstream("test", rate=100, burst=100, retries=2, threshold=5, reset=60)
+    fetch = Flaky("", "", "data")
+    assert guard.call(fetch, is_failure=lambda result: not result) == "data"
+    assert fetch.calls == 3
+    assert guard.failures == 2
+    assert guard.breaker.failures == 0
+
+
+# === AIMD 限速 ===
+def test_rate_halves_on_429_and_recovers_additively(clock):
+    guard = Upstream("test", rate=10, burst=10, retries=1, threshold=5, reset=60)
+    assert guard.call(Flaky(http_error(429), "ok")) == "ok"
+    # 429 减半，随后那次成功加回 max_rate 的 10%
+    assert guard.bucket.rate == pytest.approx(5 + 1)
+    for _ in range(10):
+        guard.call(lambda: "ok")
+    assert guard.bucket.rate == 10
+
+
+def test_rate_never_drops_below_floor(clock):
+    bucket = TokenBucket(rate=10, burst=1)
+    for _ in range(10):
+        bucket.penalize()
+    assert bucket.rate == pytest.approx(10 * TokenBucket.MIN_RATE_FRACTION)
+
+
+def test_bucket_sleeps_when_tokens_run_out(clock):
+    bucket = TokenBucket(rate=2, burst=1)
+    assert bucket.acquire() == 0
+    assert bucket.acquire() == pytest.approx(0.5)
+    assert clock.slept == [pytest.approx(0.5)]
+
+
+def test_retry_after_header_is_honoured(clock):
+    guard = Upstream("test", rate=100, burst=100, retries=1, threshold=5, reset=60)
+    throttled = http_error(429)
+    throttled.response.headers["Retry-After"] = "3"
+    guard.call(Flaky(throttled, "ok"))
+    assert clock.slept == [3.0]
+
+
+# === cached 的失败回退 ===
+@pytest.fixture
+def guarded_source(clock, monkeypatch):
+    """经 Upstream 调用的缓存函数；上游失败时和 stockbot.sources 一样返回空结果"""
+    reset_caches()
+    monkeypatch.setitem(settings.CACHE_TTLS, "test", 60)
+    guard = Upstream("test", rate=100, burst=100, retries=0, threshold=1, reset=600)
+    fetch = Flaky("v1")
+
+    @cached("test", skip=lambda result: result is None)
+    def load(query):
+        try:
+            return guard.call(fetch)
+        except Exception:
+            return None
+
+    yield load, fetch, guard
+    reset_caches()
+
+
+def test_skip_serves_stale_entry_when_upstream_fails(guarded_source, clock):
+    load, fetch, guard = guarded_source
+    assert load("q") == "v1"
+    clock.now += 61
+    fetch.outcomes = [requests.ConnectionError("down")]
+    assert load("q") == "v1"
+    assert guard.breaker.state == CircuitBreaker.OPEN
+
+    # 熔断期间请求被拒，同样回退到旧值，且不调用上游
+    assert load("q") == "v1"
+    assert fetch.calls == 2
+    assert get_cache("test").stats()["stale_served"] == 2
+
+
+def test_skip_without_previous_value_returns_failure(guarded_source, clock):
+    load, fetch, _ = guarded_source
+    fetch.outcomes = [requests.ConnectionError("down")]
+    assert load("q") is None
+    # 失败结果不写缓存，上游恢复后下一次调用直接拿到新值
+    fetch.outcomes = ["v2"]
+    clock.now += 600
+    assert load("q") == "v2"
+
+
+def test_stale_entry_older_than_max_age_is_not_served(guarded_source, clock, monkeypatch):
+    load, fetch, _ = guarded_source
+    monkeypatch.setattr(settings, "CACHE_STALE_MAX_AGE", 3600)
+    assert load("q") == "v1"
+    clock.now += 3601
+    fetch.outcomes = [requests.ConnectionError("down")]
+    assert load("q") is None
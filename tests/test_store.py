@@ -0,0 +1,79 @@
+"""行情库的同步状态：收盘后冷启动下载失败不能一直当作已同步"""
+from datetime import datetime
+
+import pandas as pd
+import pytest
+
+from stockbot import store
+
+# 周五收盘后
+NOW = datetime(2025, 6, 27, 18, 0, tzinfo=store.NY_TZ)
+
+
+def make_bars(end="2025-06-27", periods=5):
+    index = pd.bdate_range(end=end, periods=periods)
+    return pd.DataFrame({field: 100.0 for field in store.FIELDS}, index=index)
+
+
+@pytest.fixture
+def price_store(tmp_path, monkeypatch):
+    """收盘后的行情库；clock["now"] 是 time.time() 的值，downloads 记录每次请求的 ticker"""
+    clock = {"now": NOW.timestamp()}
+    monkeypatch.setattr(store.time, "time", lambda: clock["now"])
+    monkeypatch.setattr(store, "is_market_open", lambda now=None: False)
+    monkeypatch.setattr(store, "last_session_close", lambda now=None: NOW.replace(hour=16))
+    return store.PriceStore(str(tmp_path / "prices.sqlite"), recheck_seconds=300), clock
+
+
+def test_failed_cold_download_is_retried_after_backoff(price_store, monkeypatch):
+    prices, clock = price_store
+    downloads = []
+    responses = [{}, {"SPY": make_bars()}]
+
+    def download(tickers, start):
+        downloads.append(list(tickers))
+        return responses.pop(0)
+
+    monkeypatch.setattr(store, "_download", download)
+
+    assert prices.get_closes(["SPY"], "2025-06-01").empty
+    # 退避期内不重复请求
+    clock["now"] += 60
+    assert prices.get_closes(["SPY"], "2025-06-01").empty
+    assert downloads == [["SPY"]]
+
+    # 退避到期后即使已收盘也重试全量
+    clock["now"] += 300
+    closes = prices.get_closes(["SPY"], "2025-06-01")
+    assert downloads == [["SPY"], ["SPY"]]
+    assert list(closes["SPY"]) == [100.0] * 5
+
+
+def test_repeated_failures_refresh_the_placeholder(price_store, monkeypatch):
+    prices, clock = price_store
+    downloads = []
+    monkeypatch.setattr(store, "_download", lambda tickers, start: downloads.append(list(tickers)) or {})
+
+    prices.get_closes(["SPY"], "2025-06-01")
+    clock["now"] += 400
+    prices.get_closes(["SPY"], "2025-06-01")
+    # 第二次失败刷新了 checked_at，紧接着的调用仍在退避期内
+    clock["now"] += 60
+    prices.get_closes(["SPY"], "2025-06-01")
+    assert len(downloads) == 2
+
+
+def test_synced_ticker_stays_fresh_until_next_open(price_store, monkeypatch):
+    prices, clock = price_store
+    downloads = []
+
+    def download(tickers, start):
+        downloads.append(list(tickers))
+        return {"SPY": make_bars()}
+
+    monkeypatch.setattr(store, "_download", download)
+
+    prices.get_closes(["SPY"], "2025-06-01")
+    clock["now"] += 3600
+    prices.get_closes(["SPY"], "2025-06-01")
+    assert len(downloads) == 1
@@ -0,0 +1,82 @@
+"""盯盘模式的日线 Stage：以最近一个收盘日为 key，行情库里当天盘中的未完成K线不能影响结果"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from stockbot import breadth, radar, watch
+from stockbot.cache import reset_caches
+
+SESSION = pd.Timestamp("2025-06-27")
+TODAY = pd.Timestamp("2025-06-30")
+
+
+class FakeStore:
+    def __init__(self, closes):
+        self.closes = closes
+
+    def get_closes(self, tickers, start):
+        return self.closes[tickers]
+
+
+def daily_closes(partial_today):
+    """截至 SESSION 的 60 个交易日 SPY / RSP 同步上涨；partial_today 时再加一根当天的盘中K线 (SPY 涨、RSP 跌)"""
+    dates = pd.bdate_range(end=SESSION, periods=60)
+    trend = np.linspace(100, 110, len(dates))
+    closes = pd.DataFrame({"SPY": trend, "RSP": trend * np.linspace(1, 1.02, len(dates))}, index=dates)
+    if partial_today:
+        closes.loc[TODAY] = {"SPY": closes["SPY"].iloc[-1] * 1.05, "RSP": closes["RSP"].iloc[-1] * 0.95}
+    return closes
+
+
+def constituent_history(partial_today):
+    """成分股逐日指标：截至 SESSION 的 30 天 + 当天一行 (partial_today 为 False 时去掉)"""
+    dates = pd.DatetimeIndex(list(pd.bdate_range(end=SESSION, periods=30)) + [TODAY])
+    n = len(dates)
+    history = pd.DataFrame({
+        "pct_above_50": np.linspace(40, 60, n), "pct_above_200": np.full(n, 55.0),
+        "advances": np.arange(n), "declines": np.arange(n)[::-1], "ad_line": np.arange(n) * 10,
+        "new_highs": np.full(n, 5), "new_lows": np.full(n, 2), "mcclellan": np.linspace(-10, 10, n),
+    }, index=dates)
+    return history if partial_today else history.iloc[:-1]
+
+
+@pytest.fixture
+def daily_stage(monkeypatch):
+    """返回 run(partial_today)：冷缓存下跑一次 Watcher 的日线 Stage，给出其结果"""
+    monkeypatch.setattr(watch, "last_session_close",
+                        lambda: SESSION.replace(hour=16).tz_localize(watch.NY_TZ))
+    monkeypatch.setattr(breadth.settings, "BREADTH_INDEXES", ["sp500"])
+    monkeypatch.setattr(breadth, "get_panel", lambda index: type("Panel", (), {"tickers": ["A", "B"]})())
+
+    def run(partial_today):
+        reset_caches()
+        monkeypatch.setattr(radar, "get_price_store", lambda: FakeStore(daily_closes(partial_today)))
+        monkeypatch.setattr(breadth, "indicator_history", lambda index: constituent_history(partial_today))
+        watcher = watch.Watcher("EN")
+        assert watcher.daily.evaluate()
+        return watcher.daily.key, watcher.daily.value
+
+    yield run
+    reset_caches()
+
+
+def test_daily_stage_ignores_todays_partial_bar(daily_stage):
+    key, closed = daily_stage(partial_today=False)
+    partial_key, partial = daily_stage(partial_today=True)
+
+    assert key == partial_key == SESSION.date().isoformat()
+    assert partial == closed
+    assert not closed["divergence"]
+    assert closed["constituents"]["sp500"]["date"] == key
+
+
+def test_partial_bar_would_change_the_signal(monkeypatch):
+    """对照：不截断时当天的盘中K线确实会翻出背离信号 (否则上面的测试说明不了什么)"""
+    reset_caches()
+    monkeypatch.setattr(radar, "get_price_store", lambda: FakeStore(daily_closes(partial_today=True)))
+    _, signal = radar.analyze_market_breadth()
+    _, session_signal = radar.analyze_market_breadth(until=SESSION.date().isoformat())
+    reset_caches()
+
+    assert "DIVERGENCE" in signal
+    assert "DIVERGENCE" not in session_signal